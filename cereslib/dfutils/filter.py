@@ -19,6 +19,10 @@
 #   Daniel Izquierdo Cortazar <dizquierdo@bitergia.com>
 #
 
+import operator
+
+import numpy as np
+
 
 class Filter(object):
     """ Class that filters information for a given dataset.
@@ -42,6 +46,17 @@ class FilterRows(Filter):
     in the list of attributes. This class removes those lines.
     """
 
+    OPERATORS = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+        'in': lambda series, values: series.isin(values),
+        'not in': lambda series, values: ~series.isin(values)
+    }
+
     def __init__(self, data):
         """ Main constructor of the class
 
@@ -62,14 +77,58 @@ class FilterRows(Filter):
         :rtype: pandas.DataFrame
         """
 
-        for column in columns:
+        return self.filter_predicates([(column, '!=', value) for column in columns])
+
+    def filter_predicates(self, predicates):
+        """ This method keeps the rows matching all the predicates.
+        A predicate is a tuple (column, operator, value), where the
+        supported operators are '==', '!=', '<', '<=', '>', '>=',
+        'in' and 'not in'.
+
+        Predicates are combined in a single mask, so the data is
+        copied only once. Predicates on empty columns or columns
+        with only null values are ignored.
+
+        :param predicates: list of tuples (column, operator, value)
+        :type predicates: list
+
+        :returns: filtered dataframe
+        :rtype: pandas.DataFrame
+        """
+
+        for column, op, _ in predicates:
             if column not in self.data.columns:
                 raise ValueError("Column %s not in DataFrame columns: %s" % (column, list(self.data)))
+            if op not in self.OPERATORS:
+                raise ValueError("Operator %s not in supported operators: %s" % (op, list(self.OPERATORS)))
 
-        for column in columns:
+        mask = np.ones(len(self.data), dtype=bool)
+        for column, op, value in predicates:
             # Filtering on empty data series doesn't make sense at all and also would raise an error
-            column_len = len(self.data[column])
-            if column_len > 0 and column_len != self.data[column].isnull().sum():
-                self.data = self.data[self.data[column] != value]
+            if self.data[column].notnull().any():
+                mask &= self.OPERATORS[op](self.data[column], value).to_numpy(dtype=bool)
+
+        if not mask.all():
+            self.data = self.data[mask]
+
+        return self.data
+
+    def filter_expression(self, expression):
+        """ This method keeps the rows matching a boolean expression
+        on the columns of the data, e.g. "filepath != '-' and files > 0".
+        The expression is evaluated with numexpr when it is installed.
+
+        :param expression: boolean expression
+        :type expression: string
+
+        :returns: filtered dataframe
+        :rtype: pandas.DataFrame
+        """
+
+        mask = self.data.eval(expression)
+        mask = np.asarray(mask, dtype=bool)
+
+        if not mask.all():
+            self.data = self.data[mask]
 
         return self.data
@@ -20,9 +20,40 @@
 #
 
 
+import numpy as np
+
 import pandas
 
-import scipy
+# pandas 2 infers the format of the dates by default and deprecates the argument
+INFER_DATETIME_FORMAT = {'infer_datetime_format': True} if int(pandas.__version__.split('.')[0]) < 2 else {}
+
+
+def downcast(values):
+    """ Downcast a numeric column to the smallest type that keeps its values.
+    Integers are converted to the smallest integer type, and floats to
+    float32 when no precision is lost. Other columns are returned as they are.
+
+    :param values: column to downcast
+    :type values: pandas.Series
+
+    :returns: downcasted column
+    :rtype: pandas.Series
+    """
+
+    if pandas.api.types.is_bool_dtype(values):
+        return values
+
+    if pandas.api.types.is_integer_dtype(values):
+        return pandas.to_numeric(values, downcast='integer')
+
+    if pandas.api.types.is_float_dtype(values) and values.dtype != np.float32:
+        converted = values.astype(np.float32)
+        with np.errstate(invalid='ignore'):
+            lossless = (converted.astype(values.dtype) == values) | values.isnull()
+        if lossless.all():
+            return converted
+
+    return values
 
 
 class Format(object):
@@ -53,7 +84,7 @@ class Format(object):
 
         for column in columns:
             if column not in data.columns:
-                data[column] = scipy.zeros(len(data))
+                data[column] = np.zeros(len(data))
 
         return data
 
@@ -69,19 +100,18 @@ class Format(object):
         :rtype: pandas.DataFrame
         """
 
-        for key in matching.keys():
-            if key in data.columns:
-                data.rename(columns={key: matching[key]})
+        return data.rename(columns=matching)
 
-        return data
-
-    def format_dates(self, data, columns):
+    def format_dates(self, data, columns, date_format=None):
         """ This method translates columns values into datetime objects
 
         :param data: original Pandas dataframe
         :param columns: list of columns to cast the date to a datetime object
+        :param date_format: format of the dates, e.g. '%Y-%m-%d'. When not
+            provided, it is guessed from the first value.
         :type data: pandas.DataFrame
         :type columns: list of strings
+        :type date_format: string
 
         :returns: Pandas dataframe with updated 'columns' with datetime objects
         :rtype: pandas.DataFrame
@@ -89,7 +119,7 @@ class Format(object):
 
         for column in columns:
             if column in data.columns:
-                data[column] = pandas.to_datetime(data[column])
+                data[column] = self.__to_datetime(data[column], date_format)
 
         return data
 
@@ -105,8 +135,78 @@ class Format(object):
         :rtype: pandas.DataFrame
         """
 
-        for column in columns:
-            if column in data.columns:
-                data = data.drop(column, axis=1)
+        return data.drop(columns=[column for column in columns if column in data.columns])
 
-        return data
+    def conform(self, data, schema):
+        """ This method applies a schema to the data in a single pass,
+        building the resulting dataframe only once.
+
+        The schema is a dictionary with the following keys, all of them
+        optional:
+         * drop: list of columns to remove
+         * renames: dictionary of old and new names of columns
+         * fields: list of columns that must be in the data. Missing ones
+           are added with their default value, or 0's if there is none
+         * defaults: dictionary of default values by column, used for
+           missing columns and to fill in null values
+         * dates: dictionary of date formats by column, e.g. '%Y-%m-%d',
+           or None to guess the format from the first value
+         * dtypes: dictionary of types by column
+         * downcast: when True, numeric columns not in 'dtypes' are
+           converted to the smallest type that keeps their values
+
+        Steps are applied in that order, so 'defaults', 'dates' and
+        'dtypes' use the new names of the columns.
+
+        A ValueError is raised when a column is renamed to the name of
+        another column that is kept.
+
+        :param data: original Pandas dataframe
+        :param schema: schema to apply
+        :type data: pandas.DataFrame
+        :type schema: dictionary
+
+        :returns: Pandas dataframe conforming the schema
+        :rtype: pandas.DataFrame
+        """
+
+        drop = schema.get('drop', [])
+        renames = schema.get('renames', {})
+        defaults = schema.get('defaults', {})
+        dates = schema.get('dates', {})
+        dtypes = schema.get('dtypes', {})
+
+        columns = {}
+        for column in data.columns:
+            if column not in drop:
+                name = renames.get(column, column)
+                if name in columns:
+                    raise ValueError("Column %s can't be renamed to %s, which is already in the data" %
+                                     (column, name))
+                columns[name] = data[column]
+
+        for field in schema.get('fields', []):
+            if field not in columns:
+                columns[field] = pandas.Series(defaults.get(field, 0.0), index=data.index)
+
+        for column, values in columns.items():
+            if column in defaults and values.hasnans:
+                values = values.fillna(defaults[column])
+            if column in dates:
+                values = self.__to_datetime(values, dates[column])
+            if column in dtypes:
+                values = values.astype(dtypes[column])
+            elif schema.get('downcast', False):
+                values = downcast(values)
+            columns[column] = values
+
+        return pandas.DataFrame(columns, index=data.index)
+
+    @staticmethod
+    def __to_datetime(values, date_format):
+        """ Cast a column to datetime. Repeated values are parsed once. """
+
+        if date_format:
+            return pandas.to_datetime(values, format=date_format, cache=True)
+
+        return pandas.to_datetime(values, cache=True, **INFER_DATETIME_FORMAT)
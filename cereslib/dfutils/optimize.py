@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+
+import numpy as np
+
+import pandas
+
+from cereslib.dfutils.format import downcast
+
+
+logger = logging.getLogger(__name__)
+
+
+class Optimize(object):
+    """ Library that reduces the memory used by dataframes
+
+    Dataframes of events store strings, flags and numbers in generic
+    types such as Python objects, int64 or float64. This class checks
+    the values and cardinality of each column and converts it to a
+    smaller type whenever no information is lost:
+     * strings with few distinct values to categorical
+     * the rest of strings to Arrow-backed strings, if requested
+     * booleans stored as objects to (nullable) booleans
+     * numbers to the smallest integer or float type, and floats with
+       integer values and nulls to nullable integers
+
+    Columns of other types, such as lists or dates, are not modified.
+    """
+
+    NULLABLE_INTS = ['Int8', 'Int16', 'Int32', 'Int64']
+
+    def __init__(self):
+        """ Main constructor of the class """
+
+        self.report = None
+
+    def reduce_memory(self, data, categorical_ratio=0.5, arrow_strings=False):
+        """ This method converts the columns of the dataframe to
+        smaller types. The memory used before and after the conversion
+        is logged and stored in 'report', together with the types of
+        the converted columns.
+
+        :param data: original Pandas dataframe
+        :param categorical_ratio: max ratio of distinct values to the
+            number of rows to convert a string column to categorical
+        :param arrow_strings: convert the rest of string columns to
+            Arrow-backed strings (requires pyarrow)
+        :type data: pandas.DataFrame
+        :type categorical_ratio: float
+        :type arrow_strings: boolean
+
+        :returns: Pandas dataframe with the converted columns
+        :rtype: pandas.DataFrame
+        """
+
+        columns = {}
+        changes = {}
+        for column in data.columns:
+            values = self.__reduce(data[column], categorical_ratio, arrow_strings)
+            if values.dtype != data[column].dtype:
+                changes[column] = (str(data[column].dtype), str(values.dtype))
+            columns[column] = values
+
+        optimized = pandas.DataFrame(columns, index=data.index)
+
+        self.report = {
+            "before": int(data.memory_usage(deep=True).sum()),
+            "after": int(optimized.memory_usage(deep=True).sum()),
+            "columns": changes
+        }
+        logger.info("Memory usage reduced from %s to %s bytes (%s columns converted)",
+                    self.report["before"], self.report["after"], len(changes))
+
+        return optimized
+
+    def __reduce(self, values, categorical_ratio, arrow_strings):
+        """ Convert a column to the smallest type that keeps its values """
+
+        if pandas.api.types.is_float_dtype(values) and values.hasnans:
+            return self.__to_nullable_int(values)
+
+        if pandas.api.types.is_numeric_dtype(values):
+            return downcast(values)
+
+        if not pandas.api.types.is_object_dtype(values) or values.empty:
+            return values
+
+        inferred = pandas.api.types.infer_dtype(values, skipna=True)
+
+        if inferred == 'boolean':
+            return values.astype('boolean') if values.hasnans else values.astype(bool)
+
+        if inferred == 'integer':
+            return downcast(pandas.to_numeric(values))
+
+        if inferred == 'string':
+            if values.nunique(dropna=False) <= categorical_ratio * len(values):
+                return values.astype('category')
+            if arrow_strings:
+                return values.astype('string[pyarrow]')
+
+        return values
+
+    def __to_nullable_int(self, values):
+        """ Convert floats with nulls to nullable integers when all
+        of them are integer values; otherwise, downcast them
+        """
+
+        not_null = values.dropna()
+        if not np.array_equal(not_null, np.floor(not_null)) or np.isinf(not_null).any():
+            return downcast(values)
+
+        for dtype in self.NULLABLE_INTS:
+            info = np.iinfo(dtype.lower())
+            if not_null.empty or (not_null.min() >= info.min and not_null.max() <= info.max):
+                return values.astype(dtype)
+
+        return values
@@ -25,7 +25,72 @@ import pandas
 
 import numpy as np
 
+import itertools
+import numbers
+import os
+import pickle
 import re
+import threading
+
+from email.utils import parseaddr
+
+
+# Engines of the enrichers with several implementations. Pandas
+# is the reference one; Polars requires the polars package.
+BACKENDS = ['pandas', 'polars']
+
+_backend = 'pandas'
+
+
+def set_backend(backend):
+    """ Sets the engine used by the enrichers that support several
+    of them: FileType, FilePath, GroupStats, MaxMin, TimeDifference,
+    Onion, SplitLists and Projects (merging a dataframe). Enrichers
+    keep working on pandas dataframes in any case.
+
+    Uuid always runs on pandas: it doesn't join the identities, but
+    looks them up in an index by the hash of their keys, which is
+    built once and reused, so there is no join to hand over.
+
+    :param backend: 'pandas' or 'polars'
+    :type backend: string
+    """
+
+    global _backend
+
+    if backend not in BACKENDS:
+        raise ValueError("Backend %s not in supported backends: %s" % (backend, BACKENDS))
+
+    if backend == 'polars':
+        # Fail early if polars, or pyarrow to convert the dataframes,
+        # is not installed
+        import polars  # noqa: F401
+        import pyarrow  # noqa: F401
+
+    _backend = backend
+
+
+def get_backend():
+    """ Returns the engine used by the enrichers """
+
+    return _backend
+
+
+def _factorize(values):
+    """ Returns the codes and distinct values of a column, as
+    pandas.factorize does, with code -1 for null values. Columns with
+    values that can't be hashed, such as lists, get a code per row.
+    """
+
+    try:
+        return pandas.factorize(values)
+    except TypeError:
+        nulls = values.isna().to_numpy()
+        codes = np.arange(len(values))
+        codes[nulls] = -1
+        uniques = values.to_numpy(dtype=object, copy=True)
+        uniques[nulls] = ''
+        return codes, uniques
 
 
 class Enrich(object):
@@ -40,6 +105,31 @@ class Enrich(object):
     gender, workload adequacy and other metrics for a given commmit.
     """
 
+    # Whether the values added to a row depend only on that row,
+    # so the enricher can run on any subset of the rows
+    ROW_WISE = False
+
+    # Whether the columns written depend only on the arguments and
+    # the content of the columns read (see columns_io), so results
+    # can be cached
+    DETERMINISTIC = False
+
+    @classmethod
+    def columns_io(cls, *args, **kwargs):
+        """ Returns the columns read and written by 'enrich' when it
+        is called with the given arguments. This lets pipelines run
+        several enrichers over the same subset of columns.
+
+        Enrichers that add, remove or sort rows, or whose columns are
+        not known in advance, return None.
+
+        :returns: tuple with the list of columns read and the list
+            of columns written, or None
+        :rtype: tuple
+        """
+
+        return None
+
 
 class PairProgramming(Enrich):
     """ This class splits a commit into 2 of them according to the author name.
@@ -64,6 +154,16 @@ class PairProgramming(Enrich):
 
         self.commits = commits
 
+    @property
+    def data(self):
+        """ Original dataframe, named as in the rest of enrichers """
+
+        return self.commits
+
+    @data.setter
+    def data(self, data):
+        self.commits = data
+
     def enrich(self, column1, column2):
         """ This class splits those commits where column1 and column2
         values are different
@@ -92,13 +192,136 @@ class PairProgramming(Enrich):
 
         # This adds at the end of the original dataframe those rows duplicating
         # information and updating the values in column1
-        return self.commits.append(pair_df)
+        return pandas.concat([self.commits, pair_df])
+
+
+class CoAuthors(Enrich):
+    """ This class splits a commit into as many rows as contributors
+    participated in it.
+
+    Contributors of a commit are its author, its committer when it is
+    not the author, and the developers credited with 'Co-authored-by:'
+    trailers in the commit message. Each row is credited with an equal
+    share of the commit, so the weights of the rows of a commit add up
+    to one.
+    """
+
+    CO_AUTHORED_BY_REGEX = r'^[ \t]*Co-authored-by:[ \t]*(?P<value>.+?)[ \t]*$'
+
+    def __init__(self, data):
+        """ Main constructor of the class where the original dataframe
+        is provided
+
+        :param data: original dataframe with commit information
+        :type data: pandas.DataFrame
+        """
+
+        self.data = data
+
+    def __parse_coauthors(self, messages):
+        """ Returns the positions and names of the co-authors
+        found in the given messages
+        """
+
+        regex = re.compile(self.CO_AUTHORED_BY_REGEX, re.MULTILINE | re.IGNORECASE)
+
+        if not pandas.api.types.is_string_dtype(messages):
+            return np.array([], dtype=np.int64), np.array([], dtype=object)
+
+        # Only messages with trailers need to be parsed
+        mask = messages.str.contains('co-authored-by:', case=False, regex=False, na=False).to_numpy()
+
+        positions = []
+        names = []
+        for position in np.flatnonzero(mask):
+            for name in regex.findall(messages.iat[position]):
+                positions.append(position)
+                names.append(name)
+
+        return np.array(positions, dtype=np.int64), np.array(names, dtype=object)
+
+    def enrich(self, author_column, committer_column=None, message_column=None):
+        """ This method returns a row per contributor of each commit with
+        two new columns:
+         * contributor: name of the contributor credited in the row
+         * contributor_weight: share of the commit credited to the
+           contributor, i.e., 1 / number of contributors of the commit
+
+        The rows of a commit are placed together, keeping the order of
+        the commits and the original index. Instead of appending frames,
+        the rows are built with a single selection of the original rows,
+        so the memory needed is the one of the resulting dataframe.
+
+        :param author_column: column with the author of the commit
+        :param committer_column: column with the committer (optional)
+        :param message_column: column with the commit message (optional)
+        :type author_column: string
+        :type committer_column: string
+        :type message_column: string
+
+        :returns: dataframe with a row per contributor of each commit
+        :rtype: pandas.DataFrame
+        """
+
+        for column in [author_column, committer_column, message_column]:
+            if column is not None and column not in self.data.columns:
+                return self.data
+
+        authors = self.data[author_column].to_numpy(dtype=object)
+        nrows = len(authors)
+
+        # Every commit is credited to its author
+        positions = [np.arange(nrows)]
+        contributors = [authors]
+
+        # Committers are credited when they are not the authors
+        if committer_column:
+            committers = self.data[committer_column].to_numpy(dtype=object)
+            committed = np.flatnonzero(committers != authors)
+            positions.append(committed)
+            contributors.append(committers[committed])
+
+        # Co-authors are credited unless they are already credited
+        if message_column:
+            coauthored, coauthors = self.__parse_coauthors(self.data[message_column])
+            credited = {}
+            keep = np.zeros(len(coauthored), dtype=bool)
+            for count, (position, name) in enumerate(zip(coauthored, coauthors)):
+                if position not in credited:
+                    credited[position] = {authors[position]}
+                    if committer_column:
+                        credited[position].add(committers[position])
+                keep[count] = name not in credited[position]
+                credited[position].add(name)
+            positions.append(coauthored[keep])
+            contributors.append(coauthors[keep])
+
+        positions = np.concatenate(positions)
+        contributors = np.concatenate(contributors)
+
+        # Group the rows of each commit keeping the order author,
+        # committer and co-authors thanks to the stable sort
+        order = np.argsort(positions, kind='stable')
+        positions = positions[order]
+        counts = np.bincount(positions, minlength=nrows)
+
+        data = self.data.take(positions)
+        data["contributor"] = contributors[order]
+        data["contributor_weight"] = 1.0 / counts[positions]
+
+        return data
 
 
 class FileType(Enrich):
     """ This class creates a new column with the file type
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
+    CODE_REGEX = r"\.bazel$|\.bazelrc$|\.bzl$|\.c$|\.cc$|\.cp$|\.cpp$|\.cxx$|\.c\+\+$|" +\
+                 r"\.go$|\.h$|\.js$|\.mjs$|\.java$|\.py$|\.rs$|\.sh$|\.tf$|\.ts$"
+
     def __init__(self, data):
         """ Main constructor of the class where the original dataframe
         is provided
@@ -124,17 +347,27 @@ class FileType(Enrich):
         if column not in self.data:
             return self.data
 
+        if get_backend() == 'polars':
+            from cereslib.enrich import polars_backend
+
+            self.data["filetype"] = polars_backend.file_type(self.data[column], self.CODE_REGEX)
+            return self.data
+
         # Insert a new column with default values
         self.data["filetype"] = 'Other'
 
         # Insert 'Code' only in those rows that are
         # detected as being source code thanks to its extension
-        reg = "\.bazel$|\.bazelrc$|\.bzl$|\.c$|\.cc$|\.cp$|\.cpp$|\.cxx$|\.c\+\+$|" +\
-              "\.go$|\.h$|\.js$|\.mjs$|\.java$|\.py$|\.rs$|\.sh$|\.tf$|\.ts$"
-        self.data.loc[self.data[column].str.contains(reg), 'filetype'] = 'Code'
+        self.data.loc[self.data[column].str.contains(self.CODE_REGEX), 'filetype'] = 'Code'
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, column):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['filetype']
+
 
 class FilePath(Enrich):
     """ This class creates new columns with:
@@ -143,6 +376,9 @@ class FilePath(Enrich):
             * File name (excluding directories)
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
     def __init__(self, data):
         """ Main constructor of the class where the original dataframe
         is provided
@@ -172,6 +408,13 @@ class FilePath(Enrich):
         if column not in self.data:
             return self.data
 
+        if get_backend() == 'polars':
+            from cereslib.enrich import polars_backend
+
+            for name, values in polars_backend.file_path(self.data[column]).items():
+                self.data[name] = values
+            return self.data
+
         # Insert new columns
         self.data['file_name'] = \
             self.data.apply(lambda row: row[column][row[column].rfind('/') + 1:],
@@ -207,11 +450,199 @@ class FilePath(Enrich):
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, column):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['file_name', 'file_ext', 'file_dir_name', 'file_path_list']
+
+
+class ProjectsIndex(object):
+    """ This class stores the projects that repositories belong to
+    and finds the project of a repository in three ways:
+        * Exact match of the repository
+        * Match of the normalized URL of the repository, which removes
+          the scheme, user info and trailing '/' or '.git', so
+          'git://host/org/repo', 'https://host/org/repo.git' and
+          'git@host:org/repo' are the same repository
+        * Longest prefix among those entries ending with '/*', e.g.
+          'host/org/*' or 'org/*'. Prefixes with no host match the
+          path of the repository.
+
+    The index is built once and can be stored on disk to be reused.
+    """
+
+    PREFIX_WILDCARD = '/*'
+    # Key of the trie nodes where the project is stored, which
+    # can't be a segment, as empty ones in 'org//repo'
+    PROJECT_KEY = None
+
+    def __init__(self, project_column='project'):
+        """ Main constructor of the class
+
+        :param project_column: name of the column added by the index
+        :type project_column: string
+        """
+
+        self.project_column = project_column
+        self.exact = {}
+        self.normalized = {}
+        self.prefixes = {}
+
+    @staticmethod
+    def normalize(repository):
+        """ Normalize the URL of a repository
+
+        :param repository: repository URL or path
+        :type repository: string
+
+        :returns: normalized URL
+        :rtype: string
+        """
+
+        url = repository.strip()
+        url = re.sub(r'^[a-zA-Z][a-zA-Z0-9+.-]*://', '', url)
+        url = re.sub(r'^[^@/]+@', '', url)
+        # scp-like syntax: host:org/repo
+        url = re.sub(r'^([^/:]+):(?!\d+/)', r'\1/', url)
+        url = url.rstrip('/')
+        if url.endswith('.git'):
+            url = url[:-len('.git')]
+
+        return url.rstrip('/')
+
+    @classmethod
+    def from_dataframe(cls, projects, repository_column, project_column):
+        """ Build an index from a dataframe of repositories and projects
+
+        :param projects: information about repository - project
+        :param repository_column: column with the repositories
+        :param project_column: column with the projects
+        :type projects: pandas.DataFrame
+        :type repository_column: string
+        :type project_column: string
+
+        :returns: index of projects
+        :rtype: ProjectsIndex
+        """
+
+        index = cls(project_column=project_column)
+        for repository, project in zip(projects[repository_column], projects[project_column]):
+            index.add(repository, project)
+
+        return index
+
+    @classmethod
+    def load(cls, file_path):
+        """ Load an index stored with the save method
+
+        :param file_path: path of the file
+        :type file_path: string
+
+        :returns: index of projects
+        :rtype: ProjectsIndex
+        """
+
+        with open(file_path, 'rb') as fd:
+            return pickle.load(fd)
+
+    def save(self, file_path):
+        """ Store the index on disk
+
+        :param file_path: path of the file
+        :type file_path: string
+        """
+
+        with open(file_path, 'wb') as fd:
+            pickle.dump(self, fd, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def add(self, repository, project):
+        """ Add a repository, or a prefix of repositories ending
+        with '/*', to the index
+
+        :param repository: repository URL, path or prefix
+        :param project: project the repository belongs to
+        :type repository: string
+        :type project: string
+        """
+
+        if repository.endswith(self.PREFIX_WILDCARD):
+            node = self.prefixes
+            prefix = self.normalize(repository[:-len(self.PREFIX_WILDCARD)])
+            for segment in prefix.split('/'):
+                node = node.setdefault(segment, {})
+            node[self.PROJECT_KEY] = project
+        else:
+            self.exact[repository] = project
+            self.normalized[self.normalize(repository)] = project
+
+    def __longest_prefix(self, segments):
+        """ Find the project of the longest prefix of the segments """
+
+        project = None
+        node = self.prefixes
+        for segment in segments:
+            if segment not in node:
+                break
+            node = node[segment]
+            project = node.get(self.PROJECT_KEY, project)
+
+        return project
+
+    def lookup(self, repository):
+        """ Find the project of a repository
+
+        :param repository: repository URL or path
+        :type repository: string
+
+        :returns: project or None when it is not found
+        """
+
+        if not isinstance(repository, str):
+            return None
+
+        if repository in self.exact:
+            return self.exact[repository]
+
+        url = self.normalize(repository)
+        if url in self.normalized:
+            return self.normalized[url]
+
+        segments = url.split('/')
+        project = self.__longest_prefix(segments)
+        if project is None:
+            # Prefixes with no host
+            project = self.__longest_prefix(segments[1:])
+
+        return project
+
+    def get_projects(self, repositories):
+        """ Find the projects of a column of repositories. Each distinct
+        repository is looked up only once.
+
+        :param repositories: column of repositories
+        :type repositories: pandas.Series
+
+        :returns: column of projects, with null values for those
+            repositories not found
+        :rtype: pandas.Series
+        """
+
+        codes, uniques = pandas.factorize(repositories)
+        # Code -1 (null repository) takes the last element
+        projects = [self.lookup(repository) for repository in uniques] + [None]
+        projects = np.array(projects, dtype=object)
+
+        return pandas.Series(projects[codes], index=repositories.index)
+
 
 class Projects(Enrich):
     """ This class adds project info based on a pre-processed dataset
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
     def __init__(self, data):
         """ Main constructor of the class where the original dataframe
         is provided.
@@ -227,10 +658,15 @@ class Projects(Enrich):
         that contains information about the associated project
         that the event in 'column' belongs to.
 
+        Projects are given as a dataframe, merged on 'column', or as a
+        ProjectsIndex, which also supports normalized URLs and prefixes.
+        In the latter, the name of the new column is the 'project_column'
+        of the index.
+
         :param column: column with information related to the project
         :type column: string
         :param projects: information about item - project
-        :type projects: pandas.DataFrame
+        :type projects: pandas.DataFrame or ProjectsIndex
 
         :returns: original data frame with a new column named 'project'
         :rtype: pandas.DataFrame
@@ -239,16 +675,38 @@ class Projects(Enrich):
         if column not in self.data.columns:
             return self.data
 
-        self.data = pandas.merge(self.data, projects, how='left', on=column)
+        if isinstance(projects, ProjectsIndex):
+            self.data[projects.project_column] = projects.get_projects(self.data[column])
+        elif get_backend() == 'polars' and not (set(projects.columns) & set(self.data.columns)) - {column}:
+            from cereslib.enrich import polars_backend
+
+            self.data = polars_backend.left_join(self.data, projects, column)
+        else:
+            self.data = pandas.merge(self.data, projects, how='left', on=column)
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, column, projects):
+        """ Returns the columns read and written by 'enrich'. Merging
+        a dataframe of projects may add rows, so only the columns of a
+        ProjectsIndex are known.
+        """
+
+        if not isinstance(projects, ProjectsIndex):
+            return None
+
+        return [column], [projects.project_column]
+
 
 class MessageLogFlag(Enrich):
     """ This class adds specific events for the
     given message log body
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
     FLAGS_REGEX = {'Patch by Blink': r'\s*Patch by (?P<value>.+)$',
                    'Patch by WebKit': r'\s*Patch by (?P<value>.+) on .+$',
                    'Reviewed by WebKit': r'\s*Reviewed by (?P<value>.+) on .+$'}
@@ -321,12 +779,21 @@ class MessageLogFlag(Enrich):
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, column):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['flags', 'values']
+
 
 class EmailFlag(Enrich):
     """ This class adds specific events for the given
     email body
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
     FLAGS_REGEX = {
         'Acked-by': '^Acked-by:(?P<value>.+)$',
         'Cc': '^Cc:(?P<value>.+)',
@@ -401,12 +868,21 @@ class EmailFlag(Enrich):
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, column):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['flags', 'values']
+
 
 class SplitEmailDomain(Enrich):
     """ This class returns a new column with the domain of the email
     analyzed
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
     def __parse_email(self, email):
         """ This function returns the domain of a given email
         """
@@ -435,6 +911,8 @@ class SplitEmailDomain(Enrich):
         not a proper email address an 'unknown'
         domain is returned.
 
+        Each distinct email address is parsed only once.
+
         :param column: column where the text to analyze is found
         :type data: string
         """
@@ -442,26 +920,41 @@ class SplitEmailDomain(Enrich):
         if column not in self.data.columns:
             return self.data
 
-        self.data['domain'] = self.data[column].apply(lambda x: self.__parse_email(x))
+        codes, uniques = _factorize(self.data[column])
+        # Code -1 (null values) takes the last element
+        domains = [self.__parse_email(email) for email in uniques] + ["unknown"]
+
+        self.data['domain'] = np.array(domains, dtype=object)[codes]
         return self.data
 
+    @classmethod
+    def columns_io(cls, column):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['domain']
+
 
 class ToUTF8(Enrich):
     """ This class helps to migrate (or ignore) the strings to utf-8
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
+    SURROGATES_REGEX = '[\ud800-\udfff]'
+
     def __remove_surrogates(self, s, method='replace'):
         """ Remove surrogates in the specified string
         """
 
-        if type(s) == list and len(s) == 1:
+        if type(s) is list and len(s) == 1:
             if self.__is_surrogate_escaped(s[0]):
                 return s[0].encode('utf-8', method).decode('utf-8')
             else:
                 return ""
-        if type(s) == list:
+        if type(s) is list:
             return ""
-        if type(s) != str:
+        if type(s) is not str:
             return ""
         if self.__is_surrogate_escaped(s):
             return s.encode('utf-8', method).decode('utf-8')
@@ -478,6 +971,26 @@ class ToUTF8(Enrich):
                 return True
         return False
 
+    def __convert(self, values):
+        """ Convert the values of a column. Columns made only of strings
+        are checked at once and only the strings with surrogates are
+        converted. Otherwise, values are converted one by one.
+
+        :returns: converted values or None if the column was clean
+        """
+
+        if pandas.api.types.infer_dtype(values, skipna=False) != 'string' or values.hasnans:
+            return values.map(self.__remove_surrogates)
+
+        surrogates = values.str.contains(self.SURROGATES_REGEX, regex=True).to_numpy(dtype=bool)
+        if not surrogates.any():
+            return None
+
+        values = values.copy()
+        values[surrogates] = values[surrogates].map(self.__remove_surrogates)
+
+        return values
+
     def __init__(self, data):
         """ Main constructor
 
@@ -490,6 +1003,12 @@ class ToUTF8(Enrich):
     def enrich(self, columns):
         """ This method convert to utf-8 the provided columns
 
+        Strings with surrogates are converted replacing them, while
+        values that are not strings are converted to empty strings,
+        except single element lists, which are converted as their
+        element if it has surrogates. Columns of strings with no
+        surrogates are left untouched.
+
         :param columns: list of columns to convert to
         :type columns: list of strings
         :return: original dataframe with converted strings
@@ -501,11 +1020,18 @@ class ToUTF8(Enrich):
                 return self.data
 
         for column in columns:
-            a = self.data[column].apply(self.__remove_surrogates)
-            self.data[column] = a
+            values = self.__convert(self.data[column])
+            if values is not None:
+                self.data[column] = values
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, columns):
+        """ Returns the columns read and written by 'enrich' """
+
+        return list(columns), list(columns)
+
 
 class SplitEmail(Enrich):
     """ This class split the tuple 'name <email>' into 'name' and 'email'.
@@ -513,12 +1039,16 @@ class SplitEmail(Enrich):
     one
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
+    # Common 'Name <address>' form, parsed the same way as parseaddr does
+    NAME_ADDR_REGEX = r"^(\w[\w.'-]*(?: [\w.'-]+)*) <([\w+-]+(?:\.[\w+-]+)*@[\w-]+(?:\.[\w-]+)*)>$"
+
     def __parse_addr(self, addr):
         """ Parse email addresses
         """
 
-        from email.utils import parseaddr
-
         value = parseaddr(addr)
         return value[0], value[1]
 
@@ -531,14 +1061,21 @@ class SplitEmail(Enrich):
 
         self.data = data
 
-    def enrich(self, column):
+    def enrich(self, column, fast=True):
         """ This method creates two new columns: user and email.
         Those contain the information coming from the usual tuple of
         user <email> found in several places like in the mailing lists
         or the git repositories commit.
 
+        Each distinct value of the column is parsed only once. When 'fast'
+        is set, values in the common form 'Name <address>' are parsed with
+        a regular expression, and the rest with email.utils.parseaddr.
+        Null values produce empty user and email.
+
         :param column: column to be used for this parser
+        :param fast: use the regular expression for the common form
         :type column: string
+        :type fast: boolean
 
         :returns: dataframe with two new columns
         :rtype: pandas.DataFrame
@@ -547,10 +1084,35 @@ class SplitEmail(Enrich):
         if column not in self.data.columns:
             return self.data
 
-        self.data["user"], self.data["email"] = zip(*self.data[column].map(self.__parse_addr))
+        regex = re.compile(self.NAME_ADDR_REGEX)
+
+        codes, uniques = _factorize(self.data[column])
+        users = []
+        emails = []
+        for addr in uniques:
+            match = regex.match(addr) if fast and isinstance(addr, str) else None
+            if match:
+                user, email = match.groups()
+            else:
+                user, email = self.__parse_addr(addr)
+            users.append(user)
+            emails.append(email)
+
+        # Code -1 (null values) takes the last element
+        users.append('')
+        emails.append('')
+
+        self.data["user"] = np.array(users, dtype=object)[codes]
+        self.data["email"] = np.array(emails, dtype=object)[codes]
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, column, fast=True):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['user', 'email']
+
 
 class SplitLists(Enrich):
     """ This class looks for lists in the given columns and append at the
@@ -588,37 +1150,45 @@ class SplitLists(Enrich):
         {"C1":"V1", "C2":3, "C3":"c", "C4":3.3}
         {"C1":"V1", "C2":4, "C3":"d", "C4":4.4}
 
+        The original rows are kept and the new ones are appended at the end
+        of the dataframe, keeping the order of the original rows.
+
         :param columns: list of strings
         :rtype pandas.DataFrame
+
+        :raises ValueError: when the lists of a row have different lengths
         """
 
         for column in columns:
             if column not in self.data.columns:
                 return self.data
 
-        # Looking for the rows with columns with lists of more
-        # than one element
-        first_column = list(self.data[columns[0]])
-        count = 0
-        append_df = pandas.DataFrame()
-        for cell in first_column:
-            if len(cell) >= 1:
-                # Interested in those lists with more
-                # than one element
-                df = pandas.DataFrame()
-                # Create a dataframe of N rows from the list
-                for column in columns:
-                    df[column] = self.data.loc[count, column]
-                # Repeat the original rows N times
-                extra_df = pandas.DataFrame([self.data.loc[count]] * len(df))
-                for column in columns:
-                    extra_df[column] = list(df[column])
-                append_df = append_df.append(extra_df, ignore_index=True)
-                extra_df = pandas.DataFrame()
-
-            count = count + 1
-
-        self.data = self.data.append(append_df, ignore_index=True)
+        if get_backend() == 'polars':
+            from cereslib.enrich import polars_backend
+
+            positions, values = polars_backend.split_lists(self.data, columns)
+            append_df = self.data.iloc[positions].reset_index(drop=True)
+            for column in columns:
+                append_df[column] = pandas.Series(values[column], dtype=object)
+
+            self.data = pandas.concat([self.data, append_df], ignore_index=True)
+            return self.data
+
+        # Number of new rows produced by each of the original ones
+        lengths = self.data[columns[0]].map(len).to_numpy(dtype=np.int64)
+        for column in columns[1:]:
+            if not np.array_equal(self.data[column].map(len).to_numpy(dtype=np.int64), lengths):
+                raise ValueError("Lists in columns %s must have the same length" % columns)
+
+        # Repeat each original row as many times as elements in its lists
+        # and fill in the columns with the flattened lists
+        positions = np.repeat(np.arange(len(self.data)), lengths)
+        append_df = self.data.iloc[positions].reset_index(drop=True)
+        for column in columns:
+            values = list(itertools.chain.from_iterable(self.data[column]))
+            append_df[column] = pandas.Series(values, dtype=object)
+
+        self.data = pandas.concat([self.data, append_df], ignore_index=True)
 
         return self.data
 
@@ -628,6 +1198,8 @@ class MaxMin(Enrich):
     minimum value of the given column
     """
 
+    DETERMINISTIC = True
+
     def __init__(self, data):
         """ Main constructor of the class where the original dataframe
         is provided.
@@ -648,52 +1220,240 @@ class MaxMin(Enrich):
         :type columns: list of strings
         """
 
-        for column in columns:
+        # Rows with no group get null values, as when they were merged
+        stats = GroupStats(self.data)
+        self.data = stats.enrich(columns, groupby, ['max', 'min'], dropna=True)
+
+        return self.data
+
+    @classmethod
+    def columns_io(cls, columns, groupby):
+        """ Returns the columns read and written by 'enrich' """
+
+        return GroupStats.columns_io(columns, groupby, ['max', 'min'], dropna=True)
+
+
+class GroupStats(Enrich):
+    """ This class creates new columns with aggregated values of the
+    given columns for the group each row belongs to
+    """
+
+    DETERMINISTIC = True
+
+    AGGREGATIONS = ['min', 'max', 'count', 'sum', 'first', 'last', 'nunique']
+
+    # Aggregation of each subset of rows and aggregation combining
+    # the results of the subsets, in the order of the rows
+    PARTIALS = {
+        'min': ('min', 'min'),
+        'max': ('max', 'max'),
+        'count': ('count', 'sum'),
+        'sum': ('sum', 'sum'),
+        'first': ('first', 'first'),
+        'last': ('last', 'last')
+    }
+
+    def __init__(self, data):
+        """ Main constructor of the class where the original dataframe
+        is provided.
+
+        :param data: original dataframe
+        :type data: pandas.DataFrame
+        """
+
+        self.data = data
+
+    def enrich(self, columns, groupby, aggregations=None, dropna=False):
+        """ This method calculates a set of aggregations of the given
+        columns for each group of rows, as a group by clause in SQL,
+        and adds them as new columns named as '<aggregation>_<column>'.
+        As an example, the first and last activity of each author
+        would be found in 'min_date' and 'max_date' when calling
+        enrich(['date'], 'author', ['min', 'max']).
+
+        Groups are calculated once and the aggregated values are
+        broadcast to the rows of each group, so no merge is needed.
+        Rows with null values in the group by columns are considered
+        a group on their own, unless 'dropna' is set.
+
+        :param columns: list of columns to aggregate
+        :param groupby: column or list of columns used to group the rows
+        :param aggregations: list of aggregations to calculate, 'min' and
+            'max' by default; supported ones are 'min', 'max', 'count',
+            'sum', 'first', 'last' and 'nunique'
+        :param dropna: rows with null values in the group by columns
+            belong to no group and get null aggregated values
+        :type columns: list of strings
+        :type groupby: string or list of strings
+        :type aggregations: list of strings
+        :type dropna: boolean
+
+        :returns: original dataframe with the new columns
+        :rtype: pandas.DataFrame
+        """
+
+        if aggregations is None:
+            aggregations = ['min', 'max']
+
+        for aggregation in aggregations:
+            if aggregation not in self.AGGREGATIONS:
+                raise ValueError("Aggregation %s not in supported aggregations: %s" %
+                                 (aggregation, self.AGGREGATIONS))
+
+        if isinstance(groupby, str):
+            groupby = [groupby]
+
+        for column in columns + groupby:
             if column not in self.data.columns:
                 return self.data
 
-        for column in columns:
-            df_grouped = self.data.groupby([groupby]).agg({column: 'max'})
-            df_grouped = df_grouped.reset_index()
-            df_grouped.rename(columns={column: 'max_' + column}, inplace=True)
-            self.data = pandas.merge(self.data, df_grouped, how='left', on=[groupby])
+        if get_backend() == 'polars':
+            from cereslib.enrich import polars_backend
+
+            stats = polars_backend.group_stats(self.data, columns, groupby, aggregations)
+        else:
+            grouped = self.data.groupby(groupby, sort=False, dropna=False)
+            stats = {aggregation + '_' + column: grouped[column].transform(aggregation)
+                     for column in columns for aggregation in aggregations}
 
-            df_grouped = self.data.groupby([groupby]).agg({column: 'min'})
-            df_grouped = df_grouped.reset_index()
-            df_grouped.rename(columns={column: 'min_' + column}, inplace=True)
-            self.data = pandas.merge(self.data, df_grouped, how='left', on=[groupby])
+        no_group = self.data[groupby].isnull().any(axis=1).to_numpy() if dropna else None
+        for name, values in stats.items():
+            values = pandas.Series(values, index=self.data.index)
+            if no_group is not None and no_group.any():
+                values = values.mask(no_group)
+            self.data[name] = values
 
         return self.data
 
+    @classmethod
+    def columns_io(cls, columns, groupby, aggregations=None, dropna=False):
+        """ Returns the columns read and written by 'enrich' """
+
+        if aggregations is None:
+            aggregations = ['min', 'max']
+
+        if isinstance(groupby, str):
+            groupby = [groupby]
+
+        written = [aggregation + '_' + column for column in columns for aggregation in aggregations]
+        return list(columns) + list(groupby), written
+
+
+class GenderCache(object):
+    """ This class stores on disk the results of the gender analysis
+    of names. It is based on a SQLite database, so results are kept
+    among executions and the same names are not analyzed again.
+
+    The cache can be used from any thread, e.g. by the enrich stage of
+    PipelineRunner, as accesses to the database are serialized.
+    """
+
+    # SQLite limits the number of parameters in a query
+    QUERY_SIZE = 500
+
+    def __init__(self, file_path):
+        """ Main constructor of the class
+
+        :param file_path: path to the SQLite database file
+        :type file_path: string
+        """
+
+        import sqlite3
+
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS gender ("
+                                "name TEXT PRIMARY KEY, "
+                                "gender TEXT, "
+                                "probability REAL, "
+                                "count INTEGER)")
+
+    def get(self, names):
+        """ Returns the stored results for the given names
+
+        :param names: list of names to look for
+        :type names: list of strings
+
+        :returns: dictionary of results by name. Names not found
+            in the cache are not included.
+        :rtype: dict
+        """
+
+        results = {}
+        with self.lock:
+            for start in range(0, len(names), self.QUERY_SIZE):
+                query_names = names[start:start + self.QUERY_SIZE]
+                query = "SELECT name, gender, probability, count FROM gender WHERE name IN (%s)" % \
+                    ",".join("?" * len(query_names))
+                for name, gender, probability, count in self.connection.execute(query, query_names):
+                    results[name] = {"name": name, "gender": gender,
+                                     "probability": probability, "count": count}
+
+        return results
+
+    def update(self, results):
+        """ Stores the given results, replacing previous ones
+
+        :param results: dictionary of results by name
+        :type results: dict
+        """
+
+        rows = [(name, result.get("gender"), result.get("probability"), result.get("count"))
+                for name, result in results.items()]
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO gender VALUES (?, ?, ?, ?)", rows)
+
+    def close(self):
+        """ Closes the connection to the database """
+
+        with self.lock:
+            self.connection.close()
+
 
 class Gender(Enrich):
     """ This class creates three new columns with the gender of
     the name provided
     """
 
-    def __init__(self, data, key=None, gender_file=None):
+    # Max number of names the Genderize API accepts in a request
+    BATCH_SIZE = 10
+
+    def __init__(self, data, key=None, gender_file=None, cache_file=None, connection=None):
         """ Main constructor of the class where the original dataframe
         is provided.
 
         :param data: original dataframe
         :param key: genderize key (optional)
-        :param gender_file: file with gender info, used as cache
+        :param gender_file: file with gender info, used as cache (deprecated,
+            use cache_file instead)
+        :param cache_file: SQLite file used as persistent cache of the
+            gender info. New results are written back to it.
+        :param connection: client of the Genderize API (optional)
         :type data: pandas.DataFrame
         :type key: string
         :type gender_file: string (as filepath)
+        :type cache_file: string (as filepath)
+        :type connection: genderize.Genderize
         """
 
-        from genderize import Genderize
-
         self.data = data
         self.gender = {}  # init the name-gender dictionary
         self.key = key
         self.gender_file = gender_file
+        self.cache = None
 
         # Init the genderize connection
-        self.connection = Genderize()
-        if self.key:
-            self.connection = Genderize(api_key=self.key)
+        self.connection = connection
+        if not self.connection:
+            from genderize import Genderize
+
+            self.connection = Genderize()
+            if self.key:
+                self.connection = Genderize(api_key=self.key)
+
+        if cache_file:
+            self.cache = GenderCache(cache_file)
 
         if self.gender_file:
             # This file is used as cache for the gender info
@@ -708,6 +1468,28 @@ class Gender(Enrich):
                 self.gender[gender_data[1]] = {"gender_analyzed_name": gender_data[1],
                                                "gender": gender_data[2]}
 
+    def __query(self, names):
+        """ Returns the results of the Genderize API for the given
+        names, sending them in batches
+        """
+
+        results = {}
+        for start in range(0, len(names), self.BATCH_SIZE):
+            batch = names[start:start + self.BATCH_SIZE]
+            try:
+                # TODO: some errors found due to encode utf-8 issues.
+                # Adding a try-except in the meantime.
+                results.update(zip(batch, self.connection.get(batch)))
+            except Exception:
+                # Find out which names of the batch are failing
+                for name in batch:
+                    try:
+                        results[name] = self.connection.get([name])[0]
+                    except Exception:
+                        continue
+
+        return results
+
     def enrich(self, column):
         """ This method calculates thanks to the genderize.io API the gender
         of a given name.
@@ -719,7 +1501,9 @@ class Gender(Enrich):
         If the same class instance is used in later gender searches, this stores
         in memory a list of names and associated gender and probability. This is
         intended to have faster identifications of the gender and less number of
-        API accesses.
+        API accesses. When a cache file is provided, names not found in memory
+        are looked for in it, and only the remaining ones are sent to the API,
+        in batches. New results are stored in the cache file.
 
         :param column: column where the name is found
         :type column: string
@@ -738,46 +1522,57 @@ class Gender(Enrich):
         splits = self.data[column].str.split(" ")
         splits = splits.str[0]
         self.data["gender_analyzed_name"] = splits.fillna("noname")
-        self.data["gender_probability"] = 0
-        self.data["gender"] = "Unknown"
-        self.data["gender_count"] = 0
 
         names = list(self.data["gender_analyzed_name"].unique())
-
+        missing = [name for name in names if name not in self.gender]
+
+        if missing and self.cache:
+            self.gender.update(self.cache.get(missing))
+            missing = [name for name in missing if name not in self.gender]
+
+        if missing:
+            results = self.__query(missing)
+            # Store info in the list of users
+            self.gender.update(results)
+            if self.cache:
+                self.cache.update(results)
+
+        # Update current dataset from the table of results
+        genders = {}
+        probabilities = {}
+        counts = {}
         for name in names:
-            if name in self.gender.keys():
-                gender_result = self.gender[name]
-            else:
-                try:
-                    # TODO: some errors found due to encode utf-8 issues.
-                    # Adding a try-except in the meantime.
-                    gender_result = self.connection.get([name])[0]
-                except Exception:
-                    continue
-
-                # Store info in the list of users
-                self.gender[name] = gender_result
-
-            # Update current dataset
-            if gender_result["gender"] is None:
-                gender_result["gender"] = "NotKnown"
-            self.data.loc[self.data["gender_analyzed_name"] == name, 'gender'] =\
-                gender_result["gender"]
+            if name not in self.gender:
+                continue
+            gender_result = self.gender[name]
+            genders[name] = gender_result["gender"] if gender_result["gender"] is not None else "NotKnown"
             if "probability" in gender_result.keys():
-                self.data.loc[self.data["gender_analyzed_name"] == name,
-                              'gender_probability'] = gender_result["probability"]
-                self.data.loc[self.data["gender_analyzed_name"] == name,
-                              'gender_count'] = gender_result["count"]
+                probabilities[name] = gender_result["probability"]
+                counts[name] = gender_result["count"]
+
+        analyzed_names = self.data["gender_analyzed_name"]
+        self.data["gender_probability"] = analyzed_names.map(probabilities).fillna(0)
+        self.data["gender"] = analyzed_names.map(genders).fillna("Unknown")
+        self.data["gender_count"] = analyzed_names.map(counts).fillna(0)
 
         self.data.fillna("noname")
         return self.data
 
+    @classmethod
+    def columns_io(cls, column):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column], ['gender_analyzed_name', 'gender_probability', 'gender', 'gender_count']
+
 
 class TimeDifference(Enrich):
     """ This class creates a new column with the difference in seconds
     between two dates.
     """
 
+    ROW_WISE = True
+    DETERMINISTIC = True
+
     def __init__(self, data):
         """ Main constructor of the class where the original dataframe
         is provided
@@ -809,9 +1604,179 @@ class TimeDifference(Enrich):
            column2 not in self.data.columns:
             return self.data
 
+        if get_backend() == 'polars':
+            from cereslib.enrich import polars_backend
+
+            self.data["timedifference"] = polars_backend.time_difference(self.data[column1], self.data[column2])
+            return self.data
+
         self.data["timedifference"] = (self.data[column2] - self.data[column1]) / np.timedelta64(1, 's')
         return self.data
 
+    @classmethod
+    def columns_io(cls, column1, column2):
+        """ Returns the columns read and written by 'enrich' """
+
+        return [column1, column2], ['timedifference']
+
+
+class TimeDelta(Enrich):
+    """ This class creates new columns with the time between pairs of
+    dates. Differences are calculated over integer nanoseconds, so no
+    precision is lost, and the results are integers in the given unit.
+
+    Time can also be measured in business hours: only the time between
+    the given hours of the working days (Monday to Friday, excluding
+    holidays) is counted, in the local time given by a column with the
+    UTC offset in hours of each event, as the 'tz' column of Git events.
+    """
+
+    ROW_WISE = True
+    DETERMINISTIC = True
+
+    UNITS = {
+        'ns': 1,
+        'us': 10 ** 3,
+        'ms': 10 ** 6,
+        's': 10 ** 9,
+        'm': 60 * 10 ** 9,
+        'h': 3600 * 10 ** 9
+    }
+
+    DAY = 24 * 3600 * 10 ** 9
+
+    def __init__(self, data):
+        """ Main constructor of the class where the original dataframe
+        is provided
+
+        :param data: original dataframe
+        :type data: pandas.DataFrame
+        """
+
+        self.data = data
+
+    @staticmethod
+    def __nanoseconds(values):
+        """ Returns the dates as nanoseconds since the epoch in UTC and
+        the mask of null dates. Dates with no timezone are UTC.
+        """
+
+        dates = pandas.to_datetime(values, utc=True)
+        nulls = dates.isna().to_numpy()
+        nanoseconds = dates.array.asi8.copy()
+        nanoseconds[nulls] = 0
+
+        return nanoseconds, nulls
+
+    def __business(self, start, end, business_hours, holidays):
+        """ Returns the nanoseconds of business time between two arrays
+        of local dates, as nanoseconds, where start <= end
+        """
+
+        first = int(business_hours[0] * self.UNITS['h'])
+        width = int(business_hours[1] * self.UNITS['h']) - first
+
+        start_days = start // self.DAY
+        end_days = end // self.DAY
+        start_time = np.clip(start - start_days * self.DAY - first, 0, width)
+        end_time = np.clip(end - end_days * self.DAY - first, 0, width)
+
+        start_days = start_days.astype('datetime64[D]')
+        end_days = end_days.astype('datetime64[D]')
+
+        # When both dates fall on the same day, the count of days in
+        # between is minus that day, so the formula holds as well
+        return np.is_busday(start_days, holidays=holidays) * (width - start_time) + \
+            np.is_busday(end_days, holidays=holidays) * end_time + \
+            np.busday_count(start_days + 1, end_days, holidays=holidays) * width
+
+    def enrich(self, pairs, names=None, unit='s', business_hours=None, tz_column=None, holidays=None):
+        """ This method calculates the time between the dates of each
+        pair of columns (column2 - column1), which may be negative.
+        As an example, the time a review took in working hours would be
+        found in 'review_time' after calling
+        enrich([('date', 'closing_date')], ['review_time'], 'h', (9, 17), 'tz').
+
+        :param pairs: list of pairs of columns (column1, column2).
+            Values must be dates; dates with no timezone are UTC
+        :param names: names of the new columns (by default,
+            'timedelta_<column1>_<column2>')
+        :param unit: unit of the results: 'ns', 'us', 'ms', 's', 'm' or 'h'.
+            Results are truncated towards zero.
+        :param business_hours: tuple (start hour, end hour) of the
+            working day, e.g. (9, 17), to count only business hours
+        :param tz_column: column with the UTC offset in hours of the
+            local time of each event, used with business hours (UTC
+            by default)
+        :param holidays: list of days, as 'YYYY-MM-DD' strings, not
+            counted as working days (none by default)
+        :type pairs: list of tuples
+        :type names: list of strings
+        :type unit: string
+        :type business_hours: tuple
+        :type tz_column: string
+        :type holidays: list of strings
+
+        :return: original dataframe with the new columns, of nullable
+            integer type, with null values when any of the dates is null
+        :rtype: pandas.DataFrame
+        """
+
+        if unit not in self.UNITS:
+            raise ValueError("Unit %s not in supported units: %s" % (unit, list(self.UNITS)))
+
+        if holidays is None:
+            holidays = []
+
+        if names is None:
+            names = ['timedelta_%s_%s' % (column1, column2) for column1, column2 in pairs]
+        if len(names) != len(pairs):
+            raise ValueError("Names %s must have the same length as pairs %s" % (names, pairs))
+
+        if business_hours and not 0 <= business_hours[0] < business_hours[1] <= 24:
+            raise ValueError("Business hours %s must be within the day" % (business_hours,))
+
+        columns = [column for pair in pairs for column in pair] + ([tz_column] if business_hours and tz_column else [])
+        for column in columns:
+            if column not in self.data.columns:
+                return self.data
+
+        offsets = 0
+        if business_hours and tz_column:
+            hours = self.data[tz_column].fillna(0).to_numpy(dtype=float)
+            offsets = np.rint(hours * self.UNITS['h']).astype(np.int64)
+
+        for (column1, column2), name in zip(pairs, names):
+            start, start_nulls = self.__nanoseconds(self.data[column1])
+            end, end_nulls = self.__nanoseconds(self.data[column2])
+
+            if business_hours:
+                start = start + offsets
+                end = end + offsets
+                difference = self.__business(np.minimum(start, end), np.maximum(start, end),
+                                             business_hours, holidays)
+                difference = np.where(end < start, -difference, difference)
+            else:
+                difference = end - start
+
+            difference = np.sign(difference) * (np.abs(difference) // self.UNITS[unit])
+            self.data[name] = pandas.arrays.IntegerArray(difference.astype(np.int64), start_nulls | end_nulls)
+
+        return self.data
+
+    @classmethod
+    def columns_io(cls, pairs, names=None, unit='s', business_hours=None, tz_column=None, holidays=None):
+        """ Returns the columns read and written by 'enrich' """
+
+        if names is None:
+            names = ['timedelta_%s_%s' % (column1, column2) for column1, column2 in pairs]
+
+        read = [column for pair in pairs for column in pair]
+        if business_hours and tz_column:
+            read.append(tz_column)
+
+        return list(dict.fromkeys(read)), list(names)
+
 
 class Uuid(Enrich):
     """ This class adds new columns with the uuid of a given identity. If more
@@ -820,39 +1785,136 @@ class Uuid(Enrich):
     be merged in the resulting dataframe.
     """
 
+    NOT_AVAILABLE = "notavailable"
+
     def __init__(self, data, file_path='data/uuids.csv',
-                 drop_columns=[], drop_duplicates=[]):
+                 drop_columns=[], drop_duplicates=[], cache_path=None):
         """ Main constructor of the class where the original dataframe
         is provided and the dataframe containing identities and their
         uuids is loaded from CSV file.
 
+        Parsing a big CSV file takes time, so the identities can be
+        stored in a columnar binary file (Feather format) given by
+        'cache_path'. This file is created the first time and read
+        instead of the CSV while it is newer than it. This requires
+        the 'pyarrow' package.
+
         :param data: original dataframe
         :param file_path: uuids file path (optional)
         :param drop_columns: columns to remove from the csv
         :param drop_duplicates: columns to use to remove duplicates
+        :param cache_path: binary cache file path (optional)
         :type data: pandas.DataFrame
         :type file_path: string
+        :type cache_path: string
         """
 
         self.data = data
+        self.uuids_df = self.__read_uuids(file_path, cache_path)
 
-        # Read csv to data frame, read '\N' (null in MySQL export format) also
-        # as NaN (this is the way pandas deal with null values)
-        self.uuids_df = pandas.read_csv(filepath_or_buffer=file_path, na_values='\\N', sep=',')
         # Remove required columns to later merge
-        for column in drop_columns:
-            self.uuids_df.drop(column, 1)
+        self.uuids_df = self.uuids_df.drop(columns=drop_columns)
 
         if len(drop_duplicates) > 0:
             self.uuids_df.drop_duplicates(subset=drop_duplicates, inplace=True)
         else:
             self.uuids_df.drop_duplicates(inplace=True)
 
+        # Lookup tables by set of columns used to match identities
+        self.__lookups = {}
+
+    @staticmethod
+    def __read_uuids(file_path, cache_path):
+        """ Read identities from the binary cache if it is up to date,
+        or from the CSV file otherwise
+        """
+
+        if cache_path and os.path.exists(cache_path) and \
+           os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+            return pandas.read_feather(cache_path)
+
+        # Read csv to data frame, read '\N' (null in MySQL export format) also
+        # as NaN (this is the way pandas deal with null values)
+        uuids_df = pandas.read_csv(filepath_or_buffer=file_path, na_values='\\N', sep=',')
+
+        if cache_path:
+            uuids_df.reset_index(drop=True).to_feather(cache_path)
+
+        return uuids_df
+
+    @staticmethod
+    def __hash_keys(data, columns):
+        """ Calculate a hash of the values of the given columns for each row.
+        Null values are hashed the same way no matter their type, and
+        numbers the same way no matter their precision, so 10 and 10.0
+        match as in pandas.merge.
+        """
+
+        keys = data[columns].copy()
+        for column in columns:
+            values = keys[column]
+            if pandas.api.types.is_bool_dtype(values.dtype):
+                continue
+            if pandas.api.types.is_numeric_dtype(values.dtype):
+                keys[column] = values.astype(float)
+            elif pandas.api.types.infer_dtype(values, skipna=True) not in ['string', 'empty']:
+                keys[column] = values.map(Uuid.__number)
+        keys = keys.astype(object)
+        keys = keys.where(keys.notna(), None)
+
+        # Without categorizing, each value is hashed the same way whatever the rest of the column
+        return pandas.util.hash_pandas_object(keys, index=False, categorize=False).to_numpy()
+
+    @staticmethod
+    def __number(value):
+        """ Returns numbers as floats, and the rest of values as they are """
+
+        if isinstance(value, numbers.Number) and not isinstance(value, bool):
+            return float(value)
+        return value
+
+    def __check_keys(self, identities, columns, positions):
+        """ Sets as missing the rows whose keys differ from the ones of
+        the identity with their hash, e.g. 10 and '10', or the ones of
+        a hash collision
+        """
+
+        rows = np.flatnonzero(positions >= 0)
+        for column in columns:
+            values = self.data[column].to_numpy(dtype=object)[rows]
+            keys = identities[column].to_numpy(dtype=object)[positions[rows]]
+            nulls = pandas.isna(values)
+            equal = np.equal(values, keys, dtype=object).astype(bool) | (nulls & pandas.isna(keys))
+            positions[rows[~equal]] = -1
+
+        return positions
+
+    def __lookup(self, columns):
+        """ Returns the index of hashed keys and the identities table for
+        the given columns, building them the first time
+        """
+
+        key = tuple(columns)
+        if key not in self.__lookups:
+            hashes = pandas.Index(self.__hash_keys(self.uuids_df, columns))
+            # Only the first identity of each key is used
+            unique = ~hashes.duplicated()
+            self.__lookups[key] = (hashes[unique], self.uuids_df[unique].reset_index(drop=True))
+
+        return self.__lookups[key]
+
     def enrich(self, columns):
-        """ Merges the original dataframe with corresponding entity uuids based
-        on the given columns. Also merges other additional information
+        """ Adds to the original dataframe the entity uuids corresponding
+        to the given columns. Also adds other additional information
         associated to uuids provided in the uuids dataframe, if any.
 
+        Identities are found by means of a hash of the given columns,
+        so the identities table is indexed once and reused in later
+        calls, and the keys of the rows found are compared with the
+        ones of their identities. Rows with no identity and null values
+        in the identities table are filled in with 'notavailable' in
+        the new columns.
+
         :param columns: columns to match for merging
         :type column: string array
 
@@ -865,8 +1927,17 @@ class Uuid(Enrich):
             if column not in self.data.columns:
                 return self.data
 
-        self.data = pandas.merge(self.data, self.uuids_df, how='left', on=columns)
-        self.data = self.data.fillna("notavailable")
+        hashes, identities = self.__lookup(columns)
+        positions = hashes.get_indexer(self.__hash_keys(self.data, columns))
+        positions = self.__check_keys(identities, columns, positions)
+
+        for column in identities.columns:
+            if column in columns:
+                continue
+            values = pandas.api.extensions.take(identities[column].to_numpy(), positions,
+                                                allow_fill=True, fill_value=self.NOT_AVAILABLE)
+            values = pandas.Series(values, index=self.data.index)
+            self.data[column] = values.fillna(self.NOT_AVAILABLE)
 
         return self.data
 
@@ -877,6 +1948,10 @@ class Onion(Enrich):
     analysis of the community where the 80% of the work is done by member.
     """
 
+    # Limits of the percentage of accumulated activity of each role
+    LIMITS = [0.0, 80.0, 95.0, 100.0]
+    ROLES = ["core", "regular", "casual"]
+
     def __init__(self, data):
         """ Main constructor of the class where the original dataframe
         is provided and the dataframe containing identities and their
@@ -913,20 +1988,120 @@ class Onion(Enrich):
            events_column not in self.data.columns:
             return self.data
 
-        # Order the data... just in case
-        self.data.sort_values(by=events_column, ascending=False, inplace=True)
-        # Reset the index to properly work with other methods
-        self.data.reset_index(inplace=True)
-        # Remove resultant new 'index' column
-        self.data.drop(["index"], axis=1, inplace=True)
+        if get_backend() == 'polars':
+            from cereslib.enrich import polars_backend
+
+            order, cumulative = polars_backend.onion(self.data[events_column])
+            self.data = self.data.take(order).reset_index(drop=True)
+            self.data["cum_net_sum"] = cumulative
+        else:
+            # Order the data... just in case. Members with the same
+            # amount of events keep their order, as in every backend
+            self.data.sort_values(by=events_column, ascending=False, kind='mergesort', inplace=True)
+            # Reset the index to properly work with other methods
+            self.data.reset_index(inplace=True)
+            # Remove resultant new 'index' column
+            self.data.drop(["index"], axis=1, inplace=True)
+
+            # Calculate onion limits and accumulative sum and percentage
+            self.data["cum_net_sum"] = self.data[events_column].cumsum()
 
-        # Calculate onion limits and accumulative sum and percentage
-        self.data["cum_net_sum"] = self.data[events_column].cumsum()
         self.data["percent_cum_net_sum"] = (self.data.cum_net_sum / self.data[events_column].sum()) * 100
 
         # Assign roles based on the percentage
         self.data["onion_role"] = pandas.cut(self.data["percent_cum_net_sum"],
-                                             [0.0, 80.0, 95.0, 100.0],
-                                             labels=["core", "regular", "casual"])
+                                             self.LIMITS, labels=self.ROLES)
 
         return self.data
+
+
+class WindowedOnion(Enrich):
+    """ This class calculates the onion model of each group of events,
+    e.g. of each project, and time window, e.g. of each quarter, as
+    Onion does for the whole dataframe.
+
+    Every model is calculated at once: the events of each member are
+    added up by group and window, the totals are sorted a single time
+    by group, window and amount of events, and the accumulated sums
+    restart at each group and window.
+    """
+
+    def __init__(self, data):
+        """ Main constructor of the class where the original dataframe
+        is provided.
+
+        :param data: original dataframe
+        :type data: pandas.DataFrame
+        """
+
+        self.data = data
+
+    def enrich(self, member_column, events_column, groupby=None, date_column=None, window=None):
+        """ Calculates the onion model of each group and time window.
+        As an example, the quarterly onion model of each project would
+        be calculated with enrich('author', 'addedlines', 'project',
+        'date', 'Q').
+
+        :param member_column: column with the community member
+        :param events_column: column with the amount of events
+        :param groupby: column or list of columns with the groups
+            (no groups by default)
+        :param date_column: column with the date of the events
+        :param window: frequency of the time windows, as a pandas period
+            alias, e.g. 'M', 'Q' or 'Y'; windows of dates with timezone
+            are in UTC
+        :type member_column: string
+        :type events_column: string
+        :type groupby: string or list of strings
+        :type date_column: string
+        :type window: string
+
+        :return: new dataframe with a row per group, window and member,
+                 ordered by group, window and role importance, with the
+                 total of events of the member and these columns:
+         * window: time window of the events, as a pandas period
+         * onion_role: "core", "regular", or "casual"
+         * percent_cum_net_sum: percentage of the activity up to such developer
+         * cum_net_sum: accumulated activity up to such developer
+        :rtype: pandas.DataFrame
+        """
+
+        if groupby is None:
+            groupby = []
+        elif isinstance(groupby, str):
+            groupby = [groupby]
+
+        if (date_column is None) != (window is None):
+            raise ValueError("Both date_column and window must be given to calculate windows")
+
+        for column in [member_column, events_column] + groupby + ([date_column] if date_column else []):
+            if column not in self.data.columns:
+                return self.data
+
+        keys = list(groupby)
+        data = self.data[groupby + [member_column, events_column]]
+        if window:
+            keys.append("window")
+            # Dates with different offsets, as the ones of the eventizers, are windowed in UTC
+            dates = pandas.to_datetime(self.data[date_column], utc=True).dt.tz_convert(None)
+            data = data.assign(window=dates.dt.to_period(window))
+
+        totals = data.groupby(keys + [member_column], sort=False, dropna=False, observed=True)[events_column].sum()
+        totals = totals.reset_index()
+
+        # A single sort by group and window, and by events in descending order
+        groups = totals.groupby(keys, sort=True, dropna=False).ngroup().to_numpy() if keys \
+            else np.zeros(len(totals), dtype=np.int64)
+        order = np.lexsort((-totals[events_column].to_numpy(dtype=float), groups))
+        totals = totals.take(order).reset_index(drop=True)
+        groups = groups[order]
+
+        grouped = totals[events_column].groupby(groups, sort=False)
+        totals["cum_net_sum"] = grouped.cumsum()
+        totals["percent_cum_net_sum"] = (totals["cum_net_sum"] / grouped.transform("sum")) * 100
+
+        # Assign roles based on the percentage
+        totals["onion_role"] = pandas.cut(totals["percent_cum_net_sum"],
+                                          Onion.LIMITS, labels=Onion.ROLES)
+
+        return totals
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import pickle
+
+import numpy as np
+
+import pandas
+
+from cereslib.enrich.enrich import GroupStats, Onion
+
+
+def _hashes(data, columns):
+    """ Returns a 64-bit hash of the values of the columns of each
+    row, as an index. Null values have the same hash, whatever their
+    type, so they are a group on their own as in GroupStats.
+    """
+
+    return pandas.Index(pandas.util.hash_pandas_object(data[columns], index=False).to_numpy())
+
+
+def _replace(column, positions, values):
+    """ Returns a column with the values of another one in the rows
+    where the positions are not negative, upcasting its type when
+    the new values need it, e.g. to store floats in integer columns.
+    """
+
+    values = pandas.Series(values.array.take(positions, allow_fill=True), index=column.index)
+    return column.mask(positions >= 0, values)
+
+
+class IncrementalGroupStats(object):
+    """ This class calculates the same aggregations as GroupStats over
+    a dataframe that grows with new events, keeping the aggregated
+    values of each group instead of the events.
+
+    New events only update the state of their groups: partial values
+    of min, max, count, sum, first and last are combined with the
+    stored ones, and nunique keeps the hashes of the distinct values
+    seen in each group. Only the rows of the groups with new events
+    need new values.
+
+    Groups are identified by a hash of their values, so the group by
+    columns must keep their types among batches.
+
+        stats = IncrementalGroupStats(["date"], "author_uuid", ["min", "max"])
+        events_df = stats.append(events_df, new_events_df)
+        stats.save("stats.pickle")
+
+    :param columns: list of columns to aggregate
+    :param groupby: column or list of columns used to group the rows
+    :param aggregations: list of aggregations to calculate, 'min' and
+        'max' by default; supported ones are 'min', 'max', 'count',
+        'sum', 'first', 'last' and 'nunique'
+    :param dropna: rows with null values in the group by columns
+        belong to no group and get null aggregated values
+    :type columns: list of strings
+    :type groupby: string or list of strings
+    :type aggregations: list of strings
+    :type dropna: boolean
+    """
+
+    def __init__(self, columns, groupby, aggregations=None, dropna=False):
+        """ Main constructor of the class """
+
+        if aggregations is None:
+            aggregations = ['min', 'max']
+
+        for aggregation in aggregations:
+            if aggregation not in GroupStats.AGGREGATIONS:
+                raise ValueError("Aggregation %s not in supported aggregations: %s" %
+                                 (aggregation, GroupStats.AGGREGATIONS))
+
+        if isinstance(groupby, str):
+            groupby = [groupby]
+
+        self.columns = list(columns)
+        self.groupby = groupby
+        self.aggregations = list(aggregations)
+        self.dropna = dropna
+
+        # Values of the group by columns and aggregated values,
+        # with a row per group indexed by the hash of the group
+        self.state = None
+        # Hashes of the distinct (group, value) pairs of each column
+        self.seen = {}
+
+    @classmethod
+    def load(cls, file_path):
+        """ Load a state stored with the save method
+
+        :param file_path: path of the file
+        :type file_path: string
+
+        :returns: incremental aggregations
+        :rtype: IncrementalGroupStats
+        """
+
+        with open(file_path, 'rb') as fd:
+            return pickle.load(fd)
+
+    def save(self, file_path):
+        """ Store the state on disk
+
+        :param file_path: path of the file
+        :type file_path: string
+        """
+
+        with open(file_path, 'wb') as fd:
+            pickle.dump(self, fd, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @property
+    def names(self):
+        """ Names of the columns with the aggregated values """
+
+        return [aggregation + '_' + column for column in self.columns for aggregation in self.aggregations]
+
+    def __unseen(self, data, keys, column):
+        """ Returns the number of distinct values of a column not seen
+        before in each group, and adds them to the seen ones
+        """
+
+        present = data[column].notna().to_numpy()
+        pairs, first = np.unique(_hashes(data[present], self.groupby + [column]).to_numpy(), return_index=True)
+        groups = keys[present][first]
+
+        seen = self.seen.get(column)
+        if seen is None:
+            self.seen[column] = pandas.Index(pairs)
+        else:
+            unseen = seen.get_indexer(pairs) < 0
+            groups = groups[unseen]
+            self.seen[column] = seen.append(pandas.Index(pairs[unseen]))
+
+        return pandas.Series(groups).value_counts(sort=False)
+
+    def update(self, data):
+        """ Adds new events to the aggregated values of their groups
+
+        :param data: dataframe with the new events
+        :type data: pandas.DataFrame
+
+        :returns: hashes of the groups updated by the new events
+        :rtype: pandas.Index
+        """
+
+        for column in self.columns + self.groupby:
+            if column not in data.columns:
+                raise ValueError("Column %s not in DataFrame columns: %s" % (column, list(data)))
+
+        if self.dropna:
+            data = data[data[self.groupby].notnull().all(axis=1)]
+
+        keys = _hashes(data, self.groupby)
+        # Groups in order of appearance, with the position of their first row
+        _, first = np.unique(keys.to_numpy(), return_index=True)
+        first.sort()
+        groups = keys[first]
+
+        grouped = data.groupby(keys.to_numpy(), sort=False)
+        partial = {}
+        for column in self.columns:
+            for aggregation in self.aggregations:
+                name = aggregation + '_' + column
+                if aggregation in GroupStats.PARTIALS:
+                    partial[name] = grouped[column].agg(GroupStats.PARTIALS[aggregation][0])
+                else:
+                    # Values not seen in previous events of the group
+                    partial[name] = self.__unseen(data, keys, column)
+        partial = pandas.DataFrame(partial).reindex(groups)
+        for name in self.names:
+            if name.startswith('nunique_'):
+                partial[name] = partial[name].fillna(0).astype(np.int64)
+
+        if self.state is None:
+            values = data[self.groupby].iloc[first].set_index(groups)
+            self.state = pandas.concat([values, partial[self.names]], axis=1)
+            return groups
+
+        positions = self.state.index.get_indexer(groups)
+        existing = positions >= 0
+
+        # Stored values go first, so 'first' and 'last' keep the order of the events
+        combined = pandas.concat([self.state[self.names].iloc[positions[existing]], partial[self.names]])
+        combined = combined.groupby(level=0, sort=False)
+        combined = pandas.DataFrame({name: combined[name].agg(self.__combination(name))
+                                     for name in self.names}).reindex(groups)
+
+        # Position in 'combined' of the stored groups
+        sources = np.full(len(self.state), -1)
+        sources[positions[existing]] = np.flatnonzero(existing)
+        for name in self.names:
+            self.state[name] = _replace(self.state[name], sources, combined[name])
+        if not existing.all():
+            values = data[self.groupby].iloc[first[~existing]].set_index(groups[~existing])
+            added = pandas.concat([values, combined[~existing]], axis=1)
+            self.state = pandas.concat([self.state, added])
+
+        return groups
+
+    def __combination(self, name):
+        """ Aggregation combining the stored and new values of a column """
+
+        aggregation = name.split('_', 1)[0]
+        if aggregation in GroupStats.PARTIALS:
+            return GroupStats.PARTIALS[aggregation][1]
+        # Counts of values not seen before
+        return 'sum'
+
+    def to_dataframe(self):
+        """ Returns the aggregated values of every group
+
+        :returns: dataframe with a row per group
+        :rtype: pandas.DataFrame
+        """
+
+        if self.state is None:
+            return pandas.DataFrame(columns=self.groupby + self.names)
+
+        return self.state.reset_index(drop=True)
+
+    def enrich(self, data, groups=None):
+        """ Adds the aggregated values of its group to each row. When
+        the groups are given, only the rows of those groups are set.
+
+        :param data: dataframe of events
+        :param groups: groups to update, as returned by 'update' (optional)
+        :type data: pandas.DataFrame
+        :type groups: pandas.Index
+
+        :returns: dataframe with the new columns
+        :rtype: pandas.DataFrame
+        """
+
+        if self.state is None:
+            return data
+
+        keys = _hashes(data, self.groupby)
+        if groups is None:
+            positions = self.state.index.get_indexer(keys)
+            for name in self.names:
+                data[name] = self.state[name].array.take(positions, allow_fill=True)
+            return data
+
+        # Rows of other groups keep their values
+        rows = np.flatnonzero(groups.get_indexer(keys) >= 0)
+        if len(rows):
+            positions = np.full(len(data), -1)
+            positions[rows] = self.state.index.get_indexer(keys[rows])
+            for name in self.names:
+                data[name] = _replace(data[name], positions, self.state[name])
+
+        return data
+
+    def append(self, data, new):
+        """ Appends new events to a dataframe enriched by this class,
+        adding the aggregated values to the new events and updating
+        the ones of the rows of the groups they belong to
+
+        :param data: dataframe of enriched events
+        :param new: dataframe with the new events
+        :type data: pandas.DataFrame
+        :type new: pandas.DataFrame
+
+        :returns: dataframe with all the events, with a default index
+        :rtype: pandas.DataFrame
+        """
+
+        groups = self.update(new)
+        data = self.enrich(data, groups)
+
+        return pandas.concat([data, self.enrich(new)], ignore_index=True)
+
+
+class IncrementalMaxMin(IncrementalGroupStats):
+    """ This class calculates the same values as MaxMin over a
+    dataframe that grows with new events
+
+    :param columns: list of columns to aggregate
+    :param groupby: column or list of columns used to group the rows
+    """
+
+    def __init__(self, columns, groupby):
+        """ Main constructor of the class """
+
+        super().__init__(columns, groupby, ['max', 'min'], dropna=True)
+
+
+class IncrementalOnion(object):
+    """ This class calculates the onion model of a community whose
+    events arrive in batches. It keeps the total of events of each
+    member, so new events only update the totals of their members,
+    and the roles are calculated over the totals, as Onion does.
+
+        onion = IncrementalOnion("author_uuid", "addedlines")
+        onion.update(new_events_df)
+        onion_df = onion.enrich()
+
+    :param member_column: column with the community member
+    :param events_column: column with the amount of events
+    :type member_column: string
+    :type events_column: string
+    """
+
+    def __init__(self, member_column, events_column):
+        """ Main constructor of the class """
+
+        self.member_column = member_column
+        self.events_column = events_column
+        # Total of events of each member
+        self.totals = None
+
+    @classmethod
+    def load(cls, file_path):
+        """ Load a state stored with the save method
+
+        :param file_path: path of the file
+        :type file_path: string
+
+        :returns: incremental onion model
+        :rtype: IncrementalOnion
+        """
+
+        with open(file_path, 'rb') as fd:
+            return pickle.load(fd)
+
+    def save(self, file_path):
+        """ Store the state on disk
+
+        :param file_path: path of the file
+        :type file_path: string
+        """
+
+        with open(file_path, 'wb') as fd:
+            pickle.dump(self, fd, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def update(self, data):
+        """ Adds new events to the totals of their members
+
+        :param data: dataframe with the new events
+        :type data: pandas.DataFrame
+
+        :returns: members updated by the new events
+        :rtype: pandas.Index
+        """
+
+        for column in [self.member_column, self.events_column]:
+            if column not in data.columns:
+                raise ValueError("Column %s not in DataFrame columns: %s" % (column, list(data)))
+
+        partial = data.groupby(self.member_column, sort=False, dropna=False)[self.events_column].sum()
+
+        if self.totals is None:
+            self.totals = partial
+            return partial.index
+
+        existing = self.totals.index.get_indexer(partial.index) >= 0
+
+        # Members keep their order, and the type of the totals is upcast when needed
+        self.totals = self.totals.add(partial[existing].reindex(self.totals.index), fill_value=0)
+        if not existing.all():
+            self.totals = pandas.concat([self.totals, partial[~existing]])
+
+        return partial.index
+
+    def enrich(self):
+        """ Calculates the onion model over the totals of events
+
+        :returns: dataframe with a row per member, with its total
+            of events and its role, as returned by Onion
+        :rtype: pandas.DataFrame
+        """
+
+        if self.totals is None:
+            return pandas.DataFrame(columns=[self.member_column, self.events_column])
+
+        totals = self.totals.rename(self.events_column).reset_index()
+        return Onion(totals).enrich(self.member_column, self.events_column)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import functools
+import math
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas
+
+from cereslib.enrich.enrich import Enrich
+from cereslib.pipeline.executor import SharedMemoryExecutor
+from cereslib.pipeline.pipeline import EnrichStage
+
+
+def _enrich_chunk(stage, chunk):
+    """ Run the stage over a chunk of rows and return the columns
+    written by it.
+
+    This is a module function so it can be sent to the worker processes.
+    """
+
+    _, written = stage.columns_io()
+    result = stage.run(chunk)
+
+    return result[[column for column in written if column in result.columns]]
+
+
+def split_chunks(data, chunksize):
+    """ Split the dataframe in chunks of 'chunksize' rows.
+
+    The index of each chunk is reset as some of the enrichers
+    assume an integer index starting at zero.
+
+    :param data: dataframe to split
+    :param chunksize: number of rows of each chunk
+    :type data: pandas.DataFrame
+    :type chunksize: integer
+
+    :returns: generator of dataframes
+    """
+
+    for start in range(0, len(data), chunksize):
+        yield data.iloc[start:start + chunksize].reset_index(drop=True)
+
+
+class ParallelEnrich(Enrich):
+    """ This class runs a row-wise enricher in a pool of processes.
+
+    Text enrichers such as EmailFlag, MessageLogFlag, SplitEmail or
+    ToUTF8 work on a row basis and spend most of their time in pure
+    Python code. This class runs the enricher with the executor of
+    the pipelines, cereslib.pipeline.executor.SharedMemoryExecutor:
+    the columns read by the enricher are split in chunks of rows,
+    enriched by a pool of worker processes and the columns written
+    are put back together keeping the original order of the rows.
+
+    Enrichers that are not row-wise (see Enrich.ROW_WISE) need all
+    the rows, so they run in this process.
+
+    The executor requires pyarrow. When it is not installed, the
+    chunks are pickled to the worker processes instead, and only the
+    columns written by the enricher are sent back.
+    """
+
+    # Amount of data sent to a worker in each chunk. Bigger chunks reduce
+    # the overhead of pickling and scheduling, smaller ones balance better
+    # the work among processes.
+    TARGET_CHUNK_BYTES = 4 * 1024 * 1024
+    MIN_CHUNK_ROWS = 64
+    SAMPLE_ROWS = 100
+
+    def __init__(self, data, enricher, workers=None, chunksize=None):
+        """ Main constructor of the class
+
+        :param data: original dataframe
+        :param enricher: enricher class to run, e.g. EmailFlag
+        :param workers: number of processes (defaults to the number of CPUs)
+        :param chunksize: rows per chunk (estimated from the data if not set)
+        :type data: pandas.DataFrame
+        :type enricher: subclass of cereslib.enrich.enrich.Enrich
+        :type workers: integer
+        :type chunksize: integer
+        """
+
+        self.data = data
+        self.enricher = enricher
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+
+    def __chunksize(self, columns):
+        """ Estimate the number of rows per chunk so each chunk
+        holds around TARGET_CHUNK_BYTES of text
+        """
+
+        sample = self.data[columns].head(self.SAMPLE_ROWS)
+        if sample.empty:
+            return self.MIN_CHUNK_ROWS
+
+        row_bytes = 0
+        for column in columns:
+            row_bytes += sample[column].map(lambda value: len(str(value))).mean()
+
+        rows = int(self.TARGET_CHUNK_BYTES / max(row_bytes, 1))
+        # Make sure every worker gets at least one chunk
+        rows = min(rows, math.ceil(len(self.data) / self.workers))
+
+        return max(rows, self.MIN_CHUNK_ROWS)
+
+    def enrich(self, *args):
+        """ This method runs the enricher with the given arguments.
+        The first argument must be the column, or list of columns,
+        read by the enricher, as in the rest of the row-wise enrichers.
+
+        :returns: original dataframe with the columns added or modified
+            by the enricher
+        :rtype: pandas.DataFrame
+        """
+
+        columns = args[0]
+        if isinstance(columns, str):
+            columns = [columns]
+
+        for column in columns:
+            if column not in self.data.columns:
+                return self.data
+
+        stage = EnrichStage(self.enricher, *args)
+        if stage.columns_io() is None:
+            # Columns written by the enricher are unknown
+            return self.enricher(self.data).enrich(*args)
+
+        chunksize = self.chunksize or self.__chunksize(columns)
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return self.__enrich_chunks(stage, chunksize)
+
+        # Dataframes of a single chunk are enriched in this process
+        with SharedMemoryExecutor(workers=self.workers, shardsize=chunksize, min_rows=chunksize + 1) as executor:
+            return executor.run(self.data, [stage])
+
+    def __enrich_chunks(self, stage, chunksize):
+        """ Run the stage over chunks of rows pickled to a pool of
+        processes and put back together the columns written by it
+        """
+
+        if self.workers == 1 or len(self.data) <= chunksize:
+            return stage.run(self.data)
+
+        read, _ = stage.columns_io()
+        chunks = split_chunks(self.data[read], chunksize)
+        worker = functools.partial(_enrich_chunk, stage)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(worker, chunks))
+
+        for column in results[0].columns:
+            values = pandas.concat([result[column] for result in results], ignore_index=True)
+            values.index = self.data.index
+            self.data[column] = values
+
+        return self.data
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+""" Polars implementation of some of the enrichers.
+
+These functions are called by the enrichers of cereslib.enrich.enrich
+when the 'polars' backend is selected with set_backend. They receive
+and return pandas objects, so enrichers keep working on pandas
+dataframes, and only the columns each enricher reads are converted.
+The results are the same as the ones of the pandas implementation,
+which is the reference one.
+"""
+
+import inspect
+
+import numpy as np
+
+import pandas
+import polars as pl
+
+# Keyword of DataFrame.join to match null keys, 'join_nulls' was
+# renamed to 'nulls_equal' in polars 1.24
+JOIN_NULLS = 'nulls_equal' if 'nulls_equal' in inspect.signature(pl.DataFrame.join).parameters else 'join_nulls'
+
+
+def _frame(data, columns):
+    """ Converts the columns of a pandas dataframe to Polars """
+
+    return pl.from_pandas(data[columns].reset_index(drop=True))
+
+
+def file_type(values, regex):
+    """ Returns 'Code' for the paths matching the regular expression
+    and 'Other' for the rest
+    """
+
+    paths = pl.from_pandas(values.reset_index(drop=True))
+    types = paths.str.contains(regex).fill_null(False)
+    return np.where(types.to_numpy(), 'Code', 'Other').astype(object)
+
+
+def file_path(values):
+    """ Returns the name, extension, directory and list of parts
+    of the paths, as FilePath does
+    """
+
+    paths = pl.DataFrame({'path': pl.from_pandas(values.reset_index(drop=True))})
+    name = pl.col('path').str.split('/').list.last()
+    clean = pl.col('path').str.replace_all('/+', '/')
+
+    result = paths.select(
+        name.alias('file_name'),
+        pl.when(name.str.contains('.', literal=True))
+          .then(name.str.split('.').list.last())
+          .otherwise(pl.lit(''))
+          .alias('file_ext'),
+        pl.when(clean.str.starts_with('/'))
+          .then(clean)
+          .otherwise(pl.lit('/') + clean)
+          .str.replace(r'[^/]*$', '')
+          .alias('file_dir_name'),
+        clean.str.replace(r'^/', '').str.replace(r'/$', '').str.split('/').alias('file_path_list')
+    )
+
+    columns = {}
+    for column in ['file_name', 'file_ext', 'file_dir_name']:
+        columns[column] = result[column].to_numpy().astype(object)
+    columns['file_path_list'] = pandas.Series(result['file_path_list'].to_list(), dtype=object).to_numpy()
+
+    return columns
+
+
+# Expressions of each aggregation, with the same results as the
+# ones of pandas, which skip null values
+AGGREGATIONS = {
+    'min': lambda column: pl.col(column).min(),
+    'max': lambda column: pl.col(column).max(),
+    'count': lambda column: pl.col(column).drop_nulls().len().cast(pl.Int64),
+    'sum': lambda column: pl.col(column).sum(),
+    'first': lambda column: pl.col(column).drop_nulls().first(),
+    'last': lambda column: pl.col(column).drop_nulls().last(),
+    'nunique': lambda column: pl.col(column).drop_nulls().n_unique().cast(pl.Int64)
+}
+
+
+def group_stats(data, columns, groupby, aggregations):
+    """ Returns the aggregations of the columns for the group of
+    each row, named as '<aggregation>_<column>', as GroupStats does
+    """
+
+    frame = _frame(data, list(dict.fromkeys(columns + groupby)))
+    result = frame.select([AGGREGATIONS[aggregation](column).over(groupby).alias(aggregation + '_' + column)
+                           for column in columns for aggregation in aggregations])
+
+    return {name: result[name].to_pandas().array for name in result.columns}
+
+
+def time_difference(start, end):
+    """ Returns the difference in seconds between two columns of dates """
+
+    frame = pl.DataFrame({'start': pl.from_pandas(start.reset_index(drop=True)),
+                          'end': pl.from_pandas(end.reset_index(drop=True))})
+    nanoseconds = frame.select((pl.col('end') - pl.col('start')).dt.total_nanoseconds().alias('nanoseconds'))
+
+    # Divided by numpy, as pandas does, to get the same floats
+    return nanoseconds['nanoseconds'].to_numpy().astype(float) / 1e9
+
+
+def onion(values):
+    """ Returns the positions of the rows sorted by their amount of
+    events, in descending order and with nulls at the end, and the
+    accumulated sum of events in that order. Rows with the same amount
+    of events keep their order, as in the stable sort of Onion.
+    """
+
+    events = pl.DataFrame({'events': pl.from_pandas(values.reset_index(drop=True))}).with_row_index('row')
+    ordered = events.sort(['events', 'row'], descending=[True, False], nulls_last=True)
+
+    return ordered['row'].to_numpy().astype(np.int64), ordered['events'].cum_sum().to_numpy()
+
+
+def split_lists(data, columns):
+    """ Returns the position of the row of each element of the
+    lists, and the flattened lists of each column
+
+    :raises ValueError: when the lists of a row have different lengths
+    """
+
+    frame = pl.DataFrame({column: pl.Series(data[column].tolist()) for column in columns})
+    frame = frame.with_row_index('row')
+
+    lengths = frame.select([pl.col(column).list.len() for column in columns])
+    for column in columns[1:]:
+        if (lengths[column] != lengths[columns[0]]).any():
+            raise ValueError("Lists in columns %s must have the same length" % columns)
+
+    # Empty lists don't produce any row
+    exploded = frame.filter(lengths[columns[0]] > 0).explode(columns)
+
+    values = {column: exploded[column].to_list() for column in columns}
+    return exploded['row'].to_numpy().astype(np.int64), values
+
+
+def left_join(data, right, on):
+    """ Returns the result of a left join of two dataframes on a
+    column, as pandas.merge does: rows keep the order of the left
+    dataframe and null keys match each other
+    """
+
+    left_keys = pl.DataFrame({on: pl.from_pandas(data[on].reset_index(drop=True))}).with_row_index('left')
+    right_keys = pl.DataFrame({on: pl.from_pandas(right[on].reset_index(drop=True))}).with_row_index('right')
+
+    matches = left_keys.join(right_keys, on=on, how='inner', **{JOIN_NULLS: True}).select(['left', 'right'])
+    unmatched = left_keys.filter(~pl.col('left').is_in(matches['left'])).select(
+        ['left', pl.lit(None, dtype=pl.UInt32).alias('right')])
+    positions = pl.concat([matches, unmatched]).sort(['left', 'right'], nulls_last=True)
+
+    left_positions = positions['left'].to_numpy().astype(np.int64)
+    right_positions = positions['right'].fill_null(-1).to_numpy().astype(np.int64)
+
+    result = data.take(left_positions).reset_index(drop=True)
+    for column in right.columns:
+        if column != on:
+            values = pandas.api.extensions.take(right[column].to_numpy(), right_positions, allow_fill=True)
+            result[column] = values
+
+    return result
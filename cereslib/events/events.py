@@ -52,6 +52,11 @@ class Events(object):
     SH_AUTHOR_BOT = "author_bot"
     SH_AUTHOR_MULTI_ORG_NAMES = "author_multi_org_names"
 
+    SH_FIELDS = [SH_AUTHOR_ID, SH_AUTHOR_ORG_NAME, SH_AUTHOR_NAME, SH_AUTHOR_UUID,
+                 SH_AUTHOR_DOMAIN, SH_AUTHOR_USER_NAME, SH_AUTHOR_BOT,
+                 SH_AUTHOR_MULTI_ORG_NAMES]
+    GENERAL_FIELDS = [PROJECT, PROJECT_1]
+
     UNKNOWN = 'Unknown'
 
     def __init__(self, items, enrich):
@@ -145,29 +150,36 @@ class Events(object):
 
     def _add_common_fields(self, df_columns, item):
         self._add_metadata(df_columns, item)
-        self._add_sh_info(df_columns, item)
-        self._add_general_info(df_columns, item)
+        if Events.SH_AUTHOR_ID in df_columns:
+            self._add_sh_info(df_columns, item)
+        if Events.PROJECT in df_columns:
+            self._add_general_info(df_columns, item)
 
     @staticmethod
-    def _add_common_events(events, df_columns):
-        events[Events.META_TIMESTAMP] = df_columns[Events.META_TIMESTAMP]
-        events[Events.META_UPDATED_ON] = df_columns[Events.META_UPDATED_ON]
-        events[Events.META_ENRICHED_ON] = df_columns[Events.META_ENRICHED_ON]
+    def _needs(columns, fields):
+        """ Returns whether any of the fields is in the list of
+        columns to eventize, where None stands for all of them
+        """
 
-        events[Events.GRIMOIRE_CREATION_DATE] = df_columns[Events.GRIMOIRE_CREATION_DATE]
-        events[Events.PROJECT] = df_columns[Events.PROJECT]
-        events[Events.PROJECT_1] = df_columns[Events.PROJECT_1]
+        return columns is None or any(field in columns for field in fields)
 
-        events[Events.PERCEVAL_UUID] = df_columns[Events.PERCEVAL_UUID]
+    @staticmethod
+    def _skip_fields(df_columns, fields):
+        """ Removes the fields that are not going to be eventized """
 
-        events[Events.SH_AUTHOR_ID] = df_columns[Events.SH_AUTHOR_ID]
-        events[Events.SH_AUTHOR_ORG_NAME] = df_columns[Events.SH_AUTHOR_ORG_NAME]
-        events[Events.SH_AUTHOR_NAME] = df_columns[Events.SH_AUTHOR_NAME]
-        events[Events.SH_AUTHOR_UUID] = df_columns[Events.SH_AUTHOR_UUID]
-        events[Events.SH_AUTHOR_DOMAIN] = df_columns[Events.SH_AUTHOR_DOMAIN]
-        events[Events.SH_AUTHOR_USER_NAME] = df_columns[Events.SH_AUTHOR_USER_NAME]
-        events[Events.SH_AUTHOR_BOT] = df_columns[Events.SH_AUTHOR_BOT]
-        events[Events.SH_AUTHOR_MULTI_ORG_NAMES] = df_columns[Events.SH_AUTHOR_MULTI_ORG_NAMES]
+        for field in fields:
+            df_columns.pop(field, None)
+
+    @staticmethod
+    def _add_common_events(events, df_columns):
+        fields = [Events.META_TIMESTAMP, Events.META_UPDATED_ON, Events.META_ENRICHED_ON,
+                  Events.GRIMOIRE_CREATION_DATE, Events.PROJECT, Events.PROJECT_1,
+                  Events.PERCEVAL_UUID] + Events.SH_FIELDS
+
+        # Fields removed with '_skip_fields' are not added
+        for field in fields:
+            if field in df_columns:
+                events[field] = df_columns[field]
 
 
 class Bugzilla(Events):
@@ -429,13 +441,15 @@ class Git(Events):
         df_columns[Git.COMMIT_COMMITTER].append(commit_data['Commit'])
         df_columns[Git.COMMIT_COMMITTER_DATE].append(str_to_datetime(commit_data['CommitDate']))
         df_columns[Git.COMMIT_REPOSITORY].append(repository)
-        if 'message' in commit_data.keys():
-            df_columns[Git.COMMIT_MESSAGE].append(commit_data['message'])
-        else:
-            df_columns[Git.COMMIT_MESSAGE].append('')
+        if Git.COMMIT_MESSAGE in df_columns:
+            if 'message' in commit_data.keys():
+                df_columns[Git.COMMIT_MESSAGE].append(commit_data['message'])
+            else:
+                df_columns[Git.COMMIT_MESSAGE].append('')
 
-        author_domain = self.enrich.get_identity_domain(self.enrich.get_sh_identity(item, 'Author'))
-        df_columns[Git.AUTHOR_DOMAIN].append(author_domain)
+        if Git.AUTHOR_DOMAIN in df_columns:
+            author_domain = self.enrich.get_identity_domain(self.enrich.get_sh_identity(item, 'Author'))
+            df_columns[Git.AUTHOR_DOMAIN].append(author_domain)
 
         try:
             commit_date = str_to_datetime(commit_data['CommitDate'])
@@ -444,7 +458,7 @@ class Git(Events):
             commit_tz = 0
         df_columns[Git.COMMIT_COMMITTER_TZ].append(commit_tz)
 
-    def eventize(self, granularity):
+    def eventize(self, granularity, columns=None):
         """ This splits the JSON information found at self.events into the
         several events. For this there are three different levels of time
         consuming actions: 1-soft, 2-medium and 3-hard.
@@ -453,8 +467,14 @@ class Git(Events):
         Level 2 provides events about files
         Level 3 provides other events (not used so far)
 
+        When a list of columns is given, only those columns are returned
+        and the most expensive fields are extracted only if they are in
+        the list: SortingHat info, projects, message and author domain.
+
         :param granularity: Levels of time consuming actions to calculate events
+        :param columns: columns to return (all of them by default)
         :type granularity: integer
+        :type columns: list of strings
 
         :returns: Pandas dataframe with splitted events.
         :rtype: pandas.DataFrame
@@ -487,6 +507,14 @@ class Git(Events):
         df_columns[Git.FILE_ADDED_LINES] = []
         df_columns[Git.FILE_REMOVED_LINES] = []
 
+        if not self._needs(columns, Events.SH_FIELDS):
+            self._skip_fields(df_columns, Events.SH_FIELDS)
+        if not self._needs(columns, Events.GENERAL_FIELDS):
+            self._skip_fields(df_columns, Events.GENERAL_FIELDS)
+        for field in [Git.COMMIT_MESSAGE, Git.AUTHOR_DOMAIN]:
+            if not self._needs(columns, [field]):
+                self._skip_fields(df_columns, [field])
+
         events = pandas.DataFrame()
 
         for item in self.items:
@@ -567,9 +595,11 @@ class Git(Events):
         events[Git.COMMIT_COMMITTER_DATE] = df_columns[Git.COMMIT_COMMITTER_DATE]
         events[Git.COMMIT_COMMITTER_TZ] = df_columns[Git.COMMIT_COMMITTER_TZ]
         events[Git.COMMIT_REPOSITORY] = df_columns[Git.COMMIT_REPOSITORY]
-        events[Git.COMMIT_MESSAGE] = df_columns[Git.COMMIT_MESSAGE]
+        if Git.COMMIT_MESSAGE in df_columns:
+            events[Git.COMMIT_MESSAGE] = df_columns[Git.COMMIT_MESSAGE]
         events[Git.COMMIT_HASH] = df_columns[Git.COMMIT_HASH]
-        events[Git.AUTHOR_DOMAIN] = df_columns[Git.AUTHOR_DOMAIN]
+        if Git.AUTHOR_DOMAIN in df_columns:
+            events[Git.AUTHOR_DOMAIN] = df_columns[Git.AUTHOR_DOMAIN]
 
         if granularity == 1:
             events[Git.COMMIT_NUM_FILES] = df_columns[Git.COMMIT_NUM_FILES]
@@ -582,6 +612,9 @@ class Git(Events):
             events[Git.FILE_ADDED_LINES] = df_columns[Git.FILE_ADDED_LINES]
             events[Git.FILE_REMOVED_LINES] = df_columns[Git.FILE_REMOVED_LINES]
 
+        if columns is not None:
+            events = events[[column for column in events.columns if column in columns]]
+
         return events
 
 
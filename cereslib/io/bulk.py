@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import base64
+import http.client
+import json
+import logging
+import queue
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from cereslib.io.ndjson import bulk_actions, iter_documents
+
+logger = logging.getLogger(__name__)
+
+
+class BulkError(Exception):
+    """ Raised when documents can't be written by the bulk API """
+
+
+class BulkSink(object):
+    """ This class writes the rows of dataframes as documents of an
+    Elasticsearch or OpenSearch index through its bulk API.
+
+    Rows are serialized in chunks, taken one at a time from the
+    dataframe (see cereslib.io.ndjson), and put in a bounded queue read by a pool of threads,
+    each one sending its chunks in bulk requests. When the queue is
+    full, 'write' waits for the workers, so a producer faster than
+    the server never holds more than 'queue_size' chunks in memory.
+    Meanwhile, 'write' returns as soon as the rows are queued, so the
+    next batch can be eventized while the previous one is uploaded.
+
+    Requests rejected with 429 (too many requests) or with server
+    errors, as well as the documents rejected with 429 in a bulk
+    response, are retried with exponential backoff. Other rejected
+    documents are counted in 'failed'.
+
+        with BulkSink("https://localhost:9200", "git_areas",
+                      id_columns=["perceval_uuid", "filepath", "fileaction"]) as sink:
+            for commits in batches:
+                sink.write(pipeline.run(commits))
+
+    :param url: URL of the server; user and password can be included
+    :param index: name of the index
+    :param id_columns: columns joined with '_' to get the id of each
+        document (the server creates the ids by default)
+    :param doc_type: type of the documents, for servers still using
+        mapping types (optional)
+    :param workers: number of threads sending requests
+    :param chunk_size: number of documents of each bulk request
+    :param queue_size: maximum number of chunks waiting to be sent
+        (twice the number of workers by default)
+    :param retries: maximum number of retries of each request
+    :param backoff: seconds to wait before the first retry, doubled
+        in each new retry
+    :param timeout: seconds to wait for each response
+    :param verify_certs: whether to verify the certificate of the server
+    :type url: string
+    :type index: string
+    :type id_columns: list of strings
+    :type doc_type: string
+    :type workers: integer
+    :type chunk_size: integer
+    :type queue_size: integer
+    :type retries: integer
+    :type backoff: float
+    :type timeout: float
+    :type verify_certs: boolean
+    """
+
+    RETRY_STATUS = [429, 500, 502, 503, 504]
+
+    def __init__(self, url, index, id_columns=None, doc_type=None, workers=4, chunk_size=500,
+                 queue_size=None, retries=5, backoff=1.0, timeout=60, verify_certs=True):
+        """ Main constructor of the class """
+
+        parsed = urllib.parse.urlsplit(url)
+        self.headers = {'Content-Type': 'application/x-ndjson'}
+        if parsed.username is not None:
+            credentials = '%s:%s' % (urllib.parse.unquote(parsed.username),
+                                     urllib.parse.unquote(parsed.password or ''))
+            self.headers['Authorization'] = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+            parsed = parsed._replace(netloc=parsed.hostname + (':%s' % parsed.port if parsed.port else ''))
+        self.url = urllib.parse.urlunsplit(parsed).rstrip('/') + '/_bulk'
+
+        self.index = index
+        self.id_columns = id_columns
+        self.doc_type = doc_type
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.context = None
+        if not verify_certs:
+            self.context = ssl.create_default_context()
+            self.context.check_hostname = False
+            self.context.verify_mode = ssl.CERT_NONE
+
+        self.written = 0
+        self.failed = 0
+        self.error = None
+        self.lock = threading.Lock()
+
+        self.queue = queue.Queue(maxsize=queue_size or 2 * workers)
+        self.workers = [threading.Thread(target=self.__work, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(raise_error=exc_type is None)
+
+    def close(self, raise_error=True):
+        """ Waits until every queued document is sent and stops the workers
+
+        :param raise_error: whether to raise the error of a worker
+        :raises BulkError: when a worker could not send its documents
+        """
+
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+        if raise_error and self.error:
+            raise self.error
+
+    def chunks(self, data):
+        """ Serializes the rows of a dataframe in chunks of documents
+
+        :param data: dataframe of events
+        :type data: pandas.DataFrame
+
+        :returns: generator of lists of (action, document) pairs of
+            serialized lines
+        """
+
+        for start in range(0, len(data), self.chunk_size):
+            chunk = data.iloc[start:start + self.chunk_size]
+            actions = bulk_actions(chunk, self.index, self.id_columns, self.doc_type)
+            yield list(zip(actions, iter_documents(chunk)))
+
+    def write(self, data):
+        """ Queues the rows of a dataframe to be sent. It waits while
+        the queue is full.
+
+        :param data: dataframe of events
+        :type data: pandas.DataFrame
+
+        :raises BulkError: when a worker could not send its documents
+        """
+
+        for chunk in self.chunks(data):
+            if self.error:
+                raise self.error
+            self.queue.put(chunk)
+
+    def __work(self):
+        """ Sends the queued chunks until the end of the queue """
+
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            if self.error:
+                # Documents are discarded once a worker fails
+                continue
+            try:
+                self.__send(chunk)
+            except Exception as e:
+                logger.error("Bulk request to %s failed: %s", self.url, e)
+                self.error = e if isinstance(e, BulkError) else BulkError(str(e))
+
+    def __send(self, chunk):
+        """ Sends a chunk of documents, retrying the rejected ones """
+
+        for retry in range(self.retries + 1):
+            if retry:
+                time.sleep(self.backoff * 2 ** (retry - 1))
+
+            body = b''.join(action + b'\n' + document + b'\n' for action, document in chunk)
+            request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout, context=self.context) as response:
+                    result = json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                if e.code not in self.RETRY_STATUS:
+                    raise BulkError("Bulk request rejected with status %s: %s" % (e.code, e.read()[:500]))
+                logger.warning("Bulk request rejected with status %s; retrying", e.code)
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                # Connection errors, timeouts (socket.timeout before Python 3.10)
+                # and truncated responses
+                logger.warning("Bulk request failed: %s; retrying", e)
+                continue
+
+            items = result.get('items', [])
+            statuses = [next(iter(item.values())).get('status', 200) for item in items]
+            pending = [pair for pair, status in zip(chunk, statuses) if status == 429]
+            failed = sum(1 for status in statuses if status >= 300 and status != 429)
+
+            with self.lock:
+                self.written += len(chunk) - len(pending) - failed
+                self.failed += failed
+            if failed:
+                logger.warning("%s documents rejected by %s", failed, self.url)
+
+            if not pending:
+                return
+            chunk = pending
+
+        raise BulkError("Bulk request to %s failed after %s retries" % (self.url, self.retries))
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import datetime
+import json
+import math
+
+import numpy as np
+
+import pandas
+
+
+# Compact separators, as the ones of orjson
+SEPARATORS = (',', ':')
+
+
+def _iso_dates(values):
+    """ Returns a list with the dates of a column as ISO strings, with
+    millisecond precision, and None for null dates. Dates with timezone
+    are converted to UTC and end with 'Z'.
+    """
+
+    if pandas.api.types.is_datetime64tz_dtype(values.dtype):
+        dates = values.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+        timezone = 'UTC'
+    else:
+        dates = values.to_numpy(dtype='datetime64[ns]')
+        timezone = 'naive'
+
+    strings = np.datetime_as_string(dates, unit='ms', timezone=timezone).astype(object)
+    strings[np.isnat(dates)] = None
+    return strings.tolist()
+
+
+def column_values(values):
+    """ Returns the values of a column as a list of Python objects that
+    can be encoded as JSON: dates as ISO strings, null values as None
+    and NumPy numbers as Python numbers. Columns are converted at once,
+    without boxing each value in pandas objects.
+
+    :param values: column of a dataframe
+    :type values: pandas.Series
+
+    :returns: list of values
+    :rtype: list
+    """
+
+    dtype = values.dtype
+
+    if pandas.api.types.is_datetime64_any_dtype(dtype):
+        return _iso_dates(values)
+
+    if pandas.api.types.is_timedelta64_dtype(dtype):
+        values = values.dt.total_seconds()
+        dtype = values.dtype
+
+    if pandas.api.types.is_categorical_dtype(dtype):
+        values = values.astype(object)
+        dtype = values.dtype
+
+    if dtype == object:
+        kind = pandas.api.types.infer_dtype(values, skipna=True)
+        if kind == 'datetime':
+            return _iso_dates(pandas.to_datetime(values, utc=True))
+        # Nulls are NaN, None or NaT; lists are never null
+        return np.where(pandas.isna(values).to_numpy(), None, values.to_numpy()).tolist()
+
+    if pandas.api.types.is_extension_array_dtype(dtype):
+        # Nullable integers, booleans and strings
+        return values.astype(object).where(values.notna(), None).tolist()
+
+    array = values.to_numpy()
+    if array.dtype.kind == 'f':
+        # NaN and infinite values aren't valid JSON
+        nulls = ~np.isfinite(array)
+        if nulls.any():
+            array = array.astype(object)
+            array[nulls] = None
+    return array.tolist()
+
+
+def _default(value):
+    """ Encodes the values the json module doesn't support """
+
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _finite(value):
+    """ Replaces NaN and infinite floats with None, also inside lists
+    and dictionaries, as orjson does """
+
+    if isinstance(value, (float, np.floating)):
+        return value if math.isfinite(value) else None
+    if isinstance(value, np.ndarray):
+        return _finite(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    return value
+
+
+def _dumps(use_orjson):
+    """ Returns the function encoding documents as JSON bytes. orjson is
+    used when installed; strings it can't encode, such as the ones with
+    surrogates, are encoded by the json module with escaped characters.
+    """
+
+    def dumps_json(document):
+        try:
+            encoded = json.dumps(document, default=_default, allow_nan=False, separators=SEPARATORS)
+        except ValueError:
+            # Values with non-finite floats, e.g. lists, are walked only when they are found
+            encoded = json.dumps(_finite(document), default=_default, allow_nan=False, separators=SEPARATORS)
+        return encoded.encode('utf-8')
+
+    if not use_orjson:
+        return dumps_json
+
+    try:
+        import orjson
+    except ImportError:
+        return dumps_json
+
+    def dumps_orjson(document):
+        try:
+            return orjson.dumps(document, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            return dumps_json(document)
+
+    return dumps_orjson
+
+
+def iter_documents(data, use_orjson=True):
+    """ Encodes each row of a dataframe as a JSON document
+
+    :param data: dataframe of events
+    :param use_orjson: whether to use orjson when it is installed
+    :type data: pandas.DataFrame
+    :type use_orjson: boolean
+
+    :returns: generator of JSON documents, as bytes
+    """
+
+    dumps = _dumps(use_orjson)
+    names = [str(column) for column in data.columns]
+    columns = [column_values(data.iloc[:, number]) for number in range(len(names))]
+
+    for row in zip(*columns):
+        yield dumps(dict(zip(names, row)))
+
+
+def bulk_actions(data, index, id_columns=None, doc_type=None):
+    """ Returns the action line of the bulk API to index each row of a
+    dataframe
+
+    :param data: dataframe of events
+    :param index: name of the index
+    :param id_columns: columns joined with '_' to get the id of each
+        document (the server creates the ids by default)
+    :param doc_type: type of the documents (optional)
+    :type data: pandas.DataFrame
+    :type index: string
+    :type id_columns: list of strings
+    :type doc_type: string
+
+    :returns: list of actions, as bytes
+    :rtype: list
+    """
+
+    metadata = {'_index': index}
+    if doc_type:
+        metadata['_type'] = doc_type
+
+    if not id_columns:
+        return [json.dumps({'index': metadata}, separators=SEPARATORS).encode('utf-8')] * len(data)
+
+    ids = data[id_columns[0]].astype(str)
+    for column in id_columns[1:]:
+        ids = ids + '_' + data[column].astype(str)
+
+    # Only the id changes among actions
+    prefix = json.dumps({'index': metadata}, separators=SEPARATORS)[:-2] + ',"_id":'
+    return [(prefix + json.dumps(doc_id) + '}}').encode('utf-8') for doc_id in ids]
+
+
+def write_ndjson(data, stream, use_orjson=True):
+    """ Writes the rows of a dataframe as newline delimited JSON
+
+    :param data: dataframe of events
+    :param stream: binary file or buffer, e.g. io.BytesIO
+    :param use_orjson: whether to use orjson when it is installed
+
+    :returns: number of documents written
+    :rtype: integer
+    """
+
+    count = 0
+    for document in iter_documents(data, use_orjson):
+        stream.write(document + b'\n')
+        count += 1
+
+    return count
+
+
+def write_bulk(data, stream, index, id_columns=None, doc_type=None, use_orjson=True):
+    """ Writes the rows of a dataframe as the body of a request to the
+    bulk API: an action line followed by the document of each row
+
+    :param data: dataframe of events
+    :param stream: binary file or buffer, e.g. io.BytesIO
+    :param index: name of the index
+    :param id_columns: columns joined with '_' to get the id of each document
+    :param doc_type: type of the documents (optional)
+    :param use_orjson: whether to use orjson when it is installed
+
+    :returns: number of documents written
+    :rtype: integer
+    """
+
+    actions = bulk_actions(data, index, id_columns, doc_type)
+
+    count = 0
+    for action, document in zip(actions, iter_documents(data, use_orjson)):
+        stream.write(action + b'\n' + document + b'\n')
+        count += 1
+
+    return count
@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import re
+import urllib.parse
+import uuid
+
+import pandas
+
+from cereslib.dfutils.filter import FilterRows
+from cereslib.pipeline.executor import ENCODING_KEY, SURROGATEPASS, from_arrow, to_arrow
+
+
+# Name of the directories of null partition values, as in Hive
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# File with the schema of the whole dataset, as in Spark and Dask
+SCHEMA_FILE = '_common_metadata'
+
+# Key of the schema metadata describing the partitioning
+METADATA_KEY = b'cereslib'
+
+# Columns pandas adds to keep the index of the dataframes
+INDEX_COLUMN = re.compile(r'^__index_level_\d+__$')
+
+
+def merge_fields(field, other):
+    """ Returns the field able to store the values of two versions of
+    a column: null columns take the type of the other version, strings
+    are stored with surrogates when one of the versions has them and
+    numbers are promoted, e.g. integers to floats.
+
+    :param field: field of the current schema
+    :param other: field of the new data
+    :type field: pyarrow.Field
+    :type other: pyarrow.Field
+
+    :returns: merged field
+    :rtype: pyarrow.Field
+
+    :raises ValueError: when the types can't be merged
+    """
+
+    import pyarrow
+
+    if field.type == other.type:
+        return field if field.metadata else other
+    if pyarrow.types.is_null(field.type):
+        return other
+    if pyarrow.types.is_null(other.type):
+        return field
+
+    for binary, string in [(field, other), (other, field)]:
+        encoding = (binary.metadata or {}).get(ENCODING_KEY)
+        if encoding == SURROGATEPASS and pyarrow.types.is_string(string.type):
+            return binary
+
+    try:
+        schema = pyarrow.unify_schemas([pyarrow.schema([field.remove_metadata()]),
+                                        pyarrow.schema([other.remove_metadata()])],
+                                       promote_options='permissive')
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        raise ValueError("Column %s of type %s can't be merged with type %s" % (field.name, field.type, other.type))
+
+    return schema.field(0).with_metadata(field.metadata or other.metadata)
+
+
+def merge_schemas(schema, other):
+    """ Returns the schema with the columns of two schemas, in order
+    of appearance, merging the columns found in both of them
+
+    :param schema: current schema
+    :param other: schema of the new data
+    :type schema: pyarrow.Schema
+    :type other: pyarrow.Schema
+
+    :returns: merged schema
+    :rtype: pyarrow.Schema
+    """
+
+    import pyarrow
+
+    fields = {field.name: field for field in schema}
+    for field in other:
+        fields[field.name] = merge_fields(fields[field.name], field) if field.name in fields else field
+
+    return pyarrow.schema(list(fields.values()), metadata=schema.metadata or other.metadata)
+
+
+def read_schema(path):
+    """ Returns the schema of a dataset written by ParquetSink, or None
+    when it doesn't exist """
+
+    import pyarrow.parquet
+
+    path = os.path.join(path, SCHEMA_FILE)
+    if not os.path.exists(path):
+        return None
+
+    return pyarrow.parquet.read_schema(path)
+
+
+class ParquetSink(object):
+    """ This class writes dataframes of events to a dataset of Parquet
+    files partitioned in directories named as 'key=value', which can
+    be read with ParquetSource, Spark or pyarrow, e.g.:
+
+        events/project=grimoirelab/year=2019/month=01/part-<uuid>.parquet
+
+    Partition keys are columns of the events. The keys 'year', 'month'
+    and 'day' are calculated from 'date_column' when they aren't
+    columns. Values are escaped to be valid directory names, and null
+    values are written to the directory '__HIVE_DEFAULT_PARTITION__'.
+
+    Each call to 'write' adds a new file to each of its partitions.
+    Files are written with a temporary name and renamed once complete,
+    so readers never see partial files. The schema of the dataset, with
+    the columns of every file, is kept in '_common_metadata': new
+    columns are added to it and changing types are promoted (see
+    'merge_fields'), so files with older schemas are read with null
+    values in the new columns. Dates with timezone are stored in UTC.
+
+    Only one sink should write a dataset at a time.
+
+    It requires pyarrow.
+
+        sink = ParquetSink("events", ["project", "year", "month"], date_column="grimoire_creation_date")
+        for commits in batches:
+            sink.write(events.eventize(1))
+
+    :param path: root directory of the dataset
+    :param partition_by: partition keys, from the outermost directory
+        (no partitions by default)
+    :param date_column: column of the dates of the 'year', 'month'
+        and 'day' keys
+    :param compression: compression codec of the files
+    :type path: string
+    :type partition_by: list of strings
+    :type date_column: string
+    :type compression: string
+    """
+
+    DATE_KEYS = {
+        'year': '%Y',
+        'month': '%m',
+        'day': '%d'
+    }
+
+    def __init__(self, path, partition_by=None, date_column=None, compression='snappy'):
+        """ Main constructor of the class """
+
+        self.path = path
+        self.partition_by = list(partition_by) if partition_by is not None else []
+        self.date_column = date_column
+        self.compression = compression
+        self.files = []
+
+        self.schema = read_schema(path)
+        if self.schema is not None:
+            metadata = json.loads(self.schema.metadata[METADATA_KEY])
+            if metadata['partition_by'] != self.partition_by:
+                raise ValueError("Partition keys %s not in dataset partition keys: %s"
+                                 % (self.partition_by, metadata['partition_by']))
+
+    def __partition_keys(self, data):
+        """ Returns the columns of the partition keys """
+
+        keys = {}
+        dates = None
+        for key in self.partition_by:
+            if key in data.columns:
+                values = data[key]
+                if pandas.api.types.is_categorical_dtype(values.dtype):
+                    values = values.astype(object)
+                keys[key] = values.where(values.isnull(), values.astype(str))
+            elif key in self.DATE_KEYS and self.date_column:
+                if dates is None:
+                    dates = self.__dates(data[self.date_column])
+                keys[key] = dates.dt.strftime(self.DATE_KEYS[key])
+            else:
+                raise ValueError("Partition key %s not in DataFrame columns: %s" % (key, list(data)))
+
+        return pandas.DataFrame(keys, index=data.index)
+
+    @staticmethod
+    def __dates(values):
+        """ Returns the dates of a column as a datetime column """
+
+        if values.dtype == object and pandas.api.types.infer_dtype(values, skipna=True) == 'datetime':
+            return pandas.to_datetime(values, utc=True)
+        return values
+
+    def __prepare(self, data):
+        """ Converts the columns of dates with different timezones to UTC """
+
+        converted = {}
+        for column in data.columns:
+            dates = self.__dates(data[column])
+            if dates is not data[column]:
+                converted[column] = dates
+
+        return data.assign(**converted) if converted else data
+
+    def __metadata(self, data):
+        """ Returns the description of the partitioning of the dataset """
+
+        timezone = None
+        if self.date_column and self.date_column in data.columns:
+            dtype = self.__dates(data[self.date_column]).dtype
+            timezone = str(dtype.tz) if pandas.api.types.is_datetime64tz_dtype(dtype) else None
+
+        metadata = {
+            'partition_by': self.partition_by,
+            'date_column': self.date_column,
+            'timezone': timezone
+        }
+        return {METADATA_KEY: json.dumps(metadata).encode('utf-8')}
+
+    def write(self, data):
+        """ Writes the events of a dataframe to their partitions
+
+        :param data: dataframe of events
+        :type data: pandas.DataFrame
+
+        :returns: number of events written
+        :rtype: integer
+        """
+
+        import pyarrow
+        import pyarrow.parquet
+
+        if data.empty:
+            return 0
+
+        keys = self.__partition_keys(data)
+        data = self.__prepare(data.drop(columns=[key for key in self.partition_by if key in data.columns]))
+
+        tables = []
+        schema = self.schema
+        for values, positions in keys.groupby(list(keys.columns), dropna=False, sort=True).indices.items():
+            values = values if isinstance(values, tuple) else (values,)
+            table = to_arrow(data.iloc[positions])
+            schema = table.schema if schema is None else merge_schemas(schema, table.schema)
+            tables.append((values, table))
+
+        # The schema is written first, so the new files are always read with it
+        schema = schema.with_metadata(self.schema.metadata if self.schema is not None else self.__metadata(data))
+        os.makedirs(self.path, exist_ok=True)
+        self.__commit(os.path.join(self.path, SCHEMA_FILE),
+                      lambda path: pyarrow.parquet.write_metadata(schema, path))
+        self.schema = schema
+
+        for values, table in tables:
+            segments = ['%s=%s' % (key, self.escape(value)) for key, value in zip(self.partition_by, values)]
+            directory = os.path.join(self.path, *segments)
+            os.makedirs(directory, exist_ok=True)
+
+            path = os.path.join(directory, 'part-%s%s' % (uuid.uuid4().hex, ParquetSource.EXTENSION))
+            self.__commit(path, lambda path: pyarrow.parquet.write_table(table, path, compression=self.compression))
+            self.files.append(path)
+
+        return len(data)
+
+    @staticmethod
+    def __commit(path, write):
+        """ Writes a file with a temporary name and renames it """
+
+        directory, name = os.path.split(path)
+        tmp_path = os.path.join(directory, '.%s.%s.tmp' % (name, uuid.uuid4().hex))
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def escape(value):
+        """ Returns the name of the directory of a partition value """
+
+        if value is None or pandas.isnull(value):
+            return NULL_PARTITION
+        return urllib.parse.quote(str(value), safe='')
+
+
+class ParquetSource(object):
+    """ This class reads a dataset stored as Parquet files partitioned
+    in directories named as 'key=value', such as the ones written by
+    ParquetSink, e.g.:
+
+        events/project=grimoirelab/month=2019-01/part-0.parquet
+        events/project=grimoirelab/month=2019-02/part-0.parquet
+
+    Partitions are read one at a time, so datasets bigger than the
+    available memory can be processed. The values of the partition
+    keys are added to the dataframes as string columns.
+
+    Only the partitions and columns needed are read. Predicates are
+    tuples (column, operator, value), as the ones of FilterRows: the
+    ones on partition keys skip the partitions not matching them, and
+    the ones on other columns are pushed down to the Parquet reader,
+    which skips the row groups out of their range. The predicates on
+    the date column of a dataset written by ParquetSink also skip the
+    partitions of the years, months or days out of their range.
+
+        source = ParquetSource("events")
+        predicates = [("project", "in", ["grimoirelab"]),
+                      ("grimoire_creation_date", ">=", pandas.Timestamp("2019-01-01", tz="UTC"))]
+        for partition, events_df in source.scan(columns=["author_uuid", "filepath"], predicates=predicates):
+            ...
+
+    It requires pyarrow.
+
+    :param path: root directory of the dataset
+    :type path: string
+    """
+
+    EXTENSION = '.parquet'
+
+    def __init__(self, path):
+        """ Main constructor of the class """
+
+        self.path = path
+
+        self.schema = read_schema(path)
+        self.date_column = None
+        self.timezone = None
+        if self.schema is not None:
+            metadata = json.loads(self.schema.metadata[METADATA_KEY])
+            self.date_column = metadata['date_column']
+            self.timezone = metadata['timezone']
+
+    def partitions(self, predicates=None):
+        """ Returns the partitions of the dataset, sorted by their path.
+        A partition is a dictionary with the value of each key.
+
+        :param predicates: list of tuples (column, operator, value);
+            the partitions not matching them are skipped
+        :type predicates: list
+
+        :returns: list of partitions
+        :rtype: list of dicts
+        """
+
+        if predicates is None:
+            predicates = []
+
+        self.__check(predicates)
+
+        partitions = []
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            if not any(name.endswith(self.EXTENSION) for name in files):
+                continue
+
+            partition = {}
+            relative = os.path.relpath(root, self.path)
+            if relative != os.curdir:
+                for segment in relative.split(os.sep):
+                    key, _, value = segment.partition('=')
+                    partition[key] = None if value == NULL_PARTITION else urllib.parse.unquote(value)
+
+            if self.__matches(partition, predicates):
+                partitions.append(partition)
+
+        return partitions
+
+    def partition_path(self, partition):
+        """ Returns the directory of a partition """
+
+        segments = ['%s=%s' % (key, ParquetSink.escape(value)) for key, value in partition.items()]
+        return os.path.join(self.path, *segments)
+
+    def read(self, partition, columns=None, predicates=None):
+        """ Reads the events of a partition. Files written with older
+        schemas have null values in the columns they don't have.
+
+        :param partition: partition as returned by 'partitions'
+        :param columns: columns to read (all of them by default)
+        :param predicates: list of tuples (column, operator, value);
+            the ones on partition keys are applied by 'partitions'
+        :type partition: dict
+        :type columns: list of strings
+        :type predicates: list
+
+        :returns: dataframe of events
+        :rtype: pandas.DataFrame
+        """
+
+        import pyarrow.dataset
+        import pyarrow.parquet
+
+        if predicates is None:
+            predicates = []
+
+        self.__check(predicates)
+
+        path = self.partition_path(partition)
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(self.EXTENSION)]
+
+        schema = self.schema
+        if schema is None:
+            schema = pyarrow.parquet.read_schema(paths[0])
+            for file_path in paths[1:]:
+                schema = merge_schemas(schema, pyarrow.parquet.read_schema(file_path))
+
+        if columns is None:
+            file_columns = [name for name in schema.names if not INDEX_COLUMN.match(name) and name not in partition]
+        else:
+            file_columns = [column for column in columns if column not in partition]
+
+        expression = None
+        for column, op, value in predicates:
+            if column not in partition:
+                condition = FilterRows.OPERATORS[op](pyarrow.dataset.field(column), value)
+                expression = condition if expression is None else expression & condition
+
+        dataset = pyarrow.dataset.dataset(paths, schema=schema, format='parquet')
+        data = from_arrow(dataset.to_table(columns=file_columns, filter=expression))
+
+        for key, value in partition.items():
+            if columns is None or key in columns:
+                data[key] = value
+
+        return data
+
+    def scan(self, columns=None, predicates=None):
+        """ Reads the partitions matching the predicates, one at a time
+
+        :param columns: columns to read (all of them by default)
+        :param predicates: list of tuples (column, operator, value)
+        :type columns: list of strings
+        :type predicates: list
+
+        :returns: generator of (partition, dataframe) pairs
+        """
+
+        for partition in self.partitions(predicates):
+            yield partition, self.read(partition, columns=columns, predicates=predicates)
+
+    def __check(self, predicates):
+        """ Checks the operators of the predicates """
+
+        for _, op, _ in predicates:
+            if op not in FilterRows.OPERATORS:
+                raise ValueError("Operator %s not in supported operators: %s" % (op, list(FilterRows.OPERATORS)))
+
+    def __matches(self, partition, predicates):
+        """ Checks whether a partition may have events matching the predicates """
+
+        for column, op, value in predicates:
+            if column in partition:
+                if not self.__matches_key(partition[column], op, value):
+                    return False
+            elif column == self.date_column and 'year' in partition:
+                if not self.__matches_dates(partition, op, value):
+                    return False
+
+        return True
+
+    @staticmethod
+    def __matches_key(key, op, value):
+        """ Checks a predicate on the value of a partition key, which is
+        compared as a number when the predicate is on numbers. Null keys
+        match the predicates as null values do in FilterRows, i.e. only
+        '!=' and 'not in' """
+
+        sample = next(iter(value), None) if op in ['in', 'not in'] else value
+        values = pandas.Series([key])
+        if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+            values = pandas.to_numeric(values, errors='coerce')
+
+        return bool(FilterRows.OPERATORS[op](values, value).iloc[0])
+
+    def __matches_dates(self, partition, op, value):
+        """ Checks a predicate on the dates of a partition, which are in
+        the year, month or day of its keys """
+
+        try:
+            start = pandas.Timestamp(year=int(partition['year']),
+                                     month=int(partition.get('month') or 1),
+                                     day=int(partition.get('day') or 1), tz=self.timezone)
+            if 'day' in partition:
+                end = start + pandas.DateOffset(days=1)
+            elif 'month' in partition:
+                end = start + pandas.DateOffset(months=1)
+            else:
+                end = start + pandas.DateOffset(years=1)
+
+            if op == '==':
+                return start <= value < end
+            elif op in ['>', '>=']:
+                return value < end
+            elif op == '<':
+                return start < value
+            elif op == '<=':
+                return start <= value
+            elif op == 'in':
+                return any(start <= date < end for date in value)
+        except (TypeError, ValueError):
+            # Dates that can't be compared, e.g. with and without timezone
+            pass
+
+        return True
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+
+import pandas
+
+from cereslib._version import __version__
+from cereslib.pipeline.executor import from_arrow, to_arrow
+from cereslib.pipeline.pipeline import run_fused
+
+
+logger = logging.getLogger(__name__)
+
+
+# Kinds of object columns whose values pandas hashes as strings without
+# mixing types; other object columns, e.g. with numbers and strings, are pickled
+HASHABLE_KINDS = ['string', 'bytes', 'empty', 'integer', 'floating', 'boolean', 'decimal',
+                  'datetime', 'date', 'time', 'timedelta', 'period', 'interval']
+
+
+def _kind(values):
+    """ Returns the type of the values of a column, as inferred by
+    pandas, e.g. 'string' or 'mixed-integer'. The one of categorical
+    columns is the type of their categories.
+    """
+
+    if pandas.api.types.is_categorical_dtype(values.dtype):
+        return 'categorical-' + pandas.api.types.infer_dtype(values.cat.categories, skipna=True)
+    return pandas.api.types.infer_dtype(values, skipna=True)
+
+
+def _hash_column(values, kind):
+    """ Returns a digest of the content of a column. Columns pandas
+    can't hash, such as lists or strings with surrogates, and object
+    columns with values of different types are pickled.
+    """
+
+    if values.dtype == object and kind not in HASHABLE_KINDS:
+        return hashlib.sha256(pickle.dumps(values.tolist())).digest()
+
+    try:
+        hashes = pandas.util.hash_pandas_object(values, index=False)
+    except (TypeError, UnicodeEncodeError):
+        return hashlib.sha256(pickle.dumps(values.tolist())).digest()
+
+    return hashes.to_numpy().tobytes()
+
+
+class ResultCache(object):
+    """ This class stores on disk the columns written by deterministic
+    enrichers (see Enrich.DETERMINISTIC), so they are not computed
+    again when the same enricher runs over the same data.
+
+    Results are addressed by their content: the key is a hash of the
+    enricher class, its arguments, the version of cereslib and the
+    content of the columns the enricher reads, so changes in any of
+    them lead to a new entry and stale results are never returned.
+    The columns written are stored as Arrow IPC files.
+
+    Pipelines use the cache for their fused enrichers:
+
+        pipeline = Pipeline(cache=ResultCache("/tmp/cereslib-cache"))
+
+    Entries are never removed; call 'clear' to empty the cache.
+    It requires pyarrow.
+
+    :param path: directory of the cache, created if needed
+    :type path: string
+    """
+
+    EXTENSION = '.arrow'
+
+    def __init__(self, path):
+        """ Main constructor of the class """
+
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, stage, data):
+        """ Returns the key of the results of an enricher over a
+        dataframe, or None if the enricher can't be cached
+
+        :param stage: enricher with known columns
+        :param data: dataframe the enricher runs over
+        :type stage: cereslib.pipeline.pipeline.EnrichStage
+        :type data: pandas.DataFrame
+
+        :returns: hexadecimal key
+        :rtype: string
+        """
+
+        if not stage.deterministic:
+            return None
+
+        enricher = stage.enricher_class
+        try:
+            arguments = pickle.dumps((stage.args, sorted(stage.kwargs.items())))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(("%s %s.%s" % (__version__, enricher.__module__, enricher.__qualname__)).encode('utf-8'))
+        digest.update(arguments)
+
+        read, _ = stage.columns_io()
+        for column in read:
+            if column in data.columns:
+                # Values are hashed as strings, so 1 and '1' only differ in their type
+                kind = _kind(data[column])
+                digest.update(("%s %s %s %s" % (column, data[column].dtype, kind, len(data))).encode('utf-8'))
+                digest.update(_hash_column(data[column], kind))
+
+        return digest.hexdigest()
+
+    def __file_path(self, key):
+        return os.path.join(self.path, key[:2], key + self.EXTENSION)
+
+    def get(self, key):
+        """ Returns the columns stored with a key, or None
+
+        :param key: key of the results
+        :type key: string
+
+        :returns: dataframe with the columns written by the enricher
+        :rtype: pandas.DataFrame
+        """
+
+        import pyarrow
+
+        file_path = self.__file_path(key)
+        if not os.path.exists(file_path):
+            self.misses += 1
+            return None
+
+        with pyarrow.memory_map(file_path) as source:
+            data = from_arrow(pyarrow.ipc.open_file(source).read_all())
+
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """ Stores the columns written by an enricher with a key.
+        Files are written to a temporary file and renamed, so
+        concurrent runs never read incomplete files.
+
+        :param key: key of the results
+        :param data: dataframe with the columns written by the enricher
+        :type key: string
+        :type data: pandas.DataFrame
+        """
+
+        import pyarrow
+
+        file_path = self.__file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        table = to_arrow(data)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fd_tmp:
+                with pyarrow.ipc.new_file(fd_tmp, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, file_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def clear(self):
+        """ Removes every entry of the cache """
+
+        for name in os.listdir(self.path):
+            shutil.rmtree(os.path.join(self.path, name))
+
+    def run(self, data, stages, executor=None):
+        """ Runs a list of enrichers with known columns, as fused by
+        the pipeline, taking from the cache the columns of those that
+        already ran over the same data. The rest run together, as
+        long as they don't depend on each other, and their results
+        are stored in the cache.
+
+        :param data: dataframe of events
+        :param stages: list of cereslib.pipeline.pipeline.EnrichStage
+        :param executor: executor of the enrichers (optional)
+        :type data: pandas.DataFrame
+        :type stages: list
+
+        :returns: dataframe with the written columns
+        :rtype: pandas.DataFrame
+        """
+
+        pending = []
+        for stage in stages:
+            read, written = stage.columns_io()
+
+            # Enrichers can't be reordered when they use the columns of others
+            pending_reads = set(column for other, _ in pending for column in other.columns_io()[0])
+            pending_writes = set(column for other, _ in pending for column in other.columns_io()[1])
+            if pending_writes.intersection(read + written) or pending_reads.intersection(written):
+                data = self.__run_pending(data, pending, executor)
+                pending = []
+
+            key = self.key(stage, data)
+            results = self.get(key) if key else None
+            if results is None:
+                pending.append((stage, key))
+                continue
+
+            logger.debug("%s: results found in the cache", stage.name)
+            for column in results.columns:
+                data[column] = results[column].array
+
+        return self.__run_pending(data, pending, executor)
+
+    def __run_pending(self, data, pending, executor):
+        """ Runs the enrichers not found in the cache and stores their results """
+
+        if not pending:
+            return data
+
+        stages = [stage for stage, _ in pending]
+        if executor:
+            data = executor.run(data, stages)
+        else:
+            data = run_fused(data, stages)
+
+        for stage, key in pending:
+            if key:
+                _, written = stage.columns_io()
+                self.put(key, data[[column for column in written if column in data.columns]].reset_index(drop=True))
+
+        return data
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import itertools
+import math
+import os
+import pickle
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import pandas
+
+from cereslib.pipeline.pipeline import fused_columns, run_fused
+
+
+# Metadata of the Arrow fields stored with an encoding of their own
+ENCODING_KEY = b'cereslib_encoding'
+SURROGATEPASS = b'surrogatepass'
+PICKLE = b'pickle'
+
+
+def to_arrow(data):
+    """ Converts a dataframe to an Arrow table, ignoring the index.
+
+    Columns Arrow can't convert are stored as binary values: strings
+    with surrogates are encoded with 'surrogatepass', and columns with
+    values of different types, such as the flags of EmailFlag, are
+    pickled value by value. The encoding is kept in the metadata of
+    the field, so 'from_arrow' restores the original values.
+
+    :param data: dataframe to convert
+    :type data: pandas.DataFrame
+
+    :returns: Arrow table
+    :rtype: pyarrow.Table
+    """
+
+    import pyarrow
+
+    arrays = []
+    fields = []
+    for column in data.columns:
+        values = data[column]
+        metadata = None
+        try:
+            array = pyarrow.Array.from_pandas(values)
+        except (UnicodeEncodeError, pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            if pandas.api.types.infer_dtype(values, skipna=True) == 'string':
+                array = pyarrow.array([value.encode('utf-8', 'surrogatepass') if isinstance(value, str) else None
+                                       for value in values], type=pyarrow.binary())
+                metadata = {ENCODING_KEY: SURROGATEPASS}
+            else:
+                array = pyarrow.array([pickle.dumps(value) for value in values], type=pyarrow.binary())
+                metadata = {ENCODING_KEY: PICKLE}
+        arrays.append(array)
+        fields.append(pyarrow.field(str(column), array.type, metadata=metadata))
+
+    return pyarrow.Table.from_arrays(arrays, schema=pyarrow.schema(fields))
+
+
+def from_arrow(table):
+    """ Converts an Arrow table created by 'to_arrow' to a dataframe.
+    Lists are returned as Python lists, as in the original dataframes.
+
+    :param table: Arrow table
+    :type table: pyarrow.Table
+
+    :returns: dataframe with a default index
+    :rtype: pandas.DataFrame
+    """
+
+    import pyarrow
+
+    columns = {}
+    for field, values in zip(table.schema, table.columns):
+        encoding = (field.metadata or {}).get(ENCODING_KEY)
+        if encoding == SURROGATEPASS:
+            values = [value.decode('utf-8', 'surrogatepass') if value is not None else None
+                      for value in values.to_pylist()]
+            columns[field.name] = pandas.Series(values, dtype=object)
+        elif encoding == PICKLE:
+            columns[field.name] = pandas.Series([pickle.loads(value) for value in values.to_pylist()],
+                                                dtype=object)
+        elif pyarrow.types.is_list(field.type) or pyarrow.types.is_large_list(field.type):
+            columns[field.name] = pandas.Series(values.to_pylist(), dtype=object)
+        else:
+            columns[field.name] = values.to_pandas()
+
+    return pandas.DataFrame(columns, index=pandas.RangeIndex(table.num_rows))
+
+
+def write_shared(schema, batches):
+    """ Writes Arrow record batches, in IPC file format, into a new
+    block of shared memory. The caller must unlink the block once
+    it is no longer needed.
+
+    :returns: name of the shared memory block
+    :rtype: string
+    """
+
+    import pyarrow
+
+    sink = pyarrow.MockOutputStream()
+    _write_batches(sink, schema, batches)
+
+    shm = SharedMemory(create=True, size=max(sink.size(), 1))
+    try:
+        _write_batches(pyarrow.FixedSizeBufferWriter(pyarrow.py_buffer(shm.buf)), schema, batches)
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+
+    shm.close()
+    return shm.name
+
+
+def _write_batches(stream, schema, batches):
+    """ Writes the record batches to the stream in IPC file format.
+    Arrow objects are released on return, so the shared memory they
+    point to can be closed.
+    """
+
+    import pyarrow
+
+    with pyarrow.ipc.new_file(stream, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    stream.close()
+
+
+def read_shared(name):
+    """ Reads the dataframe stored in a block of shared memory by
+    'write_shared', copying it to the memory of the process, and
+    unlinks the block
+
+    :param name: name of the shared memory block
+    :type name: string
+
+    :returns: dataframe
+    :rtype: pandas.DataFrame
+    """
+
+    import pyarrow
+
+    shm = SharedMemory(name=name)
+    try:
+        reader = pyarrow.ipc.open_file(pyarrow.BufferReader(bytes(shm.buf)))
+        data = from_arrow(reader.read_all())
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return data
+
+
+def _enrich_shard(tasks, writes, buf, index):
+    """ Runs the enrichers over a shard, read without copies from
+    a block of shared memory, and writes the columns they add to
+    a new block. Returns the name of the new block.
+    """
+
+    import pyarrow
+
+    reader = pyarrow.ipc.open_file(pyarrow.py_buffer(buf))
+    data = from_arrow(pyarrow.Table.from_batches([reader.get_batch(index)]))
+
+    for enricher, args, kwargs in tasks:
+        data = enricher(data).enrich(*args, **kwargs)
+
+    table = to_arrow(data[[column for column in writes if column in data.columns]])
+    return write_shared(table.schema, table.to_batches())
+
+
+def _run_shard(tasks, writes, name, index):
+    """ Worker function, at module level so it can be sent to the
+    worker processes
+    """
+
+    shm = SharedMemory(name=name)
+    try:
+        return _enrich_shard(tasks, writes, shm.buf, index)
+    finally:
+        shm.close()
+
+
+class SharedMemoryExecutor(object):
+    """ This class runs the row-wise enrichers of a pipeline in a pool
+    of processes without pickling the dataframe.
+
+    The columns read by a group of consecutive row-wise enrichers
+    (see Enrich.ROW_WISE) are written once, as an Arrow IPC file with
+    a record batch per shard of rows, into a block of shared memory.
+    Each worker reads its shard from that block without copying it,
+    runs the enrichers and writes the columns they add to a new block,
+    which is read back by the parent process. Shards are put together
+    in the original order of the rows.
+
+    Group-wise enrichers, such as MaxMin or Onion, need all the rows,
+    so they run in the parent process once the shards are combined.
+
+    Workers create new instances of the enrichers, so state kept by
+    the instances given to the pipeline is not shared with them.
+
+    It requires pyarrow.
+
+        with SharedMemoryExecutor(workers=32) as executor:
+            events_df = pipeline.run(commits, executor)
+
+    :param workers: number of processes (defaults to the number of CPUs)
+    :param shardsize: rows per shard (by default, the rows are split
+        evenly among workers)
+    :type workers: integer
+    :type shardsize: integer
+    """
+
+    # Smaller dataframes are enriched in the parent process
+    MIN_ROWS = 10000
+
+    def __init__(self, workers=None, shardsize=None, min_rows=MIN_ROWS):
+        """ Main constructor of the class """
+
+        self.workers = workers or os.cpu_count() or 1
+        self.shardsize = shardsize
+        self.min_rows = min_rows
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ Shuts down the pool of processes """
+
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def run(self, data, stages):
+        """ Runs a list of enrichers with known columns, as fused by
+        the pipeline, and sets the columns they write in the dataframe.
+        Consecutive row-wise enrichers run in the pool of processes,
+        and the rest in this process.
+
+        :param data: dataframe of events
+        :param stages: list of cereslib.pipeline.pipeline.EnrichStage
+        :type data: pandas.DataFrame
+        :type stages: list
+
+        :returns: dataframe with the written columns
+        :rtype: pandas.DataFrame
+        """
+
+        for row_wise, group in itertools.groupby(stages, key=lambda stage: stage.row_wise):
+            group = list(group)
+            if row_wise and self.workers > 1 and len(data) >= max(self.min_rows, 2):
+                data = self.__run_shards(data, group)
+            else:
+                data = run_fused(data, group)
+
+        return data
+
+    def __run_shards(self, data, stages):
+        """ Runs row-wise enrichers over shards of the dataframe """
+
+        reads, writes = fused_columns(data, stages)
+        if not reads:
+            return run_fused(data, stages)
+
+        table = to_arrow(data[reads])
+        shardsize = self.shardsize or math.ceil(len(data) / self.workers)
+        batches = table.to_batches(max_chunksize=shardsize)
+
+        if not self.pool:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        tasks = [(stage.enricher_class, stage.args, stage.kwargs) for stage in stages]
+
+        name = write_shared(table.schema, batches)
+        count = len(batches)
+        # The shards are in shared memory from now on
+        del table, batches
+        try:
+            futures = [self.pool.submit(_run_shard, tasks, writes, name, index)
+                       for index in range(count)]
+            names = []
+            error = None
+            for future in futures:
+                try:
+                    names.append(future.result())
+                except Exception as e:
+                    error = error or e
+        finally:
+            shm = SharedMemory(name=name)
+            shm.close()
+            shm.unlink()
+
+        shards = [read_shared(shard) for shard in names]
+        if error:
+            raise error
+
+        results = pandas.concat(shards, ignore_index=True)
+        for column in writes:
+            if column in results.columns:
+                data[column] = results[column].array
+
+        return data
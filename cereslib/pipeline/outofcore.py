@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import pandas
+
+from cereslib.enrich.enrich import GroupStats, Onion
+
+
+def hash_buckets(data, columns, buckets):
+    """ Returns the bucket of each row, given by the hash of the
+    values of the columns
+
+    :param data: dataframe
+    :param columns: columns to hash
+    :param buckets: number of buckets
+    :type data: pandas.DataFrame
+    :type columns: list of strings
+    :type buckets: integer
+
+    :returns: array with the bucket of each row
+    :rtype: numpy.ndarray
+    """
+
+    hashes = pandas.util.hash_pandas_object(data[columns], index=False).to_numpy()
+    return (hashes % np.uint64(buckets)).astype(np.int64)
+
+
+class GroupAggregates(object):
+    """ This class stores on disk the aggregated values of a set of
+    columns for each group, split in buckets by the hash of the
+    group by columns, as calculated by OutOfCore.group_stats.
+
+    :param path: directory with a Parquet file per bucket
+    :param groupby: group by columns
+    :param buckets: number of buckets
+    :type path: string
+    :type groupby: list of strings
+    :type buckets: integer
+    """
+
+    def __init__(self, path, groupby, buckets):
+        """ Main constructor of the class """
+
+        self.path = path
+        self.groupby = groupby
+        self.buckets = buckets
+
+    def __bucket_path(self, bucket):
+        return os.path.join(self.path, '%s.parquet' % bucket)
+
+    def read_bucket(self, bucket):
+        """ Returns the aggregated values of the groups of a bucket,
+        or None if no group falls in it
+        """
+
+        path = self.__bucket_path(bucket)
+        if not os.path.exists(path):
+            return None
+        return pandas.read_parquet(path)
+
+    def to_dataframe(self):
+        """ Returns the aggregated values of every group
+
+        :returns: dataframe with a row per group
+        :rtype: pandas.DataFrame
+        """
+
+        frames = [self.read_bucket(bucket) for bucket in range(self.buckets)]
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return pandas.DataFrame()
+
+        return pandas.concat(frames, ignore_index=True)
+
+    def enrich(self, data):
+        """ Adds the aggregated values of its group to each row, as
+        GroupStats does. Only the buckets of the groups found in the
+        dataframe are read.
+
+        :param data: dataframe of events
+        :type data: pandas.DataFrame
+
+        :returns: dataframe with the new columns
+        :rtype: pandas.DataFrame
+        """
+
+        for column in self.groupby:
+            if column not in data.columns:
+                return data
+
+        buckets = hash_buckets(data, self.groupby, self.buckets)
+        keys = data[self.groupby].reset_index(drop=True)
+
+        pieces = {}
+        for bucket in np.unique(buckets):
+            positions = np.flatnonzero(buckets == bucket)
+            aggregates = self.read_bucket(bucket)
+            if aggregates is None:
+                continue
+
+            merged = keys.iloc[positions].merge(aggregates, how='left', on=self.groupby)
+            for column in aggregates.columns:
+                if column not in self.groupby:
+                    pieces.setdefault(column, []).append(pandas.Series(merged[column].array, index=positions))
+
+        for column, values in pieces.items():
+            values = pandas.concat(values).reindex(pandas.RangeIndex(len(data)))
+            data[column] = values.array
+
+        return data
+
+
+class OutOfCore(object):
+    """ This class processes a partitioned dataset, such as the ones read
+    by cereslib.io.parquet.ParquetSource, one partition at a time, so the
+    dataset doesn't need to fit in memory.
+
+    Group-wise operations need every partition. They are calculated in
+    two steps: partial aggregates of each partition are spilled to disk,
+    split in buckets by the hash of the groups, and each bucket is then
+    combined on its own. Only the groups of a bucket are kept in memory.
+
+        with OutOfCore(ParquetSource("events")) as dataset:
+            dates = dataset.max_min(["date"], "author_uuid")
+            roles = dataset.onion("author_uuid", "addedlines")
+            for partition, events_df in dataset.partitions(pipeline, [dates]):
+                ...
+
+    :param source: partitioned dataset, with the methods 'partitions'
+        and 'read'
+    :param spill_dir: directory for the files spilled to disk (a
+        temporary directory, removed on close, by default)
+    :param buckets: number of buckets of the spilled aggregates
+    :type source: cereslib.io.parquet.ParquetSource
+    :type spill_dir: string
+    :type buckets: integer
+    """
+
+    BUCKETS = 16
+
+    # Aggregation of each partition and aggregation combining the
+    # results of the partitions, in partition order
+    PARTIALS = GroupStats.PARTIALS
+
+    def __init__(self, source, spill_dir=None, buckets=BUCKETS):
+        """ Main constructor of the class """
+
+        self.source = source
+        self.buckets = buckets
+        self.temporary = spill_dir is None
+        self.spill_dir = tempfile.mkdtemp(prefix='cereslib_') if spill_dir is None else spill_dir
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ Removes the spilled files if they are in a temporary directory """
+
+        if self.temporary and os.path.exists(self.spill_dir):
+            shutil.rmtree(self.spill_dir)
+
+    def __read(self, partition, columns, pipeline):
+        """ Reads a partition, running the pipeline over it if given """
+
+        if pipeline is None:
+            return self.source.read(partition, columns=columns)
+
+        return pipeline.run(self.source.read(partition))
+
+    def __spill(self, data, groupby, path, number):
+        """ Writes the rows of a partial result to the file of their bucket """
+
+        buckets = hash_buckets(data, groupby, self.buckets)
+        for bucket in np.unique(buckets):
+            bucket_path = os.path.join(path, str(bucket))
+            os.makedirs(bucket_path, exist_ok=True)
+            rows = data.iloc[np.flatnonzero(buckets == bucket)]
+            rows.to_parquet(os.path.join(bucket_path, '%08d.parquet' % number), index=False)
+
+    @staticmethod
+    def __read_spilled(path, bucket):
+        """ Reads the partial results of a bucket, in partition order """
+
+        bucket_path = os.path.join(path, str(bucket))
+        if not os.path.exists(bucket_path):
+            return None
+
+        names = sorted(os.listdir(bucket_path))
+        return pandas.concat([pandas.read_parquet(os.path.join(bucket_path, name)) for name in names],
+                             ignore_index=True)
+
+    def group_stats(self, columns, groupby, aggregations=None, pipeline=None):
+        """ Calculates a set of aggregations of the given columns for
+        each group of rows of the whole dataset, as GroupStats does.
+        The results are named as '<aggregation>_<column>' and stored on
+        disk; they can be added to the rows of each partition when
+        iterating over them with 'partitions'.
+
+        :param columns: list of columns to aggregate
+        :param groupby: column or list of columns used to group the rows
+        :param aggregations: list of aggregations to calculate, 'min' and
+            'max' by default; supported ones are 'min', 'max', 'count',
+            'sum', 'first', 'last' and 'nunique'
+        :param pipeline: pipeline run over each partition before
+            aggregating it (optional)
+        :type columns: list of strings
+        :type groupby: string or list of strings
+        :type aggregations: list of strings
+        :type pipeline: cereslib.pipeline.pipeline.Pipeline
+
+        :returns: aggregated values of each group
+        :rtype: GroupAggregates
+        """
+
+        if aggregations is None:
+            aggregations = ['min', 'max']
+
+        for aggregation in aggregations:
+            if aggregation not in GroupStats.AGGREGATIONS:
+                raise ValueError("Aggregation %s not in supported aggregations: %s" %
+                                 (aggregation, GroupStats.AGGREGATIONS))
+
+        if isinstance(groupby, str):
+            groupby = [groupby]
+
+        self.count += 1
+        path = os.path.join(self.spill_dir, 'stats_%s' % self.count)
+        partial_path = os.path.join(path, 'partial')
+        distinct_paths = {column: os.path.join(path, 'distinct_%s' % count)
+                          for count, column in enumerate(columns)}
+
+        for number, partition in enumerate(self.source.partitions()):
+            data = self.__read(partition, list(columns) + groupby, pipeline)
+            for column in list(columns) + groupby:
+                if column not in data.columns:
+                    raise ValueError("Column %s not in DataFrame columns: %s" % (column, list(data)))
+            if data.empty:
+                continue
+
+            grouped = data.groupby(groupby, sort=False, dropna=False)
+            partial = {}
+            for column in columns:
+                for aggregation in aggregations:
+                    if aggregation in self.PARTIALS:
+                        partial[aggregation + '_' + column] = grouped[column].agg(self.PARTIALS[aggregation][0])
+                if 'nunique' in aggregations:
+                    # Distinct values are needed to count them among partitions
+                    distinct = data[groupby + [column]].drop_duplicates()
+                    self.__spill(distinct, groupby, distinct_paths[column], number)
+
+            if partial:
+                self.__spill(pandas.DataFrame(partial).reset_index(), groupby, partial_path, number)
+
+        result_path = os.path.join(path, 'result')
+        os.makedirs(result_path)
+        for bucket in range(self.buckets):
+            result = self.__combine(bucket, columns, groupby, aggregations, partial_path, distinct_paths)
+            if result is not None:
+                result.to_parquet(os.path.join(result_path, '%s.parquet' % bucket), index=False)
+
+        shutil.rmtree(partial_path, ignore_errors=True)
+        for distinct_path in distinct_paths.values():
+            shutil.rmtree(distinct_path, ignore_errors=True)
+
+        return GroupAggregates(result_path, groupby, self.buckets)
+
+    def __combine(self, bucket, columns, groupby, aggregations, partial_path, distinct_paths):
+        """ Combines the partial results of a bucket """
+
+        combined = {}
+        partial = self.__read_spilled(partial_path, bucket)
+        if partial is not None:
+            grouped = partial.groupby(groupby, sort=False, dropna=False)
+            for column in columns:
+                for aggregation in aggregations:
+                    if aggregation in self.PARTIALS:
+                        name = aggregation + '_' + column
+                        combined[name] = grouped[name].agg(self.PARTIALS[aggregation][1])
+
+        for column in columns:
+            if 'nunique' not in aggregations:
+                continue
+            distinct = self.__read_spilled(distinct_paths[column], bucket)
+            if distinct is None:
+                continue
+            distinct = distinct.drop_duplicates()
+            combined['nunique_' + column] = distinct.groupby(groupby, sort=False, dropna=False)[column].nunique()
+
+        if not combined:
+            return None
+
+        result = pandas.DataFrame(combined).reset_index()
+        names = [aggregation + '_' + column for column in columns for aggregation in aggregations]
+        return result[groupby + names]
+
+    def max_min(self, columns, groupby, pipeline=None):
+        """ Calculates the maximum and minimum values of the given
+        columns for each group of rows of the whole dataset, as
+        MaxMin does
+
+        :returns: aggregated values of each group
+        :rtype: GroupAggregates
+        """
+
+        return self.group_stats(columns, groupby, ['max', 'min'], pipeline)
+
+    def onion(self, member_column, events_column, pipeline=None):
+        """ Calculates the onion model of the whole dataset. The events
+        of each member are added up among partitions, and the onion
+        model is calculated over the totals, as Onion does.
+
+        :param member_column: column with the community member
+        :param events_column: column with the amount of events
+        :param pipeline: pipeline run over each partition before
+            aggregating it (optional)
+        :type member_column: string
+        :type events_column: string
+
+        :returns: dataframe with a row per member, with its total
+            of events and its role
+        :rtype: pandas.DataFrame
+        """
+
+        totals = self.group_stats([events_column], member_column, ['sum'], pipeline).to_dataframe()
+        if totals.empty:
+            return totals
+
+        totals = totals.rename(columns={'sum_' + events_column: events_column})
+        return Onion(totals).enrich(member_column, events_column)
+
+    def partitions(self, pipeline=None, aggregates=None, columns=None):
+        """ Iterates over the partitions of the dataset, running the
+        pipeline over each of them and adding the aggregated values
+        of the groups of each row
+
+        :param pipeline: pipeline run over each partition (optional)
+        :param aggregates: list of GroupAggregates to add to the rows
+            (none by default)
+        :param columns: columns to read, when no pipeline is given
+        :type pipeline: cereslib.pipeline.pipeline.Pipeline
+        :type aggregates: list
+        :type columns: list of strings
+
+        :returns: generator of tuples (partition, dataframe)
+        """
+
+        if aggregates is None:
+            aggregates = []
+
+        for partition in self.source.partitions():
+            data = self.__read(partition, columns, pipeline)
+            for aggregate in aggregates:
+                data = aggregate.enrich(data)
+            yield partition, data
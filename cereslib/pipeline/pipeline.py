@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import inspect
+import logging
+
+from cereslib.dfutils.filter import FilterRows
+
+
+logger = logging.getLogger(__name__)
+
+
+def fused_columns(data, stages):
+    """ Returns the columns of the dataframe read by a list of enrichers
+    with known columns, and the columns written by them
+    """
+
+    reads = []
+    writes = []
+    for stage in stages:
+        read, written = stage.columns_io()
+        for column in read:
+            if column in data.columns and column not in reads and column not in writes:
+                reads.append(column)
+        for column in written:
+            if column not in writes:
+                writes.append(column)
+
+    return reads, writes
+
+
+def run_fused(data, stages):
+    """ Runs a list of enrichers with known columns over the columns
+    they read and sets the columns they write in the dataframe
+
+    :param data: dataframe of events
+    :param stages: list of EnrichStage
+    :type data: pandas.DataFrame
+    :type stages: list
+
+    :returns: dataframe with the written columns
+    :rtype: pandas.DataFrame
+    """
+
+    reads, writes = fused_columns(data, stages)
+
+    # Enrichers get a copy of the columns they need, with an
+    # integer index as some of them expect
+    narrow = data[reads].reset_index(drop=True)
+    for stage in stages:
+        narrow = stage.run(narrow)
+
+    for column in writes:
+        if column in narrow.columns:
+            data[column] = narrow[column].array
+
+    return data
+
+
+class EventizeStage(object):
+    """ Stage that converts a list of items into a dataframe of events
+
+    :param eventizer: eventizer class, e.g. cereslib.events.events.Git
+    :param granularity: granularity given to 'eventize'
+    :param args: extra arguments of the eventizer constructor
+    """
+
+    def __init__(self, eventizer, granularity, *args):
+        self.eventizer = eventizer
+        self.granularity = granularity
+        self.args = args
+
+    def run(self, items, columns=None):
+        eventizer = self.eventizer(items, *self.args)
+
+        if columns is None:
+            return eventizer.eventize(self.granularity)
+
+        if 'columns' in inspect.signature(eventizer.eventize).parameters:
+            return eventizer.eventize(self.granularity, columns=columns)
+
+        events = eventizer.eventize(self.granularity)
+        return events[[column for column in events.columns if column in columns]]
+
+
+class FilterStage(object):
+    """ Stage that keeps the rows matching a list of predicates,
+    as in FilterRows.filter_predicates
+
+    :param predicates: list of tuples (column, operator, value)
+    """
+
+    def __init__(self, predicates):
+        self.predicates = list(predicates)
+
+    def run(self, data):
+        filtered = FilterRows(data).filter_predicates(self.predicates)
+        if filtered is not data:
+            # The filtered frame is not a view of the original
+            # one, so new columns can be set without warnings
+            filtered = filtered.copy(deep=False)
+        return filtered
+
+
+class EnrichStage(object):
+    """ Stage that runs an enricher
+
+    The enricher can be given as a class, which is instantiated with
+    the first batch of data, or as an instance. In both cases, the
+    same instance is used for every batch, so the state kept by
+    enrichers such as Gender or Uuid is shared among batches.
+
+    :param enricher: enricher class or instance
+    :param args: arguments of 'enrich'
+    :param kwargs: keyword arguments of 'enrich'
+    """
+
+    def __init__(self, enricher, *args, **kwargs):
+        self.enricher = enricher
+        self.instance = None if isinstance(enricher, type) else enricher
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def enricher_class(self):
+        if self.instance is not None:
+            return type(self.instance)
+        return self.enricher
+
+    @property
+    def name(self):
+        return self.enricher_class.__name__
+
+    @property
+    def row_wise(self):
+        return self.enricher_class.ROW_WISE
+
+    @property
+    def deterministic(self):
+        return self.enricher_class.DETERMINISTIC
+
+    def columns_io(self):
+        """ Columns read and written by the enricher, or None """
+
+        return self.enricher.columns_io(*self.args, **self.kwargs)
+
+    def run(self, data):
+        if self.instance is None:
+            self.instance = self.enricher(data)
+        else:
+            self.instance.data = data
+
+        return self.instance.enrich(*self.args, **self.kwargs)
+
+
+class Pipeline(object):
+    """ This class declares once the stages needed to convert a set
+    of items into a dataframe of enriched events and runs them over
+    as many batches of items as needed, e.g.:
+
+        pipeline = Pipeline()
+        pipeline.eventize(Git, 2, git_enrich)
+        pipeline.filter(("filepath", "!=", "-"))
+        pipeline.enrich(FileType, "filepath")
+        pipeline.enrich(FilePath, "filepath")
+        pipeline.enrich(ToUTF8, ["owner"])
+
+        for commits in batches:
+            events_df = pipeline.run(commits)
+
+    Consecutive filters are combined in a single mask, so rows are
+    copied only once. Consecutive enrichers that declare the columns
+    they read and write (see Enrich.columns_io) are fused: they run
+    one after another over a frame with only the columns they read,
+    and the columns they write are set in the events dataframe once
+    all of them have finished. Enrichers that change the rows, such as
+    SplitLists or Onion, run over the whole dataframe.
+
+    When the output columns are given, the pipeline only computes what
+    is needed to produce them. Going backwards from the output, stages
+    whose written columns are not needed are skipped, and the eventizer
+    is asked only for the columns read by the remaining stages, so
+    eventizers such as Git skip their most expensive fields. Enrichers
+    with unknown columns need every column produced before them.
+
+    When a cache is given, the columns written by deterministic fused
+    enrichers are stored on disk and reused when they run again over
+    the same data (see cereslib.pipeline.cache.ResultCache).
+
+    :param columns: output columns (all of them by default)
+    :param cache: cache of the results of the enrichers (optional)
+    :type columns: list of strings
+    :type cache: cereslib.pipeline.cache.ResultCache
+    """
+
+    def __init__(self, columns=None, cache=None):
+        """ Main constructor of the class """
+
+        self.stages = []
+        self.columns = columns
+        self.cache = cache
+
+    def eventize(self, eventizer, granularity, *args):
+        """ Adds the stage that creates the events from the items.
+        It must be the first stage of the pipeline.
+
+        :param eventizer: eventizer class, e.g. Git
+        :param granularity: granularity of the events
+        :param args: extra arguments of the eventizer, e.g. git_enrich
+        :type eventizer: subclass of cereslib.events.events.Events
+        :type granularity: integer
+
+        :returns: the pipeline
+        :rtype: Pipeline
+        """
+
+        if self.stages:
+            raise ValueError("Eventize must be the first stage of the pipeline")
+
+        self.stages.append(EventizeStage(eventizer, granularity, *args))
+        return self
+
+    def filter(self, *predicates):
+        """ Adds a stage that keeps the rows matching all the predicates.
+        A predicate is a tuple (column, operator, value), as in
+        FilterRows.filter_predicates.
+
+        :returns: the pipeline
+        :rtype: Pipeline
+        """
+
+        self.stages.append(FilterStage(predicates))
+        return self
+
+    def enrich(self, enricher, *args, **kwargs):
+        """ Adds a stage that runs an enricher with the given arguments
+
+        :param enricher: enricher class, e.g. FileType, or instance,
+            e.g. Gender(None, cache_file="gender.db")
+        :type enricher: subclass or instance of cereslib.enrich.enrich.Enrich
+
+        :returns: the pipeline
+        :rtype: Pipeline
+        """
+
+        self.stages.append(EnrichStage(enricher, *args, **kwargs))
+        return self
+
+    def plan(self):
+        """ Groups the stages needed to produce the output columns in
+        steps. A step is the eventize stage, a list of consecutive filters,
+        a list of consecutive enrichers with known columns, or an enricher
+        with unknown columns.
+
+        :returns: list of tuples (kind, stages), where kind is
+            'eventize', 'filter', 'fused' or 'enrich'
+        :rtype: list
+        """
+
+        stages, _ = self.__project()
+        return self.__group(stages)
+
+    def __project(self):
+        """ Returns the stages needed to produce the output columns and
+        the columns the eventizer has to produce (None for all of them)
+        """
+
+        if self.columns is None:
+            return self.stages, None
+
+        needed = set(self.columns)
+        stages = []
+        for stage in reversed(self.stages):
+            if needed is None or isinstance(stage, EventizeStage):
+                stages.append(stage)
+                continue
+
+            if isinstance(stage, FilterStage):
+                needed.update(column for column, _, _ in stage.predicates)
+            elif stage.columns_io() is None:
+                # Any column produced so far may be needed by the enricher
+                needed = None
+            else:
+                read, written = stage.columns_io()
+                if not needed.intersection(written):
+                    continue
+                needed.difference_update(written)
+                needed.update(read)
+
+            stages.append(stage)
+
+        stages.reverse()
+        return stages, None if needed is None else sorted(needed)
+
+    @staticmethod
+    def __group(stages):
+        """ Groups consecutive filters and enrichers with known columns """
+
+        steps = []
+        for stage in stages:
+            if isinstance(stage, EventizeStage):
+                kind = 'eventize'
+            elif isinstance(stage, FilterStage):
+                kind = 'filter'
+            elif stage.columns_io() is not None:
+                kind = 'fused'
+            else:
+                kind = 'enrich'
+
+            if steps and kind in ('filter', 'fused') and steps[-1][0] == kind:
+                steps[-1][1].append(stage)
+            else:
+                steps.append((kind, [stage]))
+
+        return steps
+
+    def eventize_step(self):
+        """ Returns the eventize stage and the columns it has to produce
+        (None for all of them), or None when the pipeline doesn't
+        eventize the items
+
+        :returns: tuple (stage, columns) or None
+        :rtype: tuple
+        """
+
+        stages, columns = self.__project()
+        if not stages or not isinstance(stages[0], EventizeStage):
+            return None
+
+        return stages[0], columns
+
+    def run(self, items, executor=None):
+        """ Runs the stages of the pipeline over a batch of items
+
+        :param items: list of items if the pipeline eventizes them,
+            or a dataframe of events otherwise
+        :param executor: executor of the fused enrichers, e.g.
+            cereslib.pipeline.executor.SharedMemoryExecutor (optional)
+        :type items: list or pandas.DataFrame
+
+        :returns: dataframe of enriched events
+        :rtype: pandas.DataFrame
+        """
+
+        return self.run_enrich(self.run_eventize(items), executor)
+
+    def run_eventize(self, items):
+        """ Runs the eventize stage of the pipeline over a batch of items.
+        Items are returned as they are when the pipeline doesn't
+        eventize them.
+
+        :param items: list of items
+        :type items: list
+
+        :returns: dataframe of events
+        :rtype: pandas.DataFrame
+        """
+
+        step = self.eventize_step()
+        if step is None:
+            return items
+
+        stage, columns = step
+        data = stage.run(items, columns)
+        logger.debug("%s: %s rows", self.__name(stage), len(data))
+
+        return data
+
+    def run_enrich(self, data, executor=None):
+        """ Runs the stages of the pipeline after the eventize stage
+        over a dataframe of events, as returned by 'run_eventize'
+
+        :param data: dataframe of events
+        :param executor: executor of the fused enrichers (optional)
+        :type data: pandas.DataFrame
+
+        :returns: dataframe of enriched events
+        :rtype: pandas.DataFrame
+        """
+
+        stages, _ = self.__project()
+
+        for kind, stages in self.__group(stages):
+            if kind == 'eventize':
+                continue
+            elif kind == 'filter':
+                predicates = [predicate for stage in stages for predicate in stage.predicates]
+                data = FilterStage(predicates).run(data)
+            elif kind == 'fused' and self.cache:
+                data = self.cache.run(data, stages, executor)
+            elif kind == 'fused' and executor:
+                data = executor.run(data, stages)
+            elif kind == 'fused':
+                data = run_fused(data, stages)
+            else:
+                data = stages[0].run(data)
+
+            logger.debug("%s: %s rows", ', '.join(self.__name(stage) for stage in stages), len(data))
+
+        if self.columns is not None:
+            data = data[[column for column in self.columns if column in data.columns]]
+
+        return data
+
+    def run_batches(self, batches, executor=None):
+        """ Runs the stages of the pipeline over each batch of items
+
+        :param batches: iterable of batches of items
+        :param executor: executor of the fused enrichers (optional)
+        :returns: generator of dataframes of enriched events
+        """
+
+        for items in batches:
+            yield self.run(items, executor)
+
+    @staticmethod
+    def __name(stage):
+        if isinstance(stage, EnrichStage):
+            return stage.name
+        return type(stage).__name__
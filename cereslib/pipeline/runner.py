@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import queue
+import threading
+import time
+
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import pandas
+
+logger = logging.getLogger(__name__)
+
+
+# End of the batches of a queue
+DONE = object()
+
+
+def _eventize(stage, columns, items):
+    """ Worker function, at module level so it can be sent to the
+    worker processes. Returns the events and the seconds it took.
+    """
+
+    start = time.perf_counter()
+    data = stage.run(items, columns)
+    return data, time.perf_counter() - start
+
+
+class StageStats(object):
+    """ Counters of a stage of PipelineRunner: batches and rows
+    processed, seconds busy and waiting for other stages, and the
+    number of batches in its output queue each time it puts one
+
+    :param name: name of the stage
+    :type name: string
+    """
+
+    def __init__(self, name):
+        """ Main constructor of the class """
+
+        self.name = name
+        self.batches = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.wait = 0.0
+        self.depths = []
+        self.lock = threading.Lock()
+
+    def record(self, rows, seconds):
+        """ Counts a processed batch """
+
+        with self.lock:
+            self.batches += 1
+            self.rows += rows
+            self.busy += seconds
+
+    @property
+    def throughput(self):
+        """ Rows processed per busy second """
+
+        return self.rows / self.busy if self.busy else 0.0
+
+    def to_dict(self):
+        """ Returns the counters as a dictionary """
+
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'busy': self.busy,
+            'wait': self.wait,
+            'rows_per_second': self.throughput,
+            'queue_max': max(self.depths, default=0),
+            'queue_mean': sum(self.depths) / len(self.depths) if self.depths else 0.0
+        }
+
+
+class PipelineRunner(object):
+    """ This class runs a pipeline over batches of items and writes
+    the enriched events to a sink, with a thread per stage connected
+    by bounded queues:
+
+        read -> eventize -> enrich -> write
+
+    Each stage works on a batch while the previous stage prepares the
+    next one, so reading from the source, eventizing, enriching and
+    writing overlap, and the total time gets close to the one of the
+    slowest stage instead of the sum of all of them. When a stage is
+    slower than the previous ones, their queues get full and they
+    wait, so no more than 'queue_size' batches are kept between stages.
+
+    The items are eventized in a pool of processes when 'processes'
+    is given; the eventizer and its arguments must be picklable. The
+    enrichers run in a thread, with an optional executor (see
+    cereslib.pipeline.executor.SharedMemoryExecutor). The sink is any
+    object with a method 'write' taking a dataframe, such as
+    cereslib.io.bulk.BulkSink or cereslib.io.parquet.ParquetSink; it
+    isn't closed by the runner.
+
+    Errors raised by any stage stop the rest of them and are raised
+    again by 'run'.
+
+        with BulkSink(url, "git_areas") as sink:
+            runner = PipelineRunner(pipeline, sink, processes=4)
+            runner.run(batches)
+        print(runner.stats())
+
+    :param pipeline: pipeline of the batches
+    :param sink: writer of the enriched events
+    :param processes: number of processes eventizing the items (by
+        default, they are eventized in a thread)
+    :param executor: executor of the fused enrichers (optional)
+    :param queue_size: maximum number of batches in each queue
+    :type pipeline: cereslib.pipeline.pipeline.Pipeline
+    :type sink: object
+    :type processes: integer
+    :type executor: cereslib.pipeline.executor.SharedMemoryExecutor
+    :type queue_size: integer
+    """
+
+    STAGES = ['read', 'eventize', 'enrich', 'write']
+
+    def __init__(self, pipeline, sink, processes=None, executor=None, queue_size=2):
+        """ Main constructor of the class """
+
+        self.pipeline = pipeline
+        self.sink = sink
+        self.processes = processes
+        self.executor = executor
+        self.queue_size = queue_size
+
+        self.elapsed = 0.0
+        self.counters = {name: StageStats(name) for name in self.STAGES}
+        self.error = None
+        self.futures = []
+        self.stopped = threading.Event()
+
+    def run(self, batches):
+        """ Runs the pipeline over each batch of items and writes the
+        enriched events. It returns once every batch has been written.
+
+        :param batches: iterable of batches of items, e.g. lists of
+            commits
+        :type batches: iterable
+
+        :returns: number of enriched events written
+        :rtype: integer
+        """
+
+        self.counters = {name: StageStats(name) for name in self.STAGES}
+        self.error = None
+        self.futures = []
+        self.stopped.clear()
+
+        pool = None
+        if self.processes:
+            pool = ProcessPoolExecutor(max_workers=self.processes)
+
+        # Futures of the pool are queued too, so all the processes are kept busy
+        items = queue.Queue(maxsize=self.queue_size)
+        events = queue.Queue(maxsize=max(self.queue_size, self.processes or 0))
+        enriched = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(target=self.__guard, args=(self.__read, batches, items)),
+            threading.Thread(target=self.__guard, args=(self.__eventize, items, events, pool)),
+            threading.Thread(target=self.__guard, args=(self.__enrich, events, enriched)),
+            threading.Thread(target=self.__guard, args=(self.__write, enriched))
+        ]
+
+        start = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.stopped.set()
+            if pool:
+                # Batches not eventized yet are discarded when a stage fails
+                for future in self.futures:
+                    future.cancel()
+                pool.shutdown()
+            self.elapsed = time.perf_counter() - start
+
+        logger.info("Pipeline finished in %.2f seconds: %s", self.elapsed,
+                    ', '.join('%s %.0f rows/s' % (name, counter.throughput)
+                              for name, counter in self.counters.items()))
+
+        if self.error:
+            raise self.error
+
+        return self.counters['write'].rows
+
+    def stats(self):
+        """ Returns the counters of each stage: batches and rows
+        processed, seconds busy and waiting, rows processed per busy
+        second, and the maximum and mean number of batches in its
+        output queue
+
+        :returns: dataframe with a row per stage
+        :rtype: pandas.DataFrame
+        """
+
+        return pandas.DataFrame.from_dict({name: counter.to_dict() for name, counter in self.counters.items()},
+                                          orient='index')
+
+    def __guard(self, target, *args):
+        """ Runs a stage, stopping the rest of them when it fails """
+
+        try:
+            target(*args)
+        except Exception as e:
+            logger.error("Pipeline stage failed: %s", e)
+            if self.error is None:
+                self.error = e
+            self.stopped.set()
+
+    def __read(self, batches, output):
+        counter = self.counters['read']
+
+        iterator = iter(batches)
+        while not self.stopped.is_set():
+            start = time.perf_counter()
+            batch = next(iterator, DONE)
+            if batch is DONE:
+                break
+            counter.record(len(batch), time.perf_counter() - start)
+            self.__put(output, batch, counter)
+
+        self.__put(output, DONE, counter)
+
+    def __eventize(self, source, output, pool):
+        counter = self.counters['eventize']
+        step = self.pipeline.eventize_step()
+
+        for items in self.__iterate(source, counter):
+            if step is None:
+                self.__put(output, items, counter)
+            elif pool:
+                future = pool.submit(_eventize, step[0], step[1], items)
+                self.futures = [pending for pending in self.futures if not pending.done()] + [future]
+                self.__put(output, future, counter)
+            else:
+                data, seconds = _eventize(step[0], step[1], items)
+                counter.record(len(data), seconds)
+                self.__put(output, data, counter)
+
+        self.__put(output, DONE, counter)
+
+    def __enrich(self, source, output):
+        counter = self.counters['enrich']
+
+        for data in self.__iterate(source, counter):
+            if isinstance(data, Future):
+                start = time.perf_counter()
+                data, seconds = data.result()
+                counter.wait += time.perf_counter() - start
+                self.counters['eventize'].record(len(data), seconds)
+
+            start = time.perf_counter()
+            data = self.pipeline.run_enrich(data, self.executor)
+            counter.record(len(data), time.perf_counter() - start)
+            self.__put(output, data, counter)
+
+        self.__put(output, DONE, counter)
+
+    def __write(self, source):
+        counter = self.counters['write']
+
+        for data in self.__iterate(source, counter):
+            start = time.perf_counter()
+            self.sink.write(data)
+            counter.record(len(data), time.perf_counter() - start)
+
+    def __iterate(self, source, counter):
+        """ Returns the batches of a queue until its end, or until a
+        stage fails """
+
+        while True:
+            start = time.perf_counter()
+            while True:
+                if self.stopped.is_set():
+                    return
+                try:
+                    batch = source.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    continue
+            counter.wait += time.perf_counter() - start
+
+            if batch is DONE:
+                return
+            yield batch
+
+    def __put(self, output, batch, counter):
+        """ Puts a batch in a queue, waiting while it is full """
+
+        start = time.perf_counter()
+        while not self.stopped.is_set():
+            try:
+                output.put(batch, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        counter.wait += time.perf_counter() - start
+
+        if batch is not DONE:
+            counter.depths.append(output.qsize())
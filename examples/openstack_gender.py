@@ -35,6 +35,7 @@ import cereslib.events
 import certifi
 
 from cereslib.enrich import Gender, FileType, EmailFlag, SplitLists, MaxMin, SplitEmail, ToUTF8, Uuid
+from cereslib.enrich import Projects, ProjectsIndex
 
 from cereslib.filter import FilterRows
 
@@ -189,13 +190,36 @@ def openstack_projects():
 
     return df
 
+
+def openstack_projects_index(file_path="openstack_projects.idx"):
+    """ Index of repositories and projects, built from the YAML file
+    only the first time
+    """
+
+    import os
+
+    if os.path.exists(file_path):
+        return ProjectsIndex.load(file_path)
+
+    df = openstack_projects()
+    index = ProjectsIndex(project_column="projects")
+    for project, repo, url in zip(df["projects"], df["repository"], df["urls"]):
+        # Gerrit uses the name of the repository and Git its URL
+        index.add(repo, project)
+        index.add(url, project)
+    index.save(file_path)
+
+    return index
+
+
 def analyze_gerrit(es_read, es_write, es_read_index, es_write_index, key):
 
     # Retrieve projects info
-    projects = openstack_projects()
+    projects = openstack_projects_index()
 
     # Retrieve uuids info
-    uuids = Uuid(pandas.DataFrame(), file_path='openstack_uuids.csv')
+    uuids = Uuid(pandas.DataFrame(), file_path='openstack_uuids.csv',
+                 cache_path='openstack_uuids.feather')
 
     # Retrieve gender cached data
     enriched_gender = Gender(pandas.DataFrame(), key, "gerrit_gender.csv")
@@ -221,7 +245,7 @@ def analyze_gerrit(es_read, es_write, es_read_index, es_write_index, key):
             print (cont)
             print (len(events_df))
             # Adding projects information
-            events_df = pandas.merge(events_df, projects, how='left', on='repository')
+            events_df = Projects(events_df).enrich('repository', projects)
 
             # Adding gender info
             enriched_gender.data = events_df
@@ -271,12 +295,11 @@ def upload_data(events_df, es_write_index, es_write, uniq_id):
 def analyze_git(es_read, es_write, es_read_index, es_write_index, key):
 
     # Retrieve projects information
-    projects = openstack_projects()
-    projects["repository"] = projects["urls"]
-    projects = projects.drop("urls", 1)
+    projects = openstack_projects_index()
 
     # Retrieve uuids info
-    uuids = Uuid(pandas.DataFrame(), file_path='openstack_uuids.csv')
+    uuids = Uuid(pandas.DataFrame(), file_path='openstack_uuids.csv',
+                 cache_path='openstack_uuids.feather')
 
     # Retrieve gender info
     enriched_gender = Gender(pandas.DataFrame(), key, "git_gender.csv")
@@ -332,7 +355,7 @@ def analyze_git(es_read, es_write, es_read_index, es_write_index, key):
 
             print (len(events_df))
             # Add projects information
-            events_df = pandas.merge(events_df, projects, how='left', on='repository')
+            events_df = Projects(events_df).enrich('repository', projects)
             # Fill NaN projects
             events_df.fillna('notavailable', inplace=True)
 
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import (FilePath, FileType, Gender, MaxMin, SplitEmail,
+                                    SplitEmailDomain, ToUTF8)
+from cereslib.pipeline.cache import ResultCache
+from cereslib.pipeline.executor import SharedMemoryExecutor
+from cereslib.pipeline.pipeline import EnrichStage, Pipeline
+
+
+OWNERS = ["John Smith <jsmith@example.com>", "Dan \udcc3 <dan@example.com>",
+          "Eve <eve@example.org>", None]
+FILES = ["src/main.py", "README", "docs//index.md", "lib/a.c"]
+
+
+class CountedFileType(FileType):
+    """ FileType counting the times it runs """
+
+    runs = 0
+
+    def enrich(self, column):
+        CountedFileType.runs += 1
+        return super().enrich(column)
+
+
+@unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+class TestResultCache(unittest.TestCase):
+    """ Unit tests for ResultCache class
+    """
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        self.cache = ResultCache(os.path.join(self.tmp_path, "cache"))
+
+        size = 20
+        self.df = pandas.DataFrame()
+        self.df["owner"] = [OWNERS[i % 4] for i in range(size)]
+        self.df["filepath"] = [FILES[i % 4] for i in range(size)]
+        self.df["addedlines"] = list(range(size))
+        self.df.index = self.df.index + 10
+
+        self.pipeline = Pipeline(cache=self.cache)
+        self.pipeline.enrich(CountedFileType, "filepath")
+        self.pipeline.enrich(FilePath, "filepath")
+        self.pipeline.enrich(ToUTF8, ["owner"])
+        self.pipeline.enrich(SplitEmail, "owner")
+        self.pipeline.enrich(SplitEmailDomain, "email")
+        self.pipeline.enrich(MaxMin, ["addedlines"], "email")
+
+        CountedFileType.runs = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def assertSameFrame(self, result, expected):
+        self.assertListEqual(list(result.columns), list(expected.columns))
+        self.assertListEqual(list(result.index), list(expected.index))
+        for column in expected.columns:
+            self.assertListEqual(list(result[column]), list(expected[column]))
+
+    def test_cached_results(self):
+        """ Test results are taken from the cache the second time
+        """
+
+        expected = Pipeline()
+        for stage in self.pipeline.stages:
+            expected.stages.append(EnrichStage(stage.enricher, *stage.args, **stage.kwargs))
+        expected = expected.run(self.df.copy())
+        CountedFileType.runs = 0
+
+        first = self.pipeline.run(self.df.copy())
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 6)
+
+        second = self.pipeline.run(self.df.copy())
+        self.assertEqual(self.cache.hits, 6)
+        self.assertEqual(CountedFileType.runs, 1)
+
+        self.assertSameFrame(first, expected)
+        self.assertSameFrame(second, expected)
+        self.assertListEqual(second.loc[12, "file_path_list"], ["docs", "index.md"])
+        self.assertEqual(second.loc[11, "owner"], "Dan ? <dan@example.com>")
+
+    def test_changed_data(self):
+        """ Test only enrichers reading changed columns run again
+        """
+
+        self.pipeline.run(self.df.copy())
+
+        self.df.loc[14, "owner"] = "Alice <alice@example.com>"
+        events_df = self.pipeline.run(self.df.copy())
+
+        self.assertEqual(CountedFileType.runs, 1)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(events_df.loc[14, "email"], "alice@example.com")
+        self.assertEqual(events_df.loc[14, "max_addedlines"], 4)
+        self.assertEqual(events_df.loc[10, "max_addedlines"], 16)
+
+    def test_changed_types(self):
+        """ Test values with the same string form but other types have other keys
+        """
+
+        stage = EnrichStage(FileType, "filepath")
+        keys = set()
+        for values in [[1, 2], ["1", "2"], [1, "2"], [[1], [2]], [["1"], ["2"]], [("1",), ("2",)],
+                       pandas.Categorical([1, 2]), pandas.Categorical(["1", "2"])]:
+            keys.add(self.cache.key(stage, pandas.DataFrame({"filepath": values})))
+
+        self.assertEqual(len(keys), 8)
+
+    def test_changed_arguments(self):
+        """ Test enrichers with other arguments are not found in the cache
+        """
+
+        stage = EnrichStage(SplitEmail, "owner")
+        other = EnrichStage(SplitEmail, "owner", fast=False)
+
+        self.assertEqual(self.cache.key(stage, self.df), self.cache.key(EnrichStage(SplitEmail, "owner"), self.df))
+        self.assertNotEqual(self.cache.key(stage, self.df), self.cache.key(other, self.df))
+        self.assertIsNone(self.cache.key(EnrichStage(Gender, "author"), self.df))
+
+    def test_executor(self):
+        """ Test the cache runs missing enrichers with the executor
+        """
+
+        expected = self.pipeline.run(self.df.copy())
+
+        self.cache.clear()
+        self.assertListEqual(os.listdir(self.cache.path), [])
+
+        with SharedMemoryExecutor(workers=2, min_rows=0) as executor:
+            events_df = self.pipeline.run(self.df.copy(), executor)
+            cached_df = self.pipeline.run(self.df.copy(), executor)
+
+        self.assertSameFrame(events_df, expected)
+        self.assertSameFrame(cached_df, expected)
+        self.assertEqual(self.cache.hits, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,20 +21,56 @@
 #
 
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 import pandas
 
+from grimoirelab_toolkit.datetime import str_to_datetime
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
 if '..' not in sys.path:
     sys.path.insert(0, '..')
 
-from cereslib.enrich.enrich import PairProgramming, TimeDifference, Uuid, FilePath
-from cereslib.enrich.enrich import Onion
+from cereslib.enrich.enrich import PairProgramming, TimeDifference, TimeDelta, Uuid, FilePath
+from cereslib.enrich.enrich import Onion, SplitLists, CoAuthors, MaxMin, GroupStats, WindowedOnion
+from cereslib.enrich.enrich import Gender, Projects, ProjectsIndex, ToUTF8
+from cereslib.enrich.enrich import SplitEmail, SplitEmailDomain
 
 from cereslib.dfutils.format import Format
 
 
+class MockedGenderize:
+    """ Genderize client returning fixed results """
+
+    GENDERS = {
+        "alice": ("female", 0.98, 1000),
+        "bob": ("male", 0.99, 2000),
+        "kim": (None, 0.0, 0),
+    }
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, names):
+        self.requests.append(names)
+        results = []
+        for name in names:
+            if name == "broken":
+                raise ValueError("Name not supported")
+            gender, probability, count = self.GENDERS.get(name, ("male", 0.5, 1))
+            results.append({"name": name, "gender": gender,
+                            "probability": probability, "count": count})
+        return results
+
+
 class TestEnrich(unittest.TestCase):
     """ Unit tests for Enrich classes
     """
@@ -72,6 +108,41 @@ class TestEnrich(unittest.TestCase):
         # Expected to add a new entry at the end of the dataframe
         self.assertEqual(len(enriched_df), 8)
 
+    def test_CoAuthors(self):
+        """ Test several cases for the CoAuthors class
+        """
+
+        df = pandas.DataFrame()
+        df["author"] = ["alice", "bob", "carl", "dave"]
+        df["committer"] = ["alice", "alice", "carl", "dave"]
+        df["message"] = ["Fix\n\nCo-authored-by: bob\nCo-authored-by: carl",
+                         "Fix\n\nco-authored-by: alice",
+                         "Fix",
+                         "Fix\n\nCo-authored-by: dave\nCo-authored-by: erin"]
+
+        enriched_df = CoAuthors(df).enrich("author", "committer", "message")
+
+        self.assertEqual(len(enriched_df), 8)
+        self.assertListEqual(list(enriched_df.index), [0, 0, 0, 1, 1, 2, 3, 3])
+        self.assertListEqual(list(enriched_df["contributor"]),
+                             ["alice", "bob", "carl", "bob", "alice", "carl", "dave", "erin"])
+        self.assertAlmostEqual(enriched_df.loc[0, "contributor_weight"].sum(), 1.0)
+        self.assertListEqual(list(enriched_df.loc[1, "contributor_weight"]), [0.5, 0.5])
+        self.assertEqual(enriched_df.loc[2, "contributor_weight"], 1.0)
+
+        # Only authors and committers
+        enriched_df = CoAuthors(df).enrich("author", "committer")
+        self.assertListEqual(list(enriched_df["contributor"]), ["alice", "bob", "alice", "carl", "dave"])
+
+        # Columns not found
+        enriched_df = CoAuthors(df).enrich("author", "fake_column")
+        self.assertEqual(len(enriched_df), 4)
+        self.assertNotIn("contributor", enriched_df.columns)
+
+        # Empty dataframe
+        empty_df = pandas.DataFrame(columns=["author", "committer", "message"])
+        self.assertTrue(CoAuthors(empty_df).enrich("author", "committer", "message").empty)
+
     def test_TimeDifference(self):
         """ Several test cases for the TimeDifference class
         """
@@ -98,6 +169,48 @@ class TestEnrich(unittest.TestCase):
 
         self.assertEqual(len(enriched_df[enriched_df["timedifference"] > 0]), 4)
 
+    def test_TimeDelta(self):
+        """ Test several pairs of dates, units and business hours
+        """
+
+        events_df = pandas.DataFrame()
+        events_df["date"] = pandas.to_datetime(["2019-01-04 16:00:00", "2019-01-07 10:00:00.000000001",
+                                                "2019-01-05 10:00", None, "2019-01-07 20:00"])
+        events_df["closing_date"] = pandas.to_datetime(["2019-01-07 10:00", "2019-01-07 12:30",
+                                                        "2019-01-06 10:00", "2019-01-01", "2019-01-07 10:00"])
+        events_df["tz"] = [0, 0, 0, 0, -2]
+
+        # Fake columns return the same dataframe
+        enriched_df = TimeDelta(events_df).enrich([("date", "fake_column")])
+        self.assertListEqual(list(enriched_df.columns), ["date", "closing_date", "tz"])
+
+        enriched_df = TimeDelta(events_df).enrich([("date", "closing_date"), ("closing_date", "date")],
+                                                  unit='ns')
+        self.assertEqual(str(enriched_df["timedelta_date_closing_date"].dtype), "Int64")
+        self.assertEqual(enriched_df["timedelta_date_closing_date"][1], 9000 * 10 ** 9 - 1)
+        self.assertEqual(enriched_df["timedelta_closing_date_date"][1], -9000 * 10 ** 9 + 1)
+        self.assertTrue(pandas.isna(enriched_df["timedelta_date_closing_date"][3]))
+
+        enriched_df = TimeDelta(events_df).enrich([("date", "closing_date")], ["review_time"], 'm',
+                                                  business_hours=(9, 17), tz_column="tz")
+        # Friday from 16:00 to Monday at 10:00, the same day, a weekend,
+        # and from 18:00 to 8:00 in local time
+        self.assertListEqual(list(enriched_df["review_time"].fillna(-1)), [120, 149, 0, -1, -480])
+
+        enriched_df = TimeDelta(events_df).enrich([("date", "closing_date")], ["review_time"], 'h',
+                                                  business_hours=(9, 17), holidays=["2019-01-04"])
+        self.assertEqual(enriched_df["review_time"][0], 1)
+
+        # Dates with different timezones
+        events_df = pandas.DataFrame()
+        events_df["date"] = [pandas.Timestamp("2019-01-07 10:00+02:00"), pandas.Timestamp("2019-01-07 10:00-05:00")]
+        events_df["closing_date"] = pandas.Timestamp("2019-01-07 12:00+00:00")
+        enriched_df = TimeDelta(events_df).enrich([("date", "closing_date")], unit='h')
+        self.assertListEqual(list(enriched_df["timedelta_date_closing_date"]), [4, -3])
+
+        with self.assertRaises(ValueError):
+            TimeDelta(events_df).enrich([("date", "closing_date")], unit='days')
+
     def test_FilePath(self):
         """ Test FilePath enricher"""
 
@@ -222,6 +335,393 @@ class TestEnrich(unittest.TestCase):
         self.assertEqual(john_df.iloc[[1]]['uuid'].item(), john_uuid)
         self.assertEqual(john_df.iloc[[2]]['uuid'].item(), john_uuid)
 
+    def test_SplitLists(self):
+        """ Test several cases for the SplitLists class
+        """
+
+        df = pandas.DataFrame()
+        df["id"] = [1, 2, 3]
+        df["orgs"] = [["Bitergia", "Unknown"], [], ["URJC"]]
+        df["roles"] = [["author", "reviewer"], [], ["author"]]
+
+        enriched_df = SplitLists(df.copy()).enrich(["orgs", "roles"])
+
+        # Original rows are kept and a new row is appended per list element
+        self.assertEqual(len(enriched_df), 6)
+        self.assertListEqual(list(enriched_df.index), list(range(6)))
+        self.assertListEqual(list(enriched_df["id"]), [1, 2, 3, 1, 1, 3])
+        self.assertListEqual(list(enriched_df["orgs"][3:]), ["Bitergia", "Unknown", "URJC"])
+        self.assertListEqual(list(enriched_df["roles"][3:]), ["author", "reviewer", "author"])
+        self.assertListEqual(enriched_df["orgs"][0], ["Bitergia", "Unknown"])
+
+        # Columns not found
+        enriched_df = SplitLists(df.copy()).enrich(["orgs", "fake_column"])
+        self.assertEqual(len(enriched_df), 3)
+
+        # Lists with different lengths
+        df["roles"] = [["author"], [], ["author"]]
+        with self.assertRaises(ValueError):
+            SplitLists(df).enrich(["orgs", "roles"])
+
+        # Empty dataframe
+        df = pandas.DataFrame(columns=["orgs"])
+        self.assertTrue(SplitLists(df).enrich(["orgs"]).empty)
+
+    def test_MaxMin(self):
+        """ Test several cases for the MaxMin class
+        """
+
+        csv_df = pandas.read_csv(os.path.join(self.__enrich_dir,
+                                              "timedifference.csv"))
+        enriched_df = MaxMin(csv_df).enrich(["commit_id", "date_author"], "author")
+
+        self.assertEqual(len(enriched_df), 7)
+        self.assertListEqual(list(enriched_df.columns)[-4:],
+                             ["max_commit_id", "min_commit_id", "max_date_author", "min_date_author"])
+        alice_df = enriched_df[enriched_df["author"] == "alice"]
+        self.assertListEqual(list(alice_df["max_commit_id"]), [6, 6, 6])
+        self.assertListEqual(list(alice_df["min_commit_id"]), [1, 1, 1])
+        carl_df = enriched_df[enriched_df["author"] == "carl"]
+        self.assertListEqual(list(carl_df["min_date_author"]), ["2014-01-01", "2014-01-01"])
+        self.assertListEqual(list(carl_df["max_date_author"]), ["2016-04-07", "2016-04-07"])
+
+        # Rows with no author belong to no group
+        df = pandas.DataFrame()
+        df["author"] = ["alice", None, "alice", None]
+        df["events"] = [1, 2, 3, 4]
+        enriched_df = MaxMin(df).enrich(["events"], "author")
+        self.assertListEqual(list(enriched_df["max_events"].fillna(-1)), [3, -1, 3, -1])
+        self.assertListEqual(list(enriched_df["min_events"].fillna(-1)), [1, -1, 1, -1])
+
+        # Columns not found
+        enriched_df = MaxMin(csv_df).enrich(["fake_column"], "author")
+        self.assertNotIn("max_fake_column", enriched_df.columns)
+
+    def test_GroupStats(self):
+        """ Test several cases for the GroupStats class
+        """
+
+        csv_df = pandas.read_csv(os.path.join(self.__enrich_dir,
+                                              "timedifference.csv"))
+        stats = GroupStats(csv_df)
+        enriched_df = stats.enrich(["commit_id"], ["author", "committer"],
+                                   ["count", "sum", "first", "last", "nunique"])
+
+        self.assertEqual(len(enriched_df), 7)
+        self.assertListEqual(list(enriched_df["count_commit_id"]), [2, 1, 2, 2, 2, 2, 2])
+        self.assertListEqual(list(enriched_df["sum_commit_id"]), [7, 2, 7, 7, 12, 7, 12])
+        self.assertListEqual(list(enriched_df["first_commit_id"]), [1, 2, 3, 3, 5, 1, 5])
+        self.assertListEqual(list(enriched_df["last_commit_id"]), [6, 2, 4, 4, 7, 6, 7])
+        self.assertListEqual(list(enriched_df["nunique_commit_id"]), [2, 1, 2, 2, 2, 2, 2])
+
+        # Null values are a group on their own
+        df = pandas.DataFrame()
+        df["author"] = ["alice", None, "alice", None]
+        df["events"] = [1, 2, 3, 4]
+        enriched_df = GroupStats(df).enrich(["events"], "author", ["max"])
+        self.assertListEqual(list(enriched_df["max_events"]), [3, 4, 3, 4])
+
+        # unless they are dropped
+        enriched_df = GroupStats(df).enrich(["events"], "author", ["count"], dropna=True)
+        self.assertListEqual(list(enriched_df["count_events"].fillna(-1)), [2, -1, 2, -1])
+
+        # Aggregations not supported
+        with self.assertRaisesRegex(ValueError, "Aggregation median not in supported aggregations"):
+            GroupStats(df).enrich(["events"], "author", ["median"])
+
+    def test_Gender(self):
+        """ Test several cases for the Gender class
+        """
+
+        df = pandas.DataFrame()
+        df["owner"] = ["alice Smith", "bob", "alice", "kim Lee", "broken name", None]
+
+        connection = MockedGenderize()
+        gender = Gender(df, connection=connection)
+        enriched_df = gender.enrich("owner")
+
+        self.assertListEqual(list(enriched_df["gender_analyzed_name"]),
+                             ["alice", "bob", "alice", "kim", "broken", "noname"])
+        self.assertListEqual(list(enriched_df["gender"]),
+                             ["female", "male", "female", "NotKnown", "Unknown", "male"])
+        self.assertListEqual(list(enriched_df["gender_probability"]), [0.98, 0.99, 0.98, 0.0, 0, 0.5])
+        self.assertListEqual(list(enriched_df["gender_count"]), [1000, 2000, 1000, 0, 0, 1])
+
+        # The batch with the broken name is retried name by name
+        self.assertEqual(connection.requests[0], ["alice", "bob", "kim", "broken", "noname"])
+        self.assertEqual(len(connection.requests), 6)
+
+        # Names already analyzed are not requested again
+        gender.data = pandas.DataFrame({"owner": ["bob", "alice"]})
+        gender.enrich("owner")
+        self.assertEqual(len(connection.requests), 6)
+
+        # Columns not found
+        df = pandas.DataFrame({"owner": ["alice"]})
+        enriched_df = Gender(df, connection=connection).enrich("fake_column")
+        self.assertNotIn("gender", enriched_df.columns)
+
+    def test_Gender_batches(self):
+        """ Test names are sent to the API in batches
+        """
+
+        df = pandas.DataFrame()
+        df["owner"] = ["name%s Surname" % i for i in range(25)] * 2
+
+        connection = MockedGenderize()
+        enriched_df = Gender(df, connection=connection).enrich("owner")
+
+        self.assertEqual(len(enriched_df), 50)
+        self.assertListEqual([len(request) for request in connection.requests], [10, 10, 5])
+
+    def test_Gender_cache(self):
+        """ Test results are stored and read from the cache file
+        """
+
+        tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        cache_file = os.path.join(tmp_path, "gender.db")
+
+        try:
+            df = pandas.DataFrame({"owner": ["alice", "bob", "kim"]})
+            connection = MockedGenderize()
+            gender = Gender(df, cache_file=cache_file, connection=connection)
+            gender.enrich("owner")
+            gender.cache.close()
+            self.assertEqual(len(connection.requests), 1)
+
+            # A new instance reads the results from the cache file
+            df = pandas.DataFrame({"owner": ["kim", "alice", "carl"]})
+            connection = MockedGenderize()
+            gender = Gender(df, cache_file=cache_file, connection=connection)
+            enriched_df = gender.enrich("owner")
+            gender.cache.close()
+
+            self.assertListEqual(connection.requests, [["carl"]])
+            self.assertListEqual(list(enriched_df["gender"]), ["NotKnown", "female", "male"])
+            self.assertListEqual(list(enriched_df["gender_probability"]), [0.0, 0.98, 0.5])
+            self.assertListEqual(list(enriched_df["gender_count"]), [0, 1000, 1])
+        finally:
+            shutil.rmtree(tmp_path)
+
+    def test_Uuid_columns(self):
+        """ Test only new columns are filled in when no identity is found
+        """
+
+        authors_df = pandas.read_csv(os.path.join(self.__enrich_dir,
+                                                  "authors.csv"))
+        authors_df["extra"] = None
+        authors_df.loc[10] = ["Unknown author", "unknown@example.com", 10, None]
+
+        uuid = Uuid(authors_df,
+                    file_path=os.path.join(self.__enrich_dir, "uuids.csv"),
+                    drop_columns=["username"])
+        enriched_df = uuid.enrich(['name', 'email'])
+
+        self.assertNotIn("username", enriched_df.columns)
+        self.assertEqual(enriched_df.loc[10, "uuid"], "notavailable")
+        self.assertEqual(enriched_df.loc[1, "uuid"], "0007b2fd4dbb5090a848c50717966a15a1772112")
+        # Columns not added by the enricher keep their null values
+        self.assertTrue(enriched_df["extra"].isnull().all())
+
+        # Identities are matched again for new data
+        uuid.data = pandas.DataFrame({"name": ["Kate Yonder"], "email": ["Kate.Yonder@redhead.com"]})
+        enriched_df = uuid.enrich(['name', 'email'])
+        self.assertEqual(enriched_df.loc[0, "uuid"], "001772d73daca793ed6f17376d5e43041b92857f")
+
+    def test_Uuid_types(self):
+        """ Test identities are matched by the value of their keys, as in pandas.merge
+        """
+
+        tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        file_path = os.path.join(tmp_path, "uuids.csv")
+        pandas.DataFrame({"id": [10, 11], "uuid": ["u10", "u11"]}).to_csv(file_path, index=False)
+
+        uuid = Uuid(pandas.DataFrame({"id": [10.0, 11.5, None]}), file_path=file_path)
+        enriched_df = uuid.enrich(["id"])
+        self.assertListEqual(list(enriched_df["uuid"]), ["u10", "notavailable", "notavailable"])
+
+        uuid.data = pandas.DataFrame({"id": ["10", 11]})
+        enriched_df = uuid.enrich(["id"])
+        self.assertListEqual(list(enriched_df["uuid"]), ["notavailable", "u11"])
+
+        shutil.rmtree(tmp_path)
+
+    @unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+    def test_Uuid_cache(self):
+        """ Test identities are stored and read from the binary cache
+        """
+
+        tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        file_path = os.path.join(tmp_path, "uuids.csv")
+        cache_path = os.path.join(tmp_path, "uuids.feather")
+        shutil.copy(os.path.join(self.__enrich_dir, "uuids.csv"), file_path)
+
+        try:
+            authors_df = pandas.read_csv(os.path.join(self.__enrich_dir,
+                                                      "authors.csv"))
+            uuid = Uuid(authors_df.copy(), file_path=file_path, cache_path=cache_path)
+            expected_df = uuid.enrich(['name', 'email'])
+            self.assertTrue(os.path.exists(cache_path))
+
+            # The cache is used while it is newer than the CSV file
+            with open(file_path, 'w') as fd:
+                fd.write("name,email,username,uuid\n")
+            os.utime(file_path, (0, 0))
+
+            uuid = Uuid(authors_df.copy(), file_path=file_path, cache_path=cache_path)
+            enriched_df = uuid.enrich(['name', 'email'])
+
+            self.assertListEqual(list(enriched_df["uuid"]), list(expected_df["uuid"]))
+            self.assertListEqual(list(enriched_df["username"]), list(expected_df["username"]))
+
+            # The cache is updated when the CSV file changes
+            os.utime(file_path)
+            uuid = Uuid(authors_df.copy(), file_path=file_path, cache_path=cache_path)
+            self.assertTrue(uuid.uuids_df.empty)
+        finally:
+            shutil.rmtree(tmp_path)
+
+    def test_Projects(self):
+        """ Test several cases for the Projects class
+        """
+
+        projects_df = pandas.DataFrame()
+        projects_df["repository"] = ["https://github.com/chaoss/grimoirelab-perceval.git",
+                                     "https://github.com/chaoss/*",
+                                     "openstack/*",
+                                     "git.openstack.org/openstack/nova",
+                                     "https://github.com/chaoss/grimoirelab-elk"]
+        projects_df["project"] = ["perceval", "chaoss", "openstack", "nova", "elk"]
+
+        df = pandas.DataFrame()
+        df["repository"] = ["https://github.com/chaoss/grimoirelab-perceval.git",
+                            "git@github.com:chaoss/grimoirelab-perceval.git",
+                            "https://github.com/chaoss/grimoirelab-cereslib",
+                            "git://git.openstack.org/openstack/nova",
+                            "git://git.openstack.org/openstack/neutron",
+                            "https://github.com/chaoss/grimoirelab-elk/",
+                            "https://gitlab.com/chaoss/grimoirelab",
+                            None]
+
+        index = ProjectsIndex.from_dataframe(projects_df, "repository", "project")
+        enriched_df = Projects(df.copy()).enrich("repository", index)
+
+        self.assertListEqual(list(enriched_df["project"]),
+                             ["perceval", "perceval", "chaoss", "nova", "openstack",
+                              "elk", None, None])
+
+        # Dataframes are merged on the column
+        enriched_df = Projects(df.copy()).enrich("repository", projects_df)
+        self.assertEqual(enriched_df["project"][0], "perceval")
+        self.assertTrue(pandas.isnull(enriched_df["project"][1]))
+
+        # Column not found
+        enriched_df = Projects(df.copy()).enrich("fake_column", index)
+        self.assertNotIn("project", enriched_df.columns)
+
+    def test_ProjectsIndex_save(self):
+        """ Test indexes are stored and loaded from disk
+        """
+
+        index = ProjectsIndex(project_column="projects")
+        index.add("https://github.com/chaoss/*", "chaoss")
+        index.add("https://github.com/chaoss/grimoirelab-sigils", "sigils")
+
+        tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        try:
+            file_path = os.path.join(tmp_path, "projects.idx")
+            index.save(file_path)
+            index = ProjectsIndex.load(file_path)
+        finally:
+            shutil.rmtree(tmp_path)
+
+        self.assertEqual(index.project_column, "projects")
+        self.assertEqual(index.lookup("https://github.com/chaoss/grimoirelab-sigils.git"), "sigils")
+        self.assertEqual(index.lookup("https://github.com/chaoss/grimoirelab-toolkit"), "chaoss")
+        self.assertIsNone(index.lookup("https://github.com/bitergia/mordred"))
+
+        # Empty segments are not taken for the projects of the prefixes
+        self.assertEqual(index.lookup("https://github.com/chaoss//grimoirelab"), "chaoss")
+        self.assertIsNone(index.lookup("https://github.com//chaoss"))
+
+    def test_ToUTF8(self):
+        """ Test several cases for the ToUTF8 class
+        """
+
+        df = pandas.DataFrame()
+        df["owner"] = ["John Smith", "Jane \udcc3 Doe", "Mar\ud800\udfffía"]
+        df["clean"] = ["John Smith", "Jane Doe", "María"]
+        df["mixed"] = pandas.Series(["Jane \udcc3 Doe", None, ["Jane \udcc3 Doe"]], dtype=object)
+
+        enriched_df = ToUTF8(df).enrich(["owner", "clean", "mixed"])
+
+        self.assertListEqual(list(enriched_df["owner"]), ["John Smith", "Jane ? Doe", "Mar??ía"])
+        self.assertListEqual(list(enriched_df["clean"]), ["John Smith", "Jane Doe", "María"])
+        self.assertListEqual(list(enriched_df["mixed"]), ["Jane ? Doe", "", "Jane ? Doe"])
+
+        # Single element lists with no surrogates and other types
+        df = pandas.DataFrame()
+        df["mixed"] = pandas.Series([["Jane Doe"], ["John", "Jane"], 1, "John"], dtype=object)
+        enriched_df = ToUTF8(df).enrich(["mixed"])
+        self.assertListEqual(list(enriched_df["mixed"]), ["", "", "", "John"])
+
+        # Columns not found
+        enriched_df = ToUTF8(df).enrich(["mixed", "fake_column"])
+        self.assertListEqual(list(enriched_df.columns), ["mixed"])
+
+    def test_SplitEmail(self):
+        """ Test several cases for the SplitEmail class
+        """
+
+        df = pandas.DataFrame()
+        df["owner"] = ["John Smith <jsmith@example.com>",
+                       "Jane  Doe <jane.doe+git@example.com>",
+                       "Doe, Jane <jdoe@example.com>",
+                       "jsmith@example.com",
+                       "John Smith <jsmith@example.com>",
+                       "José Núñez <jose@example.es>",
+                       None]
+
+        for fast in [True, False]:
+            enriched_df = SplitEmail(df.copy()).enrich("owner", fast=fast)
+
+            self.assertListEqual(list(enriched_df["user"]),
+                                 ["John Smith", "Jane Doe", "", "", "John Smith", "José Núñez", ""])
+            self.assertListEqual(list(enriched_df["email"]),
+                                 ["jsmith@example.com", "jane.doe+git@example.com", "Doe",
+                                  "jsmith@example.com", "jsmith@example.com", "jose@example.es", ""])
+
+        # Lists can't be factorized, so they are parsed row by row
+        df = pandas.DataFrame()
+        df["owner"] = ["John Smith <jsmith@example.com>", ["Jane Doe <jdoe@example.com>"], None]
+        enriched_df = SplitEmail(df).enrich("owner")
+        self.assertListEqual(list(enriched_df["user"]), ["John Smith", "", ""])
+        self.assertListEqual(list(enriched_df["email"]),
+                             ["jsmith@example.com", "Jane Doe <jdoe@example.com>", ""])
+
+        # Empty dataframe
+        empty_df = pandas.DataFrame(columns=["owner"])
+        enriched_df = SplitEmail(empty_df).enrich("owner")
+        self.assertTrue(enriched_df.empty)
+        self.assertIn("email", enriched_df.columns)
+
+    def test_SplitEmailDomain(self):
+        """ Test several cases for the SplitEmailDomain class
+        """
+
+        df = pandas.DataFrame()
+        df["email"] = ["jsmith@example.com", "jdoe@example.org", "unknown", None, "jsmith@example.com"]
+
+        enriched_df = SplitEmailDomain(df).enrich("email")
+
+        self.assertListEqual(list(enriched_df["domain"]),
+                             ["example.com", "example.org", "unknown", "unknown", "example.com"])
+
+        df["email"] = ["jsmith@example.com", ["jdoe@example.org"], None, "unknown", "jsmith@example.com"]
+        enriched_df = SplitEmailDomain(df).enrich("email")
+        self.assertListEqual(list(enriched_df["domain"]),
+                             ["example.com", "unknown", "unknown", "unknown", "example.com"])
+
     def test_Onion(self):
         """Test several cases for the Onion analysis
         """
@@ -238,6 +738,62 @@ class TestEnrich(unittest.TestCase):
         self.assertTrue(len(enriched_df[enriched_df["onion_role"] == "regular"]), 3)
         self.assertTrue(len(enriched_df[enriched_df["onion_role"] == "casual"]), 4)
 
+    def test_WindowedOnion(self):
+        """Test the onion model of each project and quarter is the same
+        as the one of Onion over each of them
+        """
+
+        size = 120
+        events_df = pandas.DataFrame()
+        events_df["project"] = [["grimoirelab", "perceval", None][i % 3] for i in range(size)]
+        events_df["author"] = ["author%s" % (i % 7) for i in range(size)]
+        events_df["events"] = [2 ** (i % 7) for i in range(size)]
+        events_df["date"] = pandas.date_range("2019-01-01", periods=size, freq="5D")
+
+        enriched_df = WindowedOnion(events_df).enrich("author", "events", "project", "date", "Q")
+
+        self.assertListEqual(list(enriched_df.columns),
+                             ["project", "window", "author", "events",
+                              "cum_net_sum", "percent_cum_net_sum", "onion_role"])
+
+        events_df["window"] = events_df["date"].dt.to_period("Q")
+        slices = []
+        for _, slice_df in events_df.groupby(["project", "window"], dropna=False):
+            totals = slice_df.groupby("author")["events"].sum().reset_index()
+            slices.append(Onion(totals).enrich("author", "events"))
+        expected = pandas.concat(slices, ignore_index=True)
+
+        self.assertEqual(len(enriched_df), len(expected))
+        for column in ["author", "events", "cum_net_sum", "percent_cum_net_sum", "onion_role"]:
+            self.assertListEqual(list(enriched_df[column]), list(expected[column]))
+
+        enriched_df = WindowedOnion(events_df).enrich("author", "events")
+        expected = Onion(events_df.groupby("author")["events"].sum().reset_index()).enrich("author", "events")
+        self.assertListEqual(list(enriched_df["onion_role"]), list(expected["onion_role"]))
+
+        with self.assertRaises(ValueError):
+            WindowedOnion(events_df).enrich("author", "events", "project", "date")
+
+    def test_WindowedOnion_offsets(self):
+        """Test dates with different offsets, as the ones of the eventizers,
+        are windowed in UTC
+        """
+
+        events_df = pandas.DataFrame()
+        events_df["author"] = ["alice", "bob", "alice", "bob"]
+        events_df["events"] = [1, 2, 3, 5]
+        events_df["date"] = [str_to_datetime(date) for date in
+                             ["Sun Mar 31 23:30:00 2019 -0200", "Sun Mar 31 10:00:00 2019 +0200",
+                              "Mon Apr 1 10:00:00 2019 +0200", "Tue Apr 2 10:00:00 2019 -0500"]]
+        self.assertEqual(events_df["date"].dtype, object)
+
+        enriched_df = WindowedOnion(events_df).enrich("author", "events", date_column="date", window="Q")
+
+        self.assertListEqual([str(window) for window in enriched_df["window"]],
+                             ["2019Q1", "2019Q2", "2019Q2"])
+        self.assertListEqual(list(enriched_df["author"]), ["bob", "bob", "alice"])
+        self.assertListEqual(list(enriched_df["events"]), [2, 5, 4])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import sys
+import unittest
+
+import pandas
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import (EmailFlag, FilePath, FileType, MaxMin, Onion,
+                                    SplitEmail, TimeDifference, ToUTF8)
+from cereslib.pipeline.executor import SharedMemoryExecutor, from_arrow, to_arrow
+from cereslib.pipeline.pipeline import Pipeline
+
+
+OWNERS = ["John Smith <jsmith@example.com>", "Dan \udcc3 <dan@example.com>",
+          "Eve <eve@example.com>", None]
+BODIES = ["Fix\n\nSigned-off-by: John Smith <jsmith@example.com>", "", "Nothing", "Cc: Eve"]
+FILES = ["src/main.py", "README", "docs//index.md", "lib/a.c"]
+
+
+def shared_memory_blocks():
+    """ Names of the blocks of shared memory, when they can be listed """
+
+    if not os.path.isdir('/dev/shm'):
+        return set()
+    return set(os.listdir('/dev/shm'))
+
+
+@unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+class TestSharedMemoryExecutor(unittest.TestCase):
+    """ Unit tests for SharedMemoryExecutor class
+    """
+
+    def setUp(self):
+        size = 40
+        self.df = pandas.DataFrame()
+        self.df["owner"] = [OWNERS[i % 4] for i in range(size)]
+        self.df["body"] = [BODIES[i % 4] for i in range(size)]
+        self.df["filepath"] = [FILES[i % 4] for i in range(size)]
+        self.df["date"] = pandas.date_range("2019-01-01", periods=size, freq="H")
+        self.df["committer_date"] = self.df["date"] + pandas.Timedelta(minutes=5)
+        self.df["addedlines"] = list(range(size))
+        self.df.index = self.df.index + 10
+
+    def test_arrow_conversion(self):
+        """ Test values Arrow can't store are restored
+        """
+
+        df = pandas.DataFrame()
+        df["owner"] = OWNERS
+        df["flags"] = [["Cc"], "", ["From", "Cc"], ""]
+        df["file_path_list"] = [["src", "main.py"], ["README"], [], None]
+        df["count"] = [1, 2, 3, 4]
+
+        converted = from_arrow(to_arrow(df))
+
+        self.assertListEqual(list(converted.columns), list(df.columns))
+        for column in df.columns:
+            self.assertListEqual(list(converted[column]), list(df[column]))
+
+    def test_same_result_as_pipeline(self):
+        """ Test the executor returns the same events as the pipeline
+        """
+
+        pipeline = Pipeline()
+        pipeline.enrich(FileType, "filepath")
+        pipeline.enrich(FilePath, "filepath")
+        pipeline.enrich(ToUTF8, ["owner"])
+        pipeline.enrich(SplitEmail, "owner")
+        pipeline.enrich(EmailFlag, "body")
+        pipeline.enrich(TimeDifference, "date", "committer_date")
+        pipeline.enrich(MaxMin, ["addedlines"], "email")
+
+        expected = pipeline.run(self.df.copy())
+
+        blocks = shared_memory_blocks()
+        with SharedMemoryExecutor(workers=2, shardsize=7, min_rows=0) as executor:
+            events_df = pipeline.run(self.df.copy(), executor)
+        self.assertSetEqual(shared_memory_blocks(), blocks)
+
+        self.assertListEqual(list(events_df.columns), list(expected.columns))
+        self.assertListEqual(list(events_df.index), list(expected.index))
+        for column in expected.columns:
+            self.assertListEqual(list(events_df[column]), list(expected[column]))
+        self.assertEqual(events_df.loc[11, "owner"], "Dan ? <dan@example.com>")
+        self.assertListEqual(events_df.loc[10, "file_path_list"], ["src", "main.py"])
+        self.assertListEqual(events_df.loc[10, "flags"], ["Signed-off-by"])
+        self.assertEqual(events_df.loc[10, "max_addedlines"], 36)
+
+    def test_group_wise_enricher(self):
+        """ Test enrichers changing the rows run after the shards are combined
+        """
+
+        pipeline = Pipeline()
+        pipeline.enrich(SplitEmail, "owner")
+        pipeline.enrich(Onion, "email", "addedlines")
+
+        expected = pipeline.run(self.df.copy())
+        with SharedMemoryExecutor(workers=2, min_rows=0) as executor:
+            events_df = pipeline.run(self.df.copy(), executor)
+
+        for column in expected.columns:
+            self.assertListEqual(list(events_df[column]), list(expected[column]))
+
+    def test_small_dataframe(self):
+        """ Test small dataframes are enriched in this process
+        """
+
+        pipeline = Pipeline().enrich(FileType, "filepath")
+
+        executor = SharedMemoryExecutor(workers=2)
+        events_df = pipeline.run(self.df.copy(), executor)
+
+        self.assertIsNone(executor.pool)
+        self.assertEqual(events_df.loc[10, "filetype"], "Code")
+
+
+if __name__ == '__main__':
+    unittest.main()
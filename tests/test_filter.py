@@ -65,6 +65,52 @@ class TestFilter(unittest.TestCase):
 
         self.assertEqual(len(df), 1)
 
+    def test_filter_predicates(self):
+        """ Test several cases for filtering rows with predicates
+        """
+
+        df = pandas.DataFrame()
+        df["filepath"] = ["-", "/a", "/b", "/c", "/d"]
+        df["addedlines"] = [0, 10, 5, 0, 100]
+        df["fileaction"] = ["-", "FILE_A", "FILE_M", "FILE_D", "FILE_M"]
+        df["empty"] = None
+
+        data_filtered = FilterRows(df)
+        filtered_df = data_filtered.filter_predicates([("filepath", "!=", "-"),
+                                                       ("addedlines", ">=", 5),
+                                                       ("fileaction", "in", ["FILE_A", "FILE_M"]),
+                                                       ("empty", "==", "-")])
+
+        self.assertListEqual(list(filtered_df["filepath"]), ["/a", "/b", "/d"])
+        self.assertListEqual(list(filtered_df.index), [1, 2, 4])
+
+        filtered_df = FilterRows(df).filter_predicates([("fileaction", "not in", ["-", "FILE_D"]),
+                                                        ("addedlines", "<", 50)])
+        self.assertListEqual(list(filtered_df["filepath"]), ["/a", "/b"])
+
+        # No rows are filtered
+        filtered_df = FilterRows(df).filter_predicates([("addedlines", ">=", 0)])
+        self.assertEqual(len(filtered_df), 5)
+
+        with self.assertRaisesRegex(ValueError, "Operator ~ not in supported operators"):
+            FilterRows(df).filter_predicates([("filepath", "~", "-")])
+
+        with self.assertRaisesRegex(ValueError, "Column fake not in DataFrame columns"):
+            FilterRows(df).filter_predicates([("fake", "==", "-")])
+
+    def test_filter_expression(self):
+        """ Test filtering rows with an expression
+        """
+
+        df = pandas.DataFrame()
+        df["filepath"] = ["-", "/a", "/b", "/c"]
+        df["addedlines"] = [0, 10, 5, 0]
+
+        data_filtered = FilterRows(df)
+        filtered_df = data_filtered.filter_expression("filepath != '-' and addedlines > 0")
+
+        self.assertListEqual(list(filtered_df["filepath"]), ["/a", "/b"])
+
     def test_column_not_exists(self):
         """ Test empty dataframe looking for the corresponding ValueError exception
         """
@@ -23,7 +23,7 @@ import sys
 import unittest
 
 import pandas
-import scipy
+import numpy
 
 if '..' not in sys.path:
     sys.path.insert(0, '..')
@@ -50,10 +50,90 @@ class TestFormat(unittest.TestCase):
 
         # With a dataframe with some data, this returns a non-empty dataframe
         df = empty_df.copy()
-        df["test"] = scipy.zeros(10)
+        df["test"] = numpy.zeros(10)
 
         self.assertFalse(Format().fill_missing_fields(df, empty_columns).empty)
 
+    def test_update_field_names(self):
+        """ Test fields are renamed
+        """
+
+        df = pandas.DataFrame({"owner": ["alice"], "date": ["2019-01-01"]})
+        df = Format().update_field_names(df, {"owner": "author", "fake": "other"})
+
+        self.assertListEqual(list(df.columns), ["author", "date"])
+
+    def test_format_dates(self):
+        """ Test dates are parsed with and without format
+        """
+
+        df = pandas.DataFrame({"date": ["2019-01-02", "2019-03-04", "2019-01-02"]})
+        df = Format().format_dates(df, ["date", "fake"])
+        self.assertEqual(df["date"][1], pandas.Timestamp(2019, 3, 4))
+
+        df = pandas.DataFrame({"date": ["02/01/2019", "04/03/2019"]})
+        df = Format().format_dates(df, ["date"], date_format="%d/%m/%Y")
+        self.assertEqual(df["date"][1], pandas.Timestamp(2019, 3, 4))
+
+    def test_remove_columns(self):
+        """ Test columns are removed
+        """
+
+        df = pandas.DataFrame({"owner": ["alice"], "date": ["2019-01-01"], "id": [1]})
+        df = Format().remove_columns(df, ["owner", "id", "fake"])
+
+        self.assertListEqual(list(df.columns), ["date"])
+
+    def test_conform(self):
+        """ Test a schema is applied to a dataframe
+        """
+
+        df = pandas.DataFrame()
+        df["owner"] = ["alice", "bob", None]
+        df["date"] = ["02/01/2019", "04/03/2019", "05/03/2019"]
+        df["lines"] = [1, 300, 2]
+        df["ratio"] = [0.5, 0.25, 1.0]
+        df["message"] = ["Fix", "Add", "Remove"]
+        df.index = [10, 11, 12]
+
+        schema = {
+            "drop": ["message"],
+            "renames": {"owner": "author"},
+            "fields": ["author", "files", "project"],
+            "defaults": {"author": "Unknown", "project": "main"},
+            "dates": {"date": "%d/%m/%Y"},
+            "dtypes": {"ratio": "float64"},
+            "downcast": True
+        }
+        conformed_df = Format().conform(df, schema)
+
+        self.assertListEqual(list(conformed_df.columns),
+                             ["author", "date", "lines", "ratio", "files", "project"])
+        self.assertListEqual(list(conformed_df.index), [10, 11, 12])
+        self.assertListEqual(list(conformed_df["author"]), ["alice", "bob", "Unknown"])
+        self.assertEqual(conformed_df["date"][11], pandas.Timestamp(2019, 3, 4))
+        self.assertEqual(conformed_df["lines"].dtype, numpy.int16)
+        self.assertEqual(conformed_df["ratio"].dtype, numpy.float64)
+        self.assertListEqual(list(conformed_df["files"]), [0, 0, 0])
+        self.assertListEqual(list(conformed_df["project"]), ["main", "main", "main"])
+        # The original dataframe is not modified
+        self.assertListEqual(list(df.columns), ["owner", "date", "lines", "ratio", "message"])
+
+        # Empty schema
+        conformed_df = Format().conform(df, {})
+        self.assertTrue(conformed_df.equals(df))
+
+        # Renames to columns in the data
+        with self.assertRaises(ValueError):
+            Format().conform(df, {"renames": {"owner": "message"}})
+        with self.assertRaises(ValueError):
+            Format().conform(df, {"renames": {"owner": "author", "message": "author"}})
+
+        conformed_df = Format().conform(df, {"renames": {"owner": "message"}, "drop": ["message"]})
+        self.assertListEqual(list(conformed_df["message"]), ["alice", "bob", None])
+        conformed_df = Format().conform(df, {"renames": {"owner": "message", "message": "owner"}})
+        self.assertListEqual(list(conformed_df["owner"]), ["Fix", "Add", "Remove"])
+
 
 if __name__ == '__main__':
     unittest.main()
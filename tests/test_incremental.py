@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import GroupStats, MaxMin, Onion
+from cereslib.enrich.incremental import IncrementalGroupStats, IncrementalMaxMin, IncrementalOnion
+
+
+class TestIncremental(unittest.TestCase):
+    """ Unit tests for the incremental enrichers
+    """
+
+    def setUp(self):
+        size = 45
+        self.df = pandas.DataFrame()
+        self.df["author"] = [["alice", "bob", "carol", None, "dave"][i % 5] if i < 30 else ["erin", "bob"][i % 2]
+                             for i in range(size)]
+        self.df["repo"] = [["grimoirelab", "perceval"][(i // 3) % 2] for i in range(size)]
+        self.df["addedlines"] = [(i * 7) % 13 if i % 4 else None for i in range(size)]
+        self.df["filetype"] = [["Code", "Other", None][i % 3] for i in range(size)]
+        self.df["date"] = pandas.date_range("2019-01-01", periods=size, freq="5H")
+
+    def assertSameFrame(self, result, expected):
+        self.assertListEqual(list(result.columns), list(expected.columns))
+        for column in expected.columns:
+            self.assertListEqual(list(result[column].astype(str)), list(expected[column].astype(str)))
+
+    def test_group_stats(self):
+        """ Test appending batches returns the same values as GroupStats
+        """
+
+        columns = ["addedlines", "filetype", "date"]
+        aggregations = ['min', 'max', 'count', 'sum', 'first', 'last', 'nunique']
+        stats = IncrementalGroupStats(["addedlines"], ["author", "repo"], aggregations)
+        categories = IncrementalGroupStats(["filetype"], "author", ['count', 'first', 'last', 'nunique'])
+        dates = IncrementalMaxMin(["date"], "author")
+
+        events_df = None
+        for start in range(0, len(self.df), 10):
+            new_df = self.df.iloc[start:start + 10][["author", "repo"] + columns].copy()
+            for incremental in [stats, categories, dates]:
+                groups = incremental.update(new_df)
+                if events_df is not None:
+                    events_df = incremental.enrich(events_df, groups)
+                new_df = incremental.enrich(new_df)
+            events_df = pandas.concat([events_df, new_df], ignore_index=True)
+
+        expected = self.df[["author", "repo"] + columns].copy()
+        expected = GroupStats(expected).enrich(["addedlines"], ["author", "repo"], aggregations)
+        expected = GroupStats(expected).enrich(["filetype"], "author", ['count', 'first', 'last', 'nunique'])
+        expected = MaxMin(expected).enrich(["date"], "author")
+
+        self.assertSameFrame(events_df, expected)
+        self.assertEqual(events_df["nunique_filetype"][1], 2)
+
+    def test_append(self):
+        """ Test only the rows of the groups of the new events change
+        """
+
+        dates = IncrementalMaxMin(["date"], "author")
+        dates.update(self.df.iloc[:30])
+        events_df = dates.enrich(self.df.iloc[:30].copy())
+        events_df.loc[0, "max_date"] = None
+
+        events_df = dates.append(events_df, self.df.iloc[30:].copy())
+
+        expected = MaxMin(self.df.copy()).enrich(["date"], "author")
+        self.assertEqual(len(events_df), len(self.df))
+        self.assertListEqual(list(events_df["max_date"][1:]), list(expected["max_date"][1:]))
+        self.assertTrue(pandas.isnull(events_df["max_date"][0]))
+        self.assertEqual(events_df["max_date"][1], self.df["date"][43])
+
+    def test_save(self):
+        """ Test the state is kept among executions
+        """
+
+        tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        file_path = os.path.join(tmp_path, "stats.pickle")
+
+        stats = IncrementalGroupStats(["filetype"], "author", ['nunique'])
+        stats.update(self.df.iloc[:20])
+        stats.save(file_path)
+
+        stats = IncrementalGroupStats.load(file_path)
+        stats.update(self.df.iloc[20:])
+        shutil.rmtree(tmp_path)
+
+        expected = GroupStats(self.df.copy()).enrich(["filetype"], "author", ['nunique'])
+        events_df = stats.enrich(self.df.copy())
+        self.assertListEqual(list(events_df["nunique_filetype"]), list(expected["nunique_filetype"]))
+
+    def test_onion(self):
+        """ Test the onion model of the totals of the batches
+        """
+
+        onion = IncrementalOnion("author", "addedlines")
+        self.assertTrue(onion.enrich().empty)
+
+        for start in range(0, len(self.df), 10):
+            members = onion.update(self.df.iloc[start:start + 10])
+        self.assertListEqual(list(members), ["erin", "bob"])
+
+        totals = self.df.groupby("author", dropna=False, sort=False)["addedlines"].sum().reset_index()
+        expected = Onion(totals).enrich("author", "addedlines")
+
+        self.assertSameFrame(onion.enrich(), expected)
+
+    def test_upcast(self):
+        """ Test integer totals and stats are upcast by batches with floats
+        """
+
+        first_df = pandas.DataFrame({"author": ["alice", "bob"], "addedlines": [1, 2]})
+        second_df = pandas.DataFrame({"author": ["alice", "carol"], "addedlines": [0.5, float("nan")]})
+
+        onion = IncrementalOnion("author", "addedlines")
+        onion.update(first_df)
+        onion.update(second_df)
+        self.assertDictEqual(onion.totals.to_dict(), {"alice": 1.5, "bob": 2.0, "carol": 0.0})
+
+        stats = IncrementalGroupStats(["addedlines"], "author", ["max", "sum"])
+        stats.update(first_df)
+        events_df = stats.enrich(first_df.copy())
+        groups = stats.update(second_df)
+        events_df = stats.enrich(events_df, groups)
+        self.assertListEqual(list(events_df["sum_addedlines"]), [1.5, 2.0])
+        self.assertListEqual(list(stats.enrich(second_df.copy())["max_addedlines"][:1]), [1.0])
+
+    def test_unsupported_aggregation(self):
+        """ Test an error is raised for unknown aggregations
+        """
+
+        with self.assertRaises(ValueError):
+            IncrementalGroupStats(["addedlines"], "author", ["median"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+import json
+import sys
+import unittest
+
+import numpy as np
+
+import pandas
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.io.ndjson import bulk_actions, iter_documents, write_bulk, write_ndjson
+
+
+class TestNDJSON(unittest.TestCase):
+    """ Unit tests for the NDJSON serialization
+    """
+
+    def setUp(self):
+        self.df = pandas.DataFrame()
+        self.df["hash"] = ["h0", "h1", "h2"]
+        self.df["owner"] = ["John Smith <jsmith@example.com>", "Dan \udcc3 <dan@example.com>", None]
+        self.df["date"] = pandas.to_datetime(["2019-01-01 10:00:00.123456", None, "2019-01-03"])
+        self.df["utc_date"] = self.df["date"].dt.tz_localize("Europe/Madrid")
+        self.df["committer_date"] = [pandas.Timestamp("2019-01-01 10:00+02:00"),
+                                     pandas.Timestamp("2019-01-01 10:00-05:00"), None]
+        self.df["addedlines"] = [1.5, np.nan, 3.0]
+        self.df["files"] = [1, 2, 3]
+        self.df["merge"] = [True, False, True]
+        self.df["tz"] = pandas.array([2, None, -5], dtype="Int64")
+        self.df["filetype"] = pandas.Categorical(["Code", None, "Other"])
+        self.df["file_path_list"] = [["src", "main.py"], [], None]
+        self.df.index = [10, 11, 12]
+
+    def test_documents(self):
+        """ Test each row is encoded with the values of its columns
+        """
+
+        for use_orjson in [True, False]:
+            documents = [json.loads(document) for document in iter_documents(self.df, use_orjson)]
+
+            self.assertEqual(len(documents), 3)
+            self.assertDictEqual(documents[0], {
+                "hash": "h0",
+                "owner": "John Smith <jsmith@example.com>",
+                "date": "2019-01-01T10:00:00.123",
+                "utc_date": "2019-01-01T09:00:00.123Z",
+                "committer_date": "2019-01-01T08:00:00.000Z",
+                "addedlines": 1.5,
+                "files": 1,
+                "merge": True,
+                "tz": 2,
+                "filetype": "Code",
+                "file_path_list": ["src", "main.py"]
+            })
+            self.assertEqual(documents[1]["owner"], "Dan \udcc3 <dan@example.com>")
+            self.assertEqual(documents[1]["committer_date"], "2019-01-01T15:00:00.000Z")
+            for column in ["date", "utc_date", "addedlines", "tz", "filetype"]:
+                self.assertIsNone(documents[1][column])
+            self.assertIsNone(documents[2]["file_path_list"])
+
+    def test_same_backends(self):
+        """ Test both backends return the same documents
+        """
+
+        self.df["owner"] = self.df["owner"].str.replace("\udcc3", "?")
+
+        documents = list(iter_documents(self.df, use_orjson=True))
+        self.assertListEqual(documents, list(iter_documents(self.df, use_orjson=False)))
+
+    def test_non_finite(self):
+        """ Test NaN and infinite values are null with both backends
+        """
+
+        df = pandas.DataFrame()
+        df["addedlines"] = [np.inf, -np.inf, 1.0]
+        df["ratios"] = [[np.inf, 0.5], [np.nan], np.array([-np.inf, 2.0])]
+
+        expected = [{"addedlines": None, "ratios": [None, 0.5]},
+                    {"addedlines": None, "ratios": [None]},
+                    {"addedlines": 1.0, "ratios": [None, 2.0]}]
+        for use_orjson in [True, False]:
+            documents = [json.loads(document) for document in iter_documents(df, use_orjson=use_orjson)]
+            self.assertListEqual(documents, expected)
+
+        self.assertListEqual(list(iter_documents(df, use_orjson=False)), list(iter_documents(df, use_orjson=True)))
+
+    def test_write(self):
+        """ Test documents are written with and without bulk actions
+        """
+
+        stream = io.BytesIO()
+        self.assertEqual(write_ndjson(self.df, stream), 3)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])["hash"], "h2")
+
+        stream = io.BytesIO()
+        self.assertEqual(write_bulk(self.df, stream, "git", ["hash", "files"], "item"), 3)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertDictEqual(json.loads(lines[0]), {"index": {"_index": "git", "_type": "item", "_id": "h0_1"}})
+        self.assertEqual(json.loads(lines[1])["hash"], "h0")
+
+        self.assertListEqual(bulk_actions(self.df, "git"), [b'{"index":{"_index":"git"}}'] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import unittest
+
+import numpy
+import pandas
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.dfutils.optimize import Optimize
+
+
+class TestOptimize(unittest.TestCase):
+    """ Unit tests for Optimize class
+    """
+
+    def setUp(self):
+        size = 100
+        self.df = pandas.DataFrame()
+        self.df["eventtype"] = ["COMMIT", "FILE_A"] * (size // 2)
+        self.df["filepath"] = ["/file/%s" % i for i in range(size)]
+        self.df["author_bot"] = [False] * size
+        self.df["bot_or_null"] = [True, None] * (size // 2)
+        self.df["addedlines"] = list(range(size))
+        self.df["tz"] = [-5.0, numpy.nan] * (size // 2)
+        self.df["ratio"] = [0.5, 0.25] * (size // 2)
+        self.df["precise"] = [0.1, 0.2] * (size // 2)
+        self.df["file_path_list"] = [["file", str(i)] for i in range(size)]
+        self.df["date"] = pandas.date_range("2019-01-01", periods=size)
+
+    def test_reduce_memory(self):
+        """ Test columns are converted to smaller types
+        """
+
+        optimize = Optimize()
+        optimized_df = optimize.reduce_memory(self.df)
+
+        self.assertEqual(optimized_df["eventtype"].dtype, "category")
+        self.assertEqual(optimized_df["filepath"].dtype, object)
+        self.assertEqual(optimized_df["author_bot"].dtype, bool)
+        self.assertEqual(optimized_df["bot_or_null"].dtype, "boolean")
+        self.assertEqual(optimized_df["addedlines"].dtype, numpy.int8)
+        self.assertEqual(optimized_df["tz"].dtype, "Int8")
+        self.assertEqual(optimized_df["ratio"].dtype, numpy.float32)
+        self.assertEqual(optimized_df["precise"].dtype, numpy.float64)
+        self.assertEqual(optimized_df["file_path_list"].dtype, object)
+        self.assertEqual(optimized_df["date"].dtype, "datetime64[ns]")
+
+        # Values are kept
+        for column in self.df.columns:
+            self.assertListEqual([str(value) for value in optimized_df[column]],
+                                 [str(value) for value in self.df[column].astype(optimized_df[column].dtype)])
+        self.assertListEqual(list(optimized_df["eventtype"]), list(self.df["eventtype"]))
+        self.assertTrue(optimized_df["tz"].isna()[1])
+        self.assertEqual(optimized_df["tz"][0], -5)
+
+        self.assertLess(optimize.report["after"], optimize.report["before"])
+        self.assertEqual(optimize.report["columns"]["addedlines"], ("int64", "int8"))
+        self.assertNotIn("filepath", optimize.report["columns"])
+
+    @unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+    def test_arrow_strings(self):
+        """ Test strings with many distinct values are converted to Arrow strings
+        """
+
+        optimized_df = Optimize().reduce_memory(self.df, arrow_strings=True)
+
+        self.assertEqual(optimized_df["filepath"].dtype, "string[pyarrow]")
+        self.assertEqual(optimized_df["eventtype"].dtype, "category")
+        self.assertListEqual(list(optimized_df["filepath"]), list(self.df["filepath"]))
+
+    def test_empty_dataframe(self):
+        """ Test empty dataframes are not modified
+        """
+
+        df = pandas.DataFrame(columns=["owner", "date"])
+        optimized_df = Optimize().reduce_memory(df)
+
+        self.assertTrue(optimized_df.empty)
+        self.assertListEqual(list(optimized_df.columns), ["owner", "date"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import FileType, GroupStats, Onion
+from cereslib.io.parquet import ParquetSource
+from cereslib.pipeline.outofcore import OutOfCore
+from cereslib.pipeline.pipeline import Pipeline
+
+
+@unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+class TestOutOfCore(unittest.TestCase):
+    """ Unit tests for OutOfCore class
+    """
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+
+        size = 60
+        self.df = pandas.DataFrame()
+        self.df["author"] = [["alice", "bob", "carol", None][i % 4] for i in range(size)]
+        self.df["date"] = pandas.date_range("2019-01-01", periods=size, freq="2D")
+        self.df["addedlines"] = [(i * 7) % 13 for i in range(size)]
+        self.df["filepath"] = [["src/main.py", "README"][i % 2] for i in range(size)]
+        self.df["project"] = [["grimoirelab", "perceval"][(i // 3) % 2] for i in range(size)]
+        self.df["month"] = self.df["date"].dt.strftime("%Y-%m")
+
+        for (project, month), events in self.df.groupby(["project", "month"]):
+            path = os.path.join(self.tmp_path, "project=" + project, "month=" + month)
+            os.makedirs(path)
+            events.drop(columns=["project", "month"]).to_parquet(os.path.join(path, "part-0.parquet"))
+
+        self.source = ParquetSource(self.tmp_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_source(self):
+        """ Test partitions are found and read with their keys
+        """
+
+        partitions = self.source.partitions()
+
+        self.assertEqual(len(partitions), 8)
+        self.assertDictEqual(partitions[0], {"project": "grimoirelab", "month": "2019-01"})
+
+        events_df = self.source.read(partitions[0], columns=["author", "project"])
+        self.assertListEqual(list(events_df.columns), ["author", "project"])
+        self.assertEqual(set(events_df["project"]), {"grimoirelab"})
+
+    def test_group_stats(self):
+        """ Test aggregations of the whole dataset are added to each partition
+        """
+
+        aggregations = ['min', 'max', 'count', 'sum', 'first', 'last', 'nunique']
+
+        with OutOfCore(self.source, buckets=3) as dataset:
+            stats = dataset.group_stats(["addedlines"], "author", aggregations)
+            dates = dataset.max_min(["date"], ["author", "project"])
+            partitions = list(dataset.partitions(aggregates=[stats, dates]))
+            spill_dir = dataset.spill_dir
+
+        self.assertFalse(os.path.exists(spill_dir))
+        self.assertEqual(len(partitions), 8)
+
+        events_df = pandas.concat([data for _, data in partitions], ignore_index=True)
+        expected = events_df[["author", "date", "addedlines", "filepath", "project", "month"]].copy()
+        expected = GroupStats(expected).enrich(["addedlines"], "author", aggregations)
+        expected = GroupStats(expected).enrich(["date"], ["author", "project"], ["max", "min"])
+
+        for column in expected.columns:
+            self.assertListEqual(list(events_df[column].astype(str)), list(expected[column].astype(str)))
+        self.assertEqual(events_df["max_addedlines"][0], 12)
+
+    def test_pipeline(self):
+        """ Test the pipeline runs over each partition before aggregating
+        """
+
+        pipeline = Pipeline().enrich(FileType, "filepath")
+
+        with OutOfCore(self.source) as dataset:
+            stats = dataset.group_stats(["addedlines"], "filetype", ["sum"], pipeline=pipeline)
+            totals = stats.to_dataframe().sort_values("filetype")
+
+        self.assertListEqual(list(totals["filetype"]), ["Code", "Other"])
+        self.assertListEqual(list(totals["sum_addedlines"]),
+                             [self.df["addedlines"][::2].sum(), self.df["addedlines"][1::2].sum()])
+
+    def test_onion(self):
+        """ Test the onion model is calculated over the totals of each member
+        """
+
+        spill_dir = os.path.join(self.tmp_path, "spill")
+        with OutOfCore(self.source, spill_dir=spill_dir) as dataset:
+            onion_df = dataset.onion("author", "addedlines")
+        self.assertTrue(os.path.exists(spill_dir))
+
+        totals = self.df.groupby("author", dropna=False)["addedlines"].sum().reset_index()
+        expected = Onion(totals).enrich("author", "addedlines")
+
+        self.assertListEqual(list(onion_df.columns), list(expected.columns))
+        for column in ["addedlines", "cum_net_sum", "onion_role"]:
+            self.assertListEqual(list(onion_df[column]), list(expected[column]))
+
+    def test_unsupported_aggregation(self):
+        """ Test an error is raised for unknown aggregations
+        """
+
+        with OutOfCore(self.source) as dataset:
+            with self.assertRaises(ValueError):
+                dataset.group_stats(["addedlines"], "author", ["median"])
+
+
+if __name__ == '__main__':
+    unittest.main()
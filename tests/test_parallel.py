@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import unittest
+import unittest.mock
+
+import pandas
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import EmailFlag, MessageLogFlag, SplitEmail, ToUTF8
+from cereslib.enrich.parallel import ParallelEnrich, split_chunks
+
+
+BODIES = [
+    "Fix typo\n\nSigned-off-by: John Smith <jsmith@example.com>",
+    "Patch\n\nReviewed-by: Jane Doe <jdoe@example.com>\nAcked-by: Bob <bob@example.com>",
+    "Nothing interesting here",
+    "From: Alice <alice@example.com>\n\nTested-by: Carl <carl@example.com>",
+    "",
+    "Cc: stable@vger.kernel.org",
+    "Patch by Jane Doe <jdoe@example.com> on 2010-01-01",
+]
+
+OWNERS = [
+    "John Smith <jsmith@example.com>",
+    "Jane Doe <jdoe@example.com>",
+    "Bob <bob@example.com>",
+    "alice@example.com",
+    "Carl <carl@example.com>",
+    "Dan \udcc3 <dan@example.com>",
+    "Eve <eve@example.com>",
+]
+
+
+class TestParallelEnrich(unittest.TestCase):
+    """ Unit tests for ParallelEnrich class, run with pyarrow
+    when it is installed
+    """
+
+    def setUp(self):
+        self.df = pandas.DataFrame()
+        self.df["body"] = BODIES * 3
+        self.df["owner"] = OWNERS * 3
+        self.df["id"] = list(range(len(self.df)))
+
+    def test_split_chunks(self):
+        """ Test chunks keep the order of the rows and reset the index
+        """
+
+        chunks = list(split_chunks(self.df, 5))
+
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(len(chunks[-1]), 1)
+        self.assertEqual(list(chunks[1].index), [0, 1, 2, 3, 4])
+        self.assertEqual(list(pandas.concat(chunks)["id"]), list(self.df["id"]))
+
+    def test_same_result_as_sequential(self):
+        """ Test enrichers return the same values when run in parallel
+        """
+
+        for enricher, column in [(EmailFlag, "body"), (MessageLogFlag, "body"),
+                                 (SplitEmail, "owner"), (ToUTF8, ["owner"])]:
+            expected = enricher(self.df.copy()).enrich(column)
+            parallel = ParallelEnrich(self.df.copy(), enricher, workers=2, chunksize=4)
+            enriched_df = parallel.enrich(column)
+
+            self.assertListEqual(list(enriched_df.columns), list(expected.columns))
+            for name in expected.columns:
+                self.assertListEqual(list(enriched_df[name]), list(expected[name]))
+
+    def test_modified_column(self):
+        """ Test columns modified only in some of the chunks are rebuilt
+        """
+
+        parallel = ParallelEnrich(self.df.copy(), ToUTF8, workers=2, chunksize=2)
+        enriched_df = parallel.enrich(["owner"])
+
+        self.assertEqual(enriched_df["owner"][5], "Dan ? <dan@example.com>")
+        self.assertEqual(enriched_df["owner"][0], OWNERS[0])
+        self.assertEqual(enriched_df["owner"][19], OWNERS[5].replace("\udcc3", "?"))
+
+    def test_non_default_index(self):
+        """ Test the original index is kept
+        """
+
+        df = self.df.copy()
+        df.index = df.index + 100
+        parallel = ParallelEnrich(df, SplitEmail, workers=2, chunksize=3)
+        enriched_df = parallel.enrich("owner")
+
+        self.assertEqual(list(enriched_df.index), list(range(100, 121)))
+        self.assertEqual(enriched_df.loc[100, "email"], "jsmith@example.com")
+        self.assertEqual(enriched_df.loc[120, "user"], "Eve")
+
+    def test_column_not_exists(self):
+        """ Test the original dataframe is returned if the column is not found
+        """
+
+        parallel = ParallelEnrich(self.df, EmailFlag, workers=2)
+        enriched_df = parallel.enrich("fake_column")
+
+        self.assertListEqual(list(enriched_df.columns), ["body", "owner", "id"])
+
+    def test_empty_dataframe(self):
+        """ Test empty dataframes are returned as they are
+        """
+
+        df = pandas.DataFrame()
+        df["body"] = []
+        parallel = ParallelEnrich(df, EmailFlag, workers=2)
+        enriched_df = parallel.enrich("body")
+
+        self.assertTrue(enriched_df.empty)
+
+
+@unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+class TestParallelEnrichWithoutArrow(TestParallelEnrich):
+    """ Unit tests for ParallelEnrich class when pyarrow is not installed
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        # Importing a module set to None raises ImportError
+        patcher = unittest.mock.patch.dict(sys.modules, {"pyarrow": None})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pyarrow_not_imported(self):
+        """ Test pyarrow can't be imported in these tests
+        """
+
+        with self.assertRaises(ImportError):
+            import pyarrow  # noqa: F401,F811
+
+
+if __name__ == '__main__':
+    unittest.main()
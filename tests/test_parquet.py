@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.dfutils.filter import FilterRows
+from cereslib.io.parquet import ParquetSink, ParquetSource
+
+
+@unittest.skipIf(not HAS_PYARROW, "pyarrow not installed")
+class TestParquet(unittest.TestCase):
+    """ Unit tests for ParquetSink and ParquetSource classes
+    """
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+
+        size = 40
+        self.df = pandas.DataFrame()
+        self.df["hash"] = ["h%s" % i for i in range(size)]
+        self.df["project"] = [["grimoirelab", "chaoss/wg", None][i % 3] for i in range(size)]
+        self.df["date"] = pandas.date_range("2019-01-01", periods=size, freq="5D", tz="UTC")
+        self.df["addedlines"] = [i * 3 for i in range(size)]
+        self.df["owner"] = ["John Smith <jsmith@example.com>"] * size
+        self.df["file_path_list"] = [["src", "main.py"] if i % 2 else ["README"] for i in range(size)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_write(self):
+        """ Test events are written to their partitions and read back
+        """
+
+        sink = ParquetSink(self.tmp_path, ["project", "year", "month"], date_column="date")
+        self.assertEqual(sink.write(self.df), 40)
+        self.assertEqual(sink.write(self.df.iloc[:0]), 0)
+
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp_path, "project=chaoss%2Fwg", "year=2019", "month=01")))
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp_path, "project=__HIVE_DEFAULT_PARTITION__")))
+        self.assertFalse(any(name.endswith(".tmp") for _, _, names in os.walk(self.tmp_path) for name in names))
+
+        source = ParquetSource(self.tmp_path)
+        partitions = source.partitions()
+        self.assertEqual(len(partitions), len(sink.files))
+        self.assertDictEqual(partitions[0], {"project": None, "year": "2019", "month": "01"})
+        self.assertIn({"project": "chaoss/wg", "year": "2019", "month": "01"}, partitions)
+
+        events_df = pandas.concat([source.read(partition) for partition in partitions])
+        events_df = events_df.sort_values("hash", key=lambda hashes: hashes.str[1:].astype(int))
+        self.assertEqual(len(events_df), 40)
+        self.assertEqual(events_df["date"].dtype, self.df["date"].dtype)
+        self.assertListEqual(events_df["addedlines"].tolist(), self.df["addedlines"].tolist())
+        self.assertListEqual(events_df["file_path_list"].tolist(), self.df["file_path_list"].tolist())
+        self.assertListEqual(events_df["project"].tolist(), self.df["project"].tolist())
+
+    def test_schema_evolution(self):
+        """ Test files with different columns and types are read with the schema of the dataset
+        """
+
+        sink = ParquetSink(self.tmp_path, ["project"])
+        sink.write(self.df.iloc[:3])
+
+        df = self.df.iloc[3:6].copy()
+        df["addedlines"] = [1.5, None, 2.5]
+        df["owner"] = ["Dan \udcc3 <dan@example.com>", None, None]
+        df["removedlines"] = [1, 2, 3]
+        sink = ParquetSink(self.tmp_path, ["project"])
+        sink.write(df)
+
+        with self.assertRaises(ValueError):
+            ParquetSink(self.tmp_path, ["project", "year"], date_column="date")
+
+        source = ParquetSource(self.tmp_path)
+        events_df = source.read({"project": "grimoirelab"})
+        self.assertListEqual(sorted(events_df.columns),
+                             ["addedlines", "date", "file_path_list", "hash", "owner", "project", "removedlines"])
+        events_df = events_df.set_index("hash")
+        self.assertEqual(events_df.loc["h0", "addedlines"], 0.0)
+        self.assertEqual(events_df.loc["h3", "addedlines"], 1.5)
+        self.assertTrue(pandas.isnull(events_df.loc["h0", "removedlines"]))
+        self.assertEqual(events_df.loc["h0", "owner"], "John Smith <jsmith@example.com>")
+        self.assertEqual(events_df.loc["h3", "owner"], "Dan \udcc3 <dan@example.com>")
+
+        df["addedlines"] = ["a", "b", "c"]
+        with self.assertRaises(ValueError):
+            sink.write(df)
+
+    def test_predicates(self):
+        """ Test only the partitions and rows matching the predicates are read
+        """
+
+        sink = ParquetSink(self.tmp_path, ["project", "year", "month"], date_column="date")
+        sink.write(self.df)
+        source = ParquetSource(self.tmp_path)
+
+        partitions = source.partitions([("project", "==", "grimoirelab"), ("month", ">", 3)])
+        self.assertListEqual([partition["month"] for partition in partitions], ["04", "05", "06", "07"])
+
+        start = pandas.Timestamp("2019-03-10", tz="UTC")
+        predicates = [("project", "in", ["grimoirelab", "chaoss/wg"]), ("date", ">=", start)]
+        partitions = source.partitions(predicates)
+        self.assertEqual(len(partitions), 10)
+
+        frames = [events_df for _, events_df in source.scan(columns=["hash", "addedlines"], predicates=predicates)]
+        events_df = pandas.concat(frames)
+        self.assertListEqual(list(events_df.columns), ["hash", "addedlines"])
+
+        expected_df = self.df[self.df["project"].notnull() & (self.df["date"] >= start)]
+        self.assertListEqual(sorted(events_df["hash"]), sorted(expected_df["hash"]))
+
+        with self.assertRaises(ValueError):
+            source.partitions([("project", "like", "grimoire%")])
+
+    def test_predicates_null_keys(self):
+        """ Test partitions with null keys are read as FilterRows keeps their rows
+        """
+
+        sink = ParquetSink(self.tmp_path, ["project"])
+        sink.write(self.df)
+        source = ParquetSource(self.tmp_path)
+
+        for predicate in [("project", "==", "grimoirelab"), ("project", "!=", "grimoirelab"),
+                          ("project", "in", ["chaoss/wg"]), ("project", "not in", ["chaoss/wg"]),
+                          ("project", ">", "chaoss/wg")]:
+            frames = [events_df for _, events_df in source.scan(columns=["hash"], predicates=[predicate])]
+            expected_df = FilterRows(self.df).filter_predicates([predicate])
+            self.assertListEqual(sorted(pandas.concat(frames)["hash"]), sorted(expected_df["hash"]))
+
+        partitions = source.partitions([("project", "not in", ["chaoss/wg"])])
+        self.assertIn({"project": None}, partitions)
+
+
+if __name__ == '__main__':
+    unittest.main()
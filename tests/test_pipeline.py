@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import unittest
+
+import pandas
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.dfutils.filter import FilterRows
+from cereslib.enrich.enrich import (Enrich, FilePath, FileType, MessageLogFlag,
+                                    SplitEmail, SplitLists, ToUTF8)
+from cereslib.pipeline.pipeline import Pipeline
+
+
+COMMITS = [
+    {"hash": "a1", "owner": "John Smith <jsmith@example.com>",
+     "message": "Fix typo\nPatch by Jane Doe", "files": ["src/main.py", "README"]},
+    {"hash": "b2", "owner": "Dan \udcc3 <dan@example.com>",
+     "message": "Update setup", "files": ["setup.py"]},
+    {"hash": "c3", "owner": "Eve <eve@example.com>",
+     "message": "Add docs", "files": ["docs//index.md", "src/lib.c", "-"]},
+]
+
+
+class MockedEventizer(object):
+    """ Eventizer with one event per file """
+
+    def __init__(self, items, prefix):
+        self.items = items
+        self.prefix = prefix
+
+    def eventize(self, granularity):
+        events = {"hash": [], "owner": [], "message": [], "filepath": []}
+        for item in self.items:
+            for path in item["files"]:
+                events["hash"].append(self.prefix + item["hash"])
+                events["owner"].append(item["owner"])
+                events["message"].append(item["message"])
+                events["filepath"].append(path)
+        return pandas.DataFrame(events)
+
+
+class MockedColumnsEventizer(MockedEventizer):
+    """ Eventizer that records the columns requested """
+
+    requested = []
+
+    def eventize(self, granularity, columns=None):
+        MockedColumnsEventizer.requested.append(columns)
+        events = super().eventize(granularity)
+        if columns is not None:
+            events = events[[column for column in events.columns if column in columns]]
+        return events
+
+
+class Counter(Enrich):
+    """ Enricher that counts the rows it has seen """
+
+    def __init__(self, data):
+        self.data = data
+        self.rows = 0
+
+    @classmethod
+    def columns_io(cls, column):
+        return [column], ['row_count']
+
+    def enrich(self, column):
+        self.rows += len(self.data)
+        self.data['row_count'] = self.rows
+        return self.data
+
+
+class TestPipeline(unittest.TestCase):
+    """ Unit tests for Pipeline class
+    """
+
+    def test_same_result_as_sequential(self):
+        """ Test the pipeline returns the same events as the enrichers
+        called one after another
+        """
+
+        pipeline = Pipeline()
+        pipeline.eventize(MockedEventizer, 2, "commit_")
+        pipeline.filter(("filepath", "!=", "-"))
+        pipeline.enrich(FileType, "filepath")
+        pipeline.enrich(FilePath, "filepath")
+        pipeline.enrich(ToUTF8, ["owner"])
+        pipeline.enrich(SplitEmail, "owner")
+        events_df = pipeline.run(COMMITS)
+
+        expected = MockedEventizer(COMMITS, "commit_").eventize(2)
+        expected = FilterRows(expected).filter_(["filepath"], "-")
+        expected = FileType(expected).enrich("filepath")
+        expected = FilePath(expected).enrich("filepath")
+        expected = ToUTF8(expected).enrich(["owner"])
+        expected = SplitEmail(expected).enrich("owner")
+
+        self.assertListEqual(list(events_df.columns), list(expected.columns))
+        self.assertListEqual(list(events_df.index), list(expected.index))
+        for column in expected.columns:
+            self.assertListEqual(list(events_df[column]), list(expected[column]))
+        self.assertEqual(events_df["owner"][2], "Dan ? <dan@example.com>")
+
+    def test_plan(self):
+        """ Test consecutive filters and enrichers with known columns are grouped
+        """
+
+        pipeline = Pipeline()
+        pipeline.eventize(MockedEventizer, 2, "")
+        pipeline.filter(("filepath", "!=", "-")).filter(("hash", "!=", "b2"))
+        pipeline.enrich(FileType, "filepath").enrich(ToUTF8, ["owner"])
+        pipeline.enrich(SplitLists, ["filepath"])
+        pipeline.enrich(SplitEmail, "owner")
+
+        plan = [(kind, len(stages)) for kind, stages in pipeline.plan()]
+        self.assertListEqual(plan, [('eventize', 1), ('filter', 2), ('fused', 2),
+                                    ('enrich', 1), ('fused', 1)])
+
+    def test_dataframe_input(self):
+        """ Test pipelines with no eventize stage run over dataframes,
+        including enrichers that expect an integer index after filtering
+        """
+
+        events_df = MockedEventizer(COMMITS, "").eventize(2)
+
+        pipeline = Pipeline()
+        pipeline.filter(("filepath", "not in", ["-", "README"]))
+        pipeline.enrich(MessageLogFlag, "message")
+        events_df = pipeline.run(events_df)
+
+        self.assertListEqual(list(events_df.index), [0, 2, 3, 4])
+        self.assertListEqual(list(events_df["flags"]), ["Patch by Blink", "", "", ""])
+        self.assertListEqual(list(events_df["values"]), ["Jane Doe", "", "", ""])
+
+    def test_shared_state(self):
+        """ Test the same enricher instance is used for every batch
+        """
+
+        pipeline = Pipeline()
+        pipeline.eventize(MockedEventizer, 2, "")
+        pipeline.enrich(Counter, "hash")
+
+        results = list(pipeline.run_batches([COMMITS[:1], COMMITS[1:]]))
+
+        self.assertListEqual(list(results[0]["row_count"]), [2, 2])
+        self.assertListEqual(list(results[1]["row_count"]), [6, 6, 6, 6])
+
+        counter = Counter(None)
+        pipeline = Pipeline().enrich(counter, "hash")
+        pipeline.run(results[0])
+        self.assertEqual(counter.rows, 2)
+
+    def test_output_columns(self):
+        """ Test only the stages and columns needed for the output are computed
+        """
+
+        MockedColumnsEventizer.requested = []
+
+        pipeline = Pipeline(columns=["filepath", "file_ext", "email"])
+        pipeline.eventize(MockedColumnsEventizer, 2, "")
+        pipeline.filter(("filepath", "!=", "-"))
+        pipeline.enrich(FileType, "filepath")
+        pipeline.enrich(FilePath, "filepath")
+        pipeline.enrich(MessageLogFlag, "message")
+        pipeline.enrich(ToUTF8, ["owner"])
+        pipeline.enrich(SplitEmail, "owner")
+        # Owner is not in the output, so this is not needed
+        pipeline.enrich(ToUTF8, ["owner"])
+
+        plan = pipeline.plan()
+        self.assertListEqual([kind for kind, _ in plan], ['eventize', 'filter', 'fused'])
+        self.assertListEqual([stage.name for stage in plan[2][1]], ["FilePath", "ToUTF8", "SplitEmail"])
+
+        events_df = pipeline.run(COMMITS)
+
+        self.assertListEqual(MockedColumnsEventizer.requested, [["filepath", "owner"]])
+        self.assertListEqual(list(events_df.columns), ["filepath", "file_ext", "email"])
+        self.assertListEqual(list(events_df["file_ext"]), ["py", "", "py", "md", "c"])
+        self.assertListEqual(list(events_df["email"]), ["jsmith@example.com", "jsmith@example.com",
+                                                        "dan@example.com", "eve@example.com",
+                                                        "eve@example.com"])
+
+    def test_output_columns_unknown_enricher(self):
+        """ Test every column is eventized before enrichers with unknown columns
+        """
+
+        MockedColumnsEventizer.requested = []
+
+        pipeline = Pipeline(columns=["filepath", "filetype"])
+        pipeline.eventize(MockedColumnsEventizer, 2, "")
+        pipeline.enrich(SplitLists, ["filepath"])
+        pipeline.enrich(FileType, "filepath")
+        pipeline.enrich(SplitEmail, "owner")
+
+        self.assertEqual(len(pipeline.plan()), 3)
+
+        events_df = pipeline.run(COMMITS)
+
+        self.assertListEqual(MockedColumnsEventizer.requested, [None])
+        self.assertListEqual(list(events_df.columns), ["filepath", "filetype"])
+
+    def test_eventize_first(self):
+        """ Test eventize must be the first stage
+        """
+
+        pipeline = Pipeline().filter(("filepath", "!=", "-"))
+
+        with self.assertRaises(ValueError):
+            pipeline.eventize(MockedEventizer, 2, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
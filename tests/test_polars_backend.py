@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import unittest
+
+import pandas
+
+try:
+    import polars  # noqa: F401
+    import pyarrow  # noqa: F401
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import (FilePath, FileType, GroupStats, MaxMin, Onion,
+                                    Projects, SplitLists, TimeDifference, get_backend,
+                                    set_backend)
+
+
+class TestBackend(unittest.TestCase):
+    """ Unit tests for the selection of the backend
+    """
+
+    def tearDown(self):
+        set_backend('pandas')
+
+    def test_default_backend(self):
+        """ Test pandas is the default backend """
+
+        self.assertEqual(get_backend(), 'pandas')
+
+    def test_unsupported_backend(self):
+        """ Test an error is raised for unknown backends """
+
+        with self.assertRaises(ValueError):
+            set_backend('dask')
+        self.assertEqual(get_backend(), 'pandas')
+
+
+@unittest.skipIf(not HAS_POLARS, "polars or pyarrow not installed")
+class TestPolarsBackend(unittest.TestCase):
+    """ Unit tests checking the polars backend returns the same
+    results as the pandas one
+    """
+
+    def setUp(self):
+        size = 30
+        self.df = pandas.DataFrame()
+        self.df["filepath"] = [["src/main.py", "README", "/docs//index.md", "lib/a.c", "Makefile.in/"][i % 5]
+                               for i in range(size)]
+        self.df["author"] = [["alice", "bob", "carol", None][i % 4] for i in range(size)]
+        self.df["repo"] = [["grimoirelab", "perceval"][(i // 3) % 2] for i in range(size)]
+        self.df["addedlines"] = [(i * 7) % 13 if i % 6 else None for i in range(size)]
+        self.df["date"] = pandas.date_range("2019-01-01", periods=size, freq="7H")
+        self.df["committer_date"] = self.df["date"] + pandas.to_timedelta([i * 90 for i in range(size)], unit="s")
+        self.df.index = self.df.index + 100
+
+    def tearDown(self):
+        set_backend('pandas')
+
+    def enrich(self, enricher, *args, **kwargs):
+        """ Returns the results of both backends """
+
+        set_backend('pandas')
+        expected = enricher(self.df.copy()).enrich(*args, **kwargs)
+        set_backend('polars')
+        result = enricher(self.df.copy()).enrich(*args, **kwargs)
+
+        return expected, result
+
+    def assertSameFrame(self, result, expected):
+        self.assertListEqual(list(result.columns), list(expected.columns))
+        self.assertListEqual(list(result.index), list(expected.index))
+        for column in expected.columns:
+            self.assertListEqual(list(result[column].astype(str)), list(expected[column].astype(str)))
+
+    def test_FileType(self):
+        """ Test FileType with the polars backend """
+
+        expected, result = self.enrich(FileType, "filepath")
+        self.assertSameFrame(result, expected)
+        self.assertEqual(result.loc[100, "filetype"], "Code")
+
+    def test_FilePath(self):
+        """ Test FilePath with the polars backend """
+
+        expected, result = self.enrich(FilePath, "filepath")
+        self.assertSameFrame(result, expected)
+        self.assertListEqual(result.loc[102, "file_path_list"], ["docs", "index.md"])
+
+    def test_GroupStats(self):
+        """ Test GroupStats with the polars backend """
+
+        aggregations = ['min', 'max', 'count', 'sum', 'first', 'last', 'nunique']
+        expected, result = self.enrich(GroupStats, ["addedlines"], ["author", "repo"], aggregations)
+        self.assertSameFrame(result, expected)
+
+        expected, result = self.enrich(GroupStats, ["date"], "repo", ['min', 'max', 'first', 'last'])
+        self.assertSameFrame(result, expected)
+
+        expected, result = self.enrich(MaxMin, ["date"], "author")
+        self.assertSameFrame(result, expected)
+
+    def test_TimeDifference(self):
+        """ Test TimeDifference with the polars backend """
+
+        expected, result = self.enrich(TimeDifference, "date", "committer_date")
+        self.assertSameFrame(result, expected)
+        self.assertEqual(result.loc[101, "timedifference"], 90.0)
+
+    def test_Onion(self):
+        """ Test Onion with the polars backend """
+
+        self.df = pandas.DataFrame({"author": ["a", "b", "c", "d", "e"],
+                                    "events": [5, 40, 1, 12, 3]})
+        expected, result = self.enrich(Onion, "author", "events")
+        self.assertSameFrame(result, expected)
+        self.assertListEqual(list(result["author"]), ["b", "d", "a", "e", "c"])
+
+        # Members with the same amount of events
+        self.df = pandas.DataFrame({"author": ["m%s" % i for i in range(1000)],
+                                    "events": [(i * 37) % 11 for i in range(1000)]})
+        expected, result = self.enrich(Onion, "author", "events")
+        self.assertSameFrame(result, expected)
+        self.assertListEqual(list(result["author"][:3]), ["m8", "m19", "m30"])
+
+    def test_SplitLists(self):
+        """ Test SplitLists with the polars backend """
+
+        self.df = pandas.DataFrame({"hash": ["h1", "h2", "h3"],
+                                    "authors": [["a", "b"], [], ["c"]],
+                                    "emails": [["a@x", "b@x"], [], ["c@x"]]})
+        expected, result = self.enrich(SplitLists, ["authors", "emails"])
+        self.assertSameFrame(result, expected)
+
+        self.df = pandas.DataFrame({"authors": [["a", "b"]], "emails": [["a@x"]]})
+        with self.assertRaises(ValueError):
+            self.enrich(SplitLists, ["authors", "emails"])
+
+    def test_Projects(self):
+        """ Test Projects merging a dataframe with the polars backend """
+
+        projects = pandas.DataFrame({"repo": ["grimoirelab", "perceval", "perceval", None],
+                                     "project": ["GrimoireLab", "Perceval", "Backends", "Unknown"]})
+        self.df.loc[105, "repo"] = None
+        self.df.loc[106, "repo"] = "sortinghat"
+
+        expected, result = self.enrich(Projects, "repo", projects)
+        self.assertSameFrame(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
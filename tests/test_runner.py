@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import pandas
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+from cereslib.enrich.enrich import FilePath, FileType, Gender, GenderCache
+from cereslib.pipeline.pipeline import Pipeline
+from cereslib.pipeline.runner import PipelineRunner
+
+
+class MockedEventizer(object):
+    """ Eventizer with one event per file """
+
+    def __init__(self, items, delay=0):
+        self.items = items
+        self.delay = delay
+
+    def eventize(self, granularity):
+        time.sleep(self.delay)
+        events = {"hash": [], "filepath": []}
+        for item in self.items:
+            for path in item["files"]:
+                events["hash"].append(item["hash"])
+                events["filepath"].append(path)
+        return pandas.DataFrame(events)
+
+
+class MockedSink(object):
+    """ Sink that keeps the dataframes written """
+
+    def __init__(self, delay=0, fail=False):
+        self.frames = []
+        self.delay = delay
+        self.fail = fail
+        self.threads = set()
+
+    def write(self, data):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("Sink failed")
+        self.threads.add(threading.get_ident())
+        self.frames.append(data)
+
+
+class MockedGenderize(object):
+    """ Genderize client that finds every name """
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, names):
+        self.requests.append(names)
+        return [{"name": name, "gender": "female", "probability": 0.9, "count": 10} for name in names]
+
+
+def batches(count, delay=0):
+    for number in range(count):
+        time.sleep(delay)
+        yield [{"hash": "%s-%s" % (number, i), "files": ["src/main.py", "README"]} for i in range(3)]
+
+
+class TestPipelineRunner(unittest.TestCase):
+    """ Unit tests for PipelineRunner class
+    """
+
+    def build_pipeline(self, delay=0):
+        pipeline = Pipeline()
+        pipeline.eventize(MockedEventizer, 1, delay)
+        pipeline.filter(("filepath", "!=", "README"))
+        pipeline.enrich(FileType, "filepath")
+        pipeline.enrich(FilePath, "filepath")
+        return pipeline
+
+    def test_run(self):
+        """ Test every batch is enriched and written in order
+        """
+
+        pipeline = self.build_pipeline()
+        sink = MockedSink()
+        runner = PipelineRunner(pipeline, sink)
+
+        self.assertEqual(runner.run(batches(5)), 15)
+        self.assertEqual(len(sink.frames), 5)
+        self.assertNotIn(threading.get_ident(), sink.threads)
+
+        expected_df = pipeline.run(next(batches(1)))
+        pandas.testing.assert_frame_equal(sink.frames[0], expected_df)
+        self.assertListEqual([frame["hash"].iloc[0] for frame in sink.frames],
+                             ["0-0", "1-0", "2-0", "3-0", "4-0"])
+
+        stats = runner.stats()
+        self.assertListEqual(list(stats.index), ["read", "eventize", "enrich", "write"])
+        self.assertListEqual(stats["batches"].tolist(), [5, 5, 5, 5])
+        self.assertListEqual(stats["rows"].tolist(), [15, 30, 15, 15])
+        self.assertTrue((stats["queue_max"] <= 2).all())
+
+    def test_processes(self):
+        """ Test items are eventized in a pool of processes
+        """
+
+        sink = MockedSink()
+        runner = PipelineRunner(self.build_pipeline(), sink, processes=2)
+
+        self.assertEqual(runner.run(batches(6)), 18)
+        self.assertListEqual([frame["hash"].iloc[0] for frame in sink.frames],
+                             ["%s-0" % number for number in range(6)])
+        self.assertEqual(runner.stats().loc["eventize", "rows"], 36)
+
+    def test_overlap(self):
+        """ Test stages run at the same time
+        """
+
+        count = 6
+        delay = 0.05
+        runner = PipelineRunner(self.build_pipeline(delay), MockedSink(delay))
+        runner.run(batches(count, delay))
+
+        # Sequential stages would take 3 * count * delay
+        self.assertLess(runner.elapsed, 2 * count * delay)
+
+    def test_error(self):
+        """ Test errors of a stage stop the runner and are raised
+        """
+
+        runner = PipelineRunner(self.build_pipeline(), MockedSink(fail=True))
+        with self.assertRaises(RuntimeError):
+            runner.run(batches(10))
+
+        runner = PipelineRunner(self.build_pipeline(), MockedSink(fail=True), processes=2)
+        with self.assertRaises(RuntimeError):
+            runner.run(batches(10))
+
+        def failing_batches():
+            yield from batches(1)
+            raise ValueError("Source failed")
+
+        sink = MockedSink()
+        runner = PipelineRunner(self.build_pipeline(), sink)
+        with self.assertRaises(ValueError):
+            runner.run(failing_batches())
+
+    def test_gender_cache(self):
+        """ Test an enricher with a SQLite cache runs in the enrich thread
+        """
+
+        tmp_path = tempfile.mkdtemp(prefix='cereslib_')
+        cache_file = os.path.join(tmp_path, "gender.db")
+
+        try:
+            connection = MockedGenderize()
+            gender = Gender(None, cache_file=cache_file, connection=connection)
+            pipeline = self.build_pipeline()
+            pipeline.enrich(gender, "filepath")
+
+            sink = MockedSink()
+            runner = PipelineRunner(pipeline, sink)
+            self.assertEqual(runner.run(batches(3)), 9)
+            self.assertListEqual(sink.frames[0]["gender"].tolist(), ["female"] * 3)
+            self.assertListEqual(connection.requests, [["src/main.py"]])
+            gender.cache.close()
+
+            cache = GenderCache(cache_file)
+            self.assertListEqual(list(cache.get(["src/main.py"])), ["src/main.py"])
+            cache.close()
+        finally:
+            shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    unittest.main()